@@ -1,17 +1,41 @@
-from flask import Flask, request, jsonify, send_file, abort
+from flask import Flask, Request, request, jsonify, send_file, abort, redirect, Response, stream_with_context
+from werkzeug.exceptions import ClientDisconnected, RequestEntityTooLarge, UnsupportedMediaType
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
+from werkzeug.formparser import FormDataParser, MultiPartParser
 import datetime
 import jwt
 from functools import wraps
+from contextlib import closing, contextmanager
 import os
+import fnmatch
 import json
+import mimetypes
+import posixpath
+import shutil
+import sqlite3
+import tarfile
 import uuid
+import zipfile
+import hashlib
+import threading
+import queue
+from urllib.parse import quote as url_quote
+
+import click
+import numpy as np
 
 from dotenv import load_dotenv
 
+from storage import LocalStorage, make_storage
+
 load_dotenv()
 
-from sqlalchemy.orm import joinedload # For eager loading relationships
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import AddConstraint, CreateTable
+from sqlalchemy.orm import joinedload, selectinload # For eager loading relationships
 
 from flask_cors import CORS
 
@@ -19,7 +43,7 @@ from flask_cors import CORS
 app = Flask(__name__)
 CORS(app, resources={r"/*": {
     "origins": ["http://localhost:5173", "http://localhost:8080"],  # Match your React frontend origin
-    "methods": ["GET", "POST", "OPTIONS"],  # Include OPTIONS for preflight
+    "methods": ["GET", "POST", "PUT", "OPTIONS"],  # Include OPTIONS for preflight
     "allow_headers": ["Content-Type", "Authorization"]  # Allow JSON headers
 }})
 
@@ -28,19 +52,53 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('SQLALCHEMY_DATABASE_URI'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = os.environ.get('SQLALCHEMY_TRACK_MODIFICATIONS')
 app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER')
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY')
-# too early to include these (deal with the error it brings)
-# app.config['MAX_CONTENT_LENGTH'] = os.environ.get('MAX_CONTENT_LENGTH')
+# Log a warning when a loader goes over its query budget (defaults to on in debug mode);
+# the budgets themselves are enforced by tests/test_query_counts.py
+app.config['LOG_QUERY_BUDGET'] = os.environ.get('LOG_QUERY_BUDGET', '').lower() in ('1', 'true', 'yes')
+# /files: seconds clients may reuse a file before revalidating it with ETag/Last-Modified
+app.config['FILES_MAX_AGE'] = int(os.environ.get('FILES_MAX_AGE', 3600))
+# Hand /files delivery to a front proxy: X-Sendfile (Apache, lighttpd) or an internal nginx location for X-Accel-Redirect
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+app.config['FILES_ACCEL_REDIRECT_PREFIX'] = os.environ.get('FILES_ACCEL_REDIRECT_PREFIX')
+# Where media is kept: 'local' (under STORAGE_ROOT, by default BASE_DIR) or 's3' (any S3-compatible API;
+# S3_PUBLIC_ENDPOINT_URL is the host browsers use when it differs from S3_ENDPOINT_URL)
+app.config['STORAGE_BACKEND'] = os.environ.get('STORAGE_BACKEND', 'local')
+app.config['STORAGE_ROOT'] = os.environ.get('STORAGE_ROOT') or os.environ.get('BASE_DIR')
+app.config['S3_BUCKET'] = os.environ.get('S3_BUCKET')
+app.config['S3_ENDPOINT_URL'] = os.environ.get('S3_ENDPOINT_URL')
+app.config['S3_PUBLIC_ENDPOINT_URL'] = os.environ.get('S3_PUBLIC_ENDPOINT_URL')
+app.config['S3_REGION'] = os.environ.get('S3_REGION')
+app.config['S3_ACCESS_KEY_ID'] = os.environ.get('S3_ACCESS_KEY_ID')
+app.config['S3_SECRET_ACCESS_KEY'] = os.environ.get('S3_SECRET_ACCESS_KEY')
+# s3: seconds a presigned media URL handed out by /files stays valid
+app.config['MEDIA_URL_EXPIRY'] = int(os.environ.get('MEDIA_URL_EXPIRY', 3600))
+# Resumable uploads: largest file a client may declare, and how long an unused upload is kept
+app.config['CHUNKED_UPLOAD_MAX_BYTES'] = int(os.environ.get('CHUNKED_UPLOAD_MAX_BYTES', 50 * 1024 * 1024))
+app.config['CHUNKED_UPLOAD_EXPIRY_HOURS'] = int(os.environ.get('CHUNKED_UPLOAD_EXPIRY_HOURS', 24))
+# Upload ceilings in bytes. MAX_CONTENT_LENGTH covers every request; endpoints that take
+# files raise or lower it with @upload_policy (request ceiling, per-file ceiling)
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+app.config['AUTHORING_UPLOAD_MAX_BYTES'] = int(os.environ.get('AUTHORING_UPLOAD_MAX_BYTES', 512 * 1024 * 1024))
+app.config['MEDIA_FILE_MAX_BYTES'] = int(os.environ.get('MEDIA_FILE_MAX_BYTES', 100 * 1024 * 1024))
+app.config['SPEAKING_SUBMIT_MAX_BYTES'] = int(os.environ.get('SPEAKING_SUBMIT_MAX_BYTES', 105 * 1024 * 1024))
+app.config['SPEAKING_TASK_SUBMIT_MAX_BYTES'] = int(os.environ.get('SPEAKING_TASK_SUBMIT_MAX_BYTES', 26 * 1024 * 1024))
+app.config['RECORDING_MAX_BYTES'] = int(os.environ.get('RECORDING_MAX_BYTES', 25 * 1024 * 1024))
+app.config['BUNDLE_IMPORT_MAX_BYTES'] = int(os.environ.get('BUNDLE_IMPORT_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+# too early to include this (deal with the error it brings)
 # app.config['SEND_FILE_MAX_AGE_DEFAULT'] = os.environ.get('SEND_FILE_MAX_AGE_DEFAULT')
 
 
 
 # Ensure upload folder and subfolders exist
-folders = ['listening_audios', 'listening_photos', 'question_audios', 'speaking_audios', 'writing_audios']
+folders = ['listening_audios', 'listening_photos', 'question_audios', 'speaking_audios', 'writing_audios', 'speaking_responses']
 for folder in folders:
     path = os.path.join(app.config['UPLOAD_FOLDER'], folder)
     if not os.path.exists(path):
         os.makedirs(path)
 
+# Media storage: uploads are spooled under UPLOAD_FOLDER on this node, then kept by the backend
+media_storage = make_storage(app.config)
+
 
 def admin_required(f):
     @wraps(f)
@@ -114,14 +172,249 @@ def token_required(f):
 
 
 # Helper function to save files and generate URLs
-def save_file(file, subfolder):
-    if file:
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], subfolder, filename)
-        file.save(file_path)
-        return f'/{app.config["UPLOAD_FOLDER"]}/{subfolder}/{filename}'
+# Uploads are content-addressed: the stream is hashed while it is spooled to disk and
+# stored as <sha256><ext>, so identical content is kept once (whatever its name or
+# subfolder) and different files can no longer overwrite each other.
+# A MediaBlob row that an upload reuses stays share-locked until the upload's transaction
+# commits, and purge_unreferenced_media() locks the rows it deletes, so a purge either sees
+# the new reference or has removed the row before the upload looks for it.
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+def spool_path():
+    """A fresh temp path on this node for an upload being received. Dot-prefixed so
+    purge-media never mistakes an upload in progress for an orphan."""
+    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], '.spool'), exist_ok=True)
+    return os.path.join(app.config['UPLOAD_FOLDER'], '.spool', f'.upload-{uuid.uuid4()}')
+
+def media_key(url):
+    """Storage key of an upload URL."""
+    return url.lstrip('/')
+
+def find_blob(digest):
+    """The MediaBlob row for a SHA-256, share-locked until the caller's transaction ends."""
+    return MediaBlob.query.filter_by(digest=digest).with_for_update(read=True).first()
+
+def existing_blob_url(digest):
+    """URL of the stored file with this SHA-256, or None if storage does not have it."""
+    blob = find_blob(digest)
+    if blob and media_storage.size(media_key(blob.url)) is not None:
+        return blob.url
     return None
 
+def store_blob(temp_path, digest, size, filename, subfolder):
+    """Moves an already hashed temp file into storage under its digest, or drops it if that
+    content is stored already. Returns the URL. Adds a MediaBlob row; does NOT commit."""
+    try:
+        url = existing_blob_url(digest)
+        if url:
+            return url
+
+        extension = os.path.splitext(secure_filename(filename or ''))[1].lower()
+        blob = find_blob(digest)
+        url = f'/{app.config["UPLOAD_FOLDER"]}/{subfolder}/{digest}{extension}'
+        if not blob and media_storage.size(media_key(url)) is not None:
+            # A file without a row is on its way out (a purge deletes files after committing),
+            # so don't put the new copy where that delete would land
+            url = f'/{app.config["UPLOAD_FOLDER"]}/{subfolder}/{digest}-{uuid.uuid4().hex[:8]}{extension}'
+        media_storage.put_file(temp_path, media_key(url), mimetypes.guess_type(url)[0] or guess_media_type(temp_path))
+        if blob: # Row survived but its file was lost
+            blob.url, blob.size = url, size
+            return url
+        try:
+            with db.session.begin_nested():
+                db.session.add(MediaBlob(digest=digest, url=url, size=size, ref_count=0))
+        except IntegrityError:
+            # A concurrent upload of the same content stored it first: use that copy
+            blob = find_blob(digest)
+            if blob.url != url:
+                media_storage.delete(media_key(url))
+            return blob.url
+        return url
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def save_file(file, subfolder):
+    """Stores an upload once per distinct content and returns its URL. Adds a MediaBlob row; does NOT commit."""
+    if not file:
+        return None
+    if isinstance(file.stream, UploadSpool) and os.path.exists(file.stream.path):
+        # Hashed and on disk since the request was parsed
+        file.stream.file.close()
+        return store_blob(file.stream.path, file.stream.sha256.hexdigest(), file.stream.size, file.filename, subfolder)
+    temp_path, digest, size = spool_stream(file.stream)
+    return store_blob(temp_path, digest, size, file.filename, subfolder)
+
+def spool_stream(stream):
+    """Copies a stream to a temp file, hashing it on the way. Returns (temp_path, sha256 hex digest, size)."""
+    temp_path = spool_path()
+    sha256, size = hashlib.sha256(), 0
+    try:
+        with open(temp_path, 'wb') as f:
+            for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+                sha256.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return temp_path, sha256.hexdigest(), size
+
+def save_uploads(pending, saved):
+    """Saves each (row, key, file, subfolder) upload into row[key], appending its URL to `saved` as it goes,
+    so a caller that fails part way knows what to purge. Adds MediaBlob rows; does NOT commit."""
+    for row, key, file, subfolder in pending:
+        row[key] = save_file(file, subfolder)
+        saved.append(row[key])
+
+# Upload spooling
+# Multipart file parts are written straight into UPLOAD_FOLDER/.spool while the body is
+# parsed, hashed and checked as they arrive: nothing is buffered in memory or copied out
+# of a temp dir, and save_file() only has to rename the part into the blob store. An
+# oversized or wrong-typed part raises before the rest of the body is read. Endpoints that
+# take files set their ceilings with @upload_policy; the rest get MAX_CONTENT_LENGTH.
+# Accepted types are either one tuple of MIME type prefixes for every file field, or
+# {field name pattern: prefixes} for endpoints whose fields take different kinds of media.
+
+AUDIO_TYPES = ('audio/', 'video/webm', 'video/mp4') # Browsers label audio-only recordings with the container type
+IMAGE_TYPES = ('image/',)
+UPLOAD_POLICIES = {} # endpoint -> (request ceiling config key, per-file ceiling config key, accepted types or None)
+
+def upload_policy(max_request, max_file=None, accept=None):
+    """Sets an endpoint's request and per-file ceilings (config keys) and the MIME type prefixes its files may have,
+    for all of them or per field name pattern."""
+    def decorator(f):
+        UPLOAD_POLICIES[f.__name__] = (max_request, max_file, accept)
+        return f
+    return decorator
+
+def accepted_media_type(mimetype, accept):
+    return accept is None or mimetype is None or mimetype.startswith(accept)
+
+def field_accepted_types(accept, field_name):
+    """The type prefixes a file field may carry under an endpoint's accepted types. Raises
+    UnsupportedMediaType for a field that no pattern names."""
+    if not isinstance(accept, dict):
+        return accept
+    for pattern, prefixes in accept.items():
+        if fnmatch.fnmatchcase(field_name or '', pattern):
+            return prefixes
+    raise UnsupportedMediaType(f'{field_name} does not take files')
+
+class UploadSpool:
+    """Writable file for one multipart file part, kept in UPLOAD_FOLDER/.spool.
+    Removed when the request ends unless save_file() moved it into the store."""
+
+    def __init__(self, max_bytes, accept, field_name=None):
+        self.path = spool_path()
+        self.max_bytes, self.accept, self.field_name = max_bytes, accept, field_name
+        self.sha256, self.size, self.head, self.sniffed = hashlib.sha256(), 0, b'', False
+        self.file = open(self.path, 'w+b')
+
+    def sniff(self):
+        # Only signatures we recognise can reject; unknown content is left to the declared type
+        self.sniffed = True
+        if not accepted_media_type(sniff_media_type(self.head), self.accept):
+            raise UnsupportedMediaType(f'File content is {sniff_media_type(self.head)}, which {self.field_name or "this endpoint"} does not accept')
+
+    def write(self, data):
+        if self.max_bytes is not None and self.size + len(data) > self.max_bytes:
+            raise RequestEntityTooLarge(f'Files are limited to {self.max_bytes} bytes')
+        if not self.sniffed:
+            self.head += data[:MEDIA_SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= MEDIA_SNIFF_BYTES:
+                self.sniff()
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def seek(self, *args):
+        if not self.sniffed: # Parts shorter than the sniffed prefix
+            self.sniff()
+        return self.file.seek(*args)
+
+    def close(self):
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __iter__(self):
+        return iter(self.file)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+class UploadPartParser(MultiPartParser):
+    """MultiPartParser that also tells the stream factory which form field a file part is for."""
+
+    def start_file_streaming(self, event, total_content_length):
+        return self.stream_factory(
+            total_content_length=total_content_length,
+            content_type=event.headers.get('content-type'),
+            filename=event.filename,
+            field_name=event.name
+        )
+
+class UploadFormDataParser(FormDataParser):
+    def _parse_multipart(self, stream, mimetype, content_length, options):
+        parser = UploadPartParser(
+            stream_factory=self.stream_factory,
+            max_form_memory_size=self.max_form_memory_size,
+            max_form_parts=self.max_form_parts,
+            cls=self.cls
+        )
+        boundary = options.get('boundary', '').encode('ascii')
+        if not boundary:
+            raise ValueError('Missing boundary')
+        form, files = parser.parse(stream, boundary, content_length)
+        return stream, form, files
+
+class UploadRequest(Request):
+    """Request that spools multipart file parts with UploadSpool under the endpoint's upload policy."""
+
+    form_data_parser_class = UploadFormDataParser
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None, field_name=None):
+        _, max_file, accept = UPLOAD_POLICIES.get(self.endpoint, (None, None, None))
+        accept = field_accepted_types(accept, field_name)
+        # Checked from the part headers, before any of its bytes are read
+        if content_type in (None, 'application/octet-stream'):
+            content_type = mimetypes.guess_type(filename or '')[0]
+        if not accepted_media_type(content_type and content_type.split(';')[0].strip(), accept):
+            raise UnsupportedMediaType(f'{filename or "File"} is {content_type}, which {field_name or "this endpoint"} does not accept')
+        spool = UploadSpool(app.config[max_file] if max_file else None, accept, field_name)
+        self.upload_spools.append(spool)
+        return spool
+
+    @property
+    def upload_spools(self):
+        if '_upload_spools' not in self.__dict__:
+            self._upload_spools = []
+        return self._upload_spools
+
+    def close(self):
+        super().close()
+        for spool in self.upload_spools: # Includes parts abandoned by a rejected parse
+            spool.close()
+
+app.request_class = UploadRequest
+
+@app.before_request
+def apply_upload_policy():
+    # Registered before the request logger, which parses form bodies
+    policy = UPLOAD_POLICIES.get(request.endpoint)
+    if policy:
+        request.max_content_length = app.config[policy[0]]
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    return jsonify({'error': e.description}), 413
+
+@app.errorhandler(UnsupportedMediaType)
+def upload_wrong_type(e):
+    return jsonify({'error': e.description}), 415
+
 # Helper function to generate JWT token
 def generate_token(user):
     """Generate a JWT token for the user with a 24-hour expiration."""
@@ -137,10 +430,19 @@ def generate_token(user):
 from models import db, User, Section, ListeningAudio, ReadingPassage, \
                     Question, Option, TableQuestionRow, TableQuestionColumn, \
                     CorrectAnswer, SpeakingTask, WritingTask, QuestionAudio, \
-                    UserAnswer, SpeakingResponse, WritingResponse, Score
+                    UserAnswer, SpeakingResponse, WritingResponse, Score, \
+                    SectionAttempt, StudentSectionProgress, MediaBlob, ChunkedUpload
 
 db.init_app(app)
 
+# SQLite ignores foreign keys, ON DELETE CASCADE included, unless each connection turns them on
+@event.listens_for(Engine, 'connect')
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
 from flask_migrate import Migrate
 
 migrate = Migrate(app, db)
@@ -150,115 +452,826 @@ migrate.init_app(app, db) # <<< Initialize migrate HERE
 
 
 
-def create_question(question_data, section_type, reading_passage_id=None, listening_audio_id=None, audio_file=None):
-    """Creates a question and adds it to the session, but does NOT commit.""" # below line is changed // Docstring update
+# Bulk authoring
+# Sections are authored as a whole, so questions are first turned into plain row
+# specs and then written with one batched INSERT per table instead of flushing
+# after every question, option list and table.
 
-    # # below is a new code
+def build_question_spec(question_data, section_type):
+    """Validates one authored question into plain rows for insert_question_specs(). Does not touch the session.
+
+    Correct answers are kept as (option_index, row_index, column_index) until ids exist.
+    """
     # Extract paragraph_index specifically for reading questions
     paragraph_index_val = None
     if section_type == 'reading':
         paragraph_index_val = question_data.get('paragraph_index')
-        # Optional: Add validation if needed
         if paragraph_index_val is not None and not isinstance(paragraph_index_val, int):
              print(f"Warning: Invalid paragraph_index type received: {paragraph_index_val}. Setting to None.")
-             paragraph_index_val = None # Or raise an error: raise ValueError("paragraph_index must be an integer or null")
-    # # above is a new code
-
-    # Create the question
-    question = Question(
-        section_type=section_type,
-        type=question_data['type'],
-        prompt=question_data['prompt'],
-        reading_passage_id=reading_passage_id if section_type == 'reading' else None,
-        listening_audio_id=listening_audio_id if section_type == 'listening' else None,
-        paragraph_index=paragraph_index_val # below line is changed // Assign the extracted paragraph_index
-    )
-    db.session.add(question)
-    db.session.flush()  # Ensure question.id is available
-
-    question_id_for_debug = question.id
+             paragraph_index_val = None
+
+    question_type = question_data['type']
+    spec = {
+        'question': {
+            'section_type': section_type,
+            'type': question_type,
+            'prompt': question_data['prompt'],
+            'paragraph_index': paragraph_index_val,
+            'section_id': None,
+            'reading_passage_id': None,
+            'listening_audio_id': None
+        },
+        'options': [],
+        'rows': [],
+        'columns': [],
+        'correct': [],
+        'audio_url': None
+    }
 
-    # --- The rest of the option/correct answer/table handling logic remains the same ---
     # Handle options and correct answers
-    if question.type in ['multiple_to_multiple', 'insert_text', 'multiple_to_single', 'audio', 'prose_summary']:
-        if question.type == 'audio' and audio_file:
-            audio_url = save_file(audio_file, 'question_audios')
-            question_audio = QuestionAudio(question_id=question.id, audio_url=audio_url)
-            db.session.add(question_audio)
-
-        if question.type == 'insert_text':
+    if question_type in ['multiple_to_multiple', 'insert_text', 'multiple_to_single', 'audio', 'prose_summary']:
+        if question_type == 'insert_text':
             options = ['a','b','c','d']
         else:
             options = question_data.get('options', [])
+        spec['options'] = list(options)
 
-        print(f"DEBUG INSIDE create_question (ID: {question_id_for_debug}): Received options list: {options}")
-
-        if question.type in ['multiple_to_single', 'audio']:
+        if question_type in ['multiple_to_single', 'audio']:
             correct_option_index = question_data.get('correctOptionIndex')
             corrects = [correct_option_index] if isinstance(correct_option_index, int) else []
-        elif question.type == 'insert_text':
+        elif question_type == 'insert_text':
             insertion_point_text = question_data.get('correctInsertionPoint')
-            try:
-                # Ensure options list is populated before using index
-                corrects = [options.index(insertion_point_text)] if insertion_point_text in options else []
-            except ValueError:
-                 print(f"Warning: Correct insertion point '{insertion_point_text}' not found in options for question {question.id}")
-                 corrects = []
+            corrects = [options.index(insertion_point_text)] if insertion_point_text in options else []
+            if not corrects:
+                 print(f"Warning: Correct insertion point '{insertion_point_text}' not found in options for question '{spec['question']['prompt']}'")
         else: # multiple_to_multiple, prose_summary
             correct_indices = question_data.get('correctAnswerIndices', [])
             # Ensure indices are valid integers
             corrects = [idx for idx in correct_indices if isinstance(idx, int)]
 
-        option_objects = []
-        for opt_text in options:
-            option = Option(question=question, option_text=opt_text)
-            db.session.add(option)
-            option_objects.append(option)
-
-        db.session.flush() # Flush after adding options to ensure they exist before adding correct answers
-
         for correct_index in corrects:
-            if 0 <= correct_index < len(option_objects):
-                correct_option_object = option_objects[correct_index]
-                db.session.add(CorrectAnswer(question=question, option=correct_option_object))
+            if 0 <= correct_index < len(options):
+                spec['correct'].append((correct_index, None, None))
             else:
-                print(f"Warning: Correct answer index {correct_index} is out of bounds for question {question.id}. Options len: {len(option_objects)}")
+                print(f"Warning: Correct answer index {correct_index} is out of bounds for question '{spec['question']['prompt']}'. Options len: {len(options)}")
 
     # Handle table questions
-    elif question.type == 'table':
-        rows = question_data.get('rows', [])
-        columns = question_data.get('columns', [])
-        correct_answers = question_data.get('correctTableSelections', [])
-
-        row_objects = []
-        for row_label in rows:
-            row_obj = TableQuestionRow(question=question, row_label=row_label)
-            db.session.add(row_obj)
-            row_objects.append(row_obj)
-
-        column_objects = []
-        for col_label in columns:
-            col_obj = TableQuestionColumn(question=question, column_label=col_label)
-            db.session.add(col_obj)
-            column_objects.append(col_obj)
-
-        db.session.flush() # Flush after adding rows/columns
-
-        for ca in correct_answers:
+    elif question_type == 'table':
+        spec['rows'] = list(question_data.get('rows', []))
+        spec['columns'] = list(question_data.get('columns', []))
+
+        for ca in question_data.get('correctTableSelections', []):
             row_index = ca.get('rowIndex')
             col_index = ca.get('colIndex')
 
-            if isinstance(row_index, int) and 0 <= row_index < len(row_objects) and \
-               isinstance(col_index, int) and 0 <= col_index < len(column_objects):
-                correct_row_object = row_objects[row_index]
-                correct_column_object = column_objects[col_index]
-                print(f"Mapping Table Correct Answer: Row='{correct_row_object.row_label}' (Index {row_index}), Col='{correct_column_object.column_label}' (Index {col_index})")
-                db.session.add(CorrectAnswer(question=question, table_row=correct_row_object, table_column=correct_column_object))
+            if isinstance(row_index, int) and 0 <= row_index < len(spec['rows']) and \
+               isinstance(col_index, int) and 0 <= col_index < len(spec['columns']):
+                spec['correct'].append((None, row_index, col_index))
             else:
-                print(f"Warning: Invalid table selection indices (row: {row_index}, col: {col_index}) for question {question.id}")
+                print(f"Warning: Invalid table selection indices (row: {row_index}, col: {col_index}) for question '{spec['question']['prompt']}'")
+
+    return spec
+
+def insert_in_order(model, rows, owned_by):
+    """Batched INSERT of `rows`; returns the new primary keys in the same order as `rows`.
+
+    PostgreSQL hands the ids back through RETURNING kept in parameter order. SQLite
+    cannot order RETURNING for a batch (SQLAlchemy would fall back to one INSERT per
+    row), so there it is a plain executemany followed by one SELECT of the ids matching
+    `owned_by` -- a filter on a parent created in this transaction, so every match is new.
+    """
+    if not rows:
+        return []
+    # render_nulls keeps rows with different None columns in the same batch
+    if db.engine.dialect.name == 'postgresql':
+        return db.session.execute(
+            db.insert(model).returning(model.id, sort_by_parameter_order=True), rows,
+            execution_options={'render_nulls': True}
+        ).scalars().all()
+    db.session.execute(db.insert(model), rows, execution_options={'render_nulls': True})
+    return db.session.execute(db.select(model.id).where(owned_by).order_by(model.id)).scalars().all()
+
+def insert_question_specs(specs):
+    """Writes question specs for sections created in this transaction. Does NOT commit.
+
+    Each spec's question row must already carry its section_id and passage/audio id.
+    One INSERT per table -- questions, options, table rows, table columns, question
+    audios and correct answers -- however many questions and sections there are.
+    Returns the question ids in spec order.
+    """
+    if not specs:
+        return []
+    section_ids = {spec['question']['section_id'] for spec in specs}
+    question_ids = insert_in_order(Question, [spec['question'] for spec in specs], Question.section_id.in_(section_ids))
+    section_questions = db.select(Question.id).where(Question.section_id.in_(section_ids)).scalar_subquery()
+
+    # Choices are inserted in display order, which keeps the id order the A, B, C, D mapping relies on
+    choice_ids = {}
+    for key, model, label in [('options', Option, 'option_text'),
+                              ('rows', TableQuestionRow, 'row_label'),
+                              ('columns', TableQuestionColumn, 'column_label')]:
+        rows = [{'question_id': question_id, label: text}
+                for question_id, spec in zip(question_ids, specs) for text in spec[key]]
+        ids = iter(insert_in_order(model, rows, model.question_id.in_(section_questions)))
+        choice_ids[key] = [[next(ids) for _ in spec[key]] for spec in specs]
+
+    audio_rows = [{'question_id': question_id, 'audio_url': spec['audio_url']}
+                  for question_id, spec in zip(question_ids, specs) if spec['audio_url']]
+    if audio_rows:
+        db.session.execute(db.insert(QuestionAudio), audio_rows)
+
+    correct_rows = []
+    for i, (question_id, spec) in enumerate(zip(question_ids, specs)):
+        for option_index, row_index, column_index in spec['correct']:
+            correct_rows.append({
+                'question_id': question_id,
+                'option_id': choice_ids['options'][i][option_index] if option_index is not None else None,
+                'table_row_id': choice_ids['rows'][i][row_index] if row_index is not None else None,
+                'table_column_id': choice_ids['columns'][i][column_index] if column_index is not None else None
+            })
+    if correct_rows:
+        db.session.execute(db.insert(CorrectAnswer), correct_rows, execution_options={'render_nulls': True})
+    return question_ids
+
+@contextmanager
+def query_budget(max_queries, label='block'):
+    """Logs a warning when the wrapped block issues more than `max_queries` SQL statements.
+
+    Only active when LOG_QUERY_BUDGET is set or the app runs in debug mode,
+    so production requests don't pay for the engine listener. Never fails the request.
+    """
+    if not (app.config.get('LOG_QUERY_BUDGET') or app.debug):
+        yield
+        return
+
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    try:
+        yield
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_statement)
+    if len(statements) > max_queries:
+        print(f"Warning: {label} issued {len(statements)} queries (budget {max_queries}): {statements}")
+
+
+# Section content loaders
+
+def load_reading_section_content(section_id):
+    """Builds the passages -> questions -> options tree for a reading section.
+
+    Always costs 4 queries (section, passages, questions, options) regardless of
+    how many passages or questions the section has. Returns None if not found.
+    """
+    with query_budget(4, f'reading section {section_id} loader'):
+        section = Section.query.filter_by(id=section_id, section_type='reading').first()
+        if not section:
+            return None
+
+        passages = ReadingPassage.query\
+            .filter_by(section_id=section.id)\
+            .options(selectinload(ReadingPassage.questions).selectinload(Question.options))\
+            .order_by(ReadingPassage.id)\
+            .all()
+
+        passages_data = []
+        for passage in passages:
+            questions_data = []
+            for q in passage.questions:
+                question_dict = {
+                    'id': q.id,
+                    'type': q.type,
+                    'prompt': q.prompt,
+                    'options': [o.option_text for o in q.options],
+                    'paragraph_index': q.paragraph_index
+                }
+                # Add summary_statement if it exists (for prose_summary)
+                if getattr(q, 'summary_statement', None):
+                    question_dict['summary_statement'] = q.summary_statement
+                questions_data.append(question_dict)
+
+            passages_data.append({
+                'id': passage.id,
+                'title': passage.title,
+                'content': passage.content,
+                'questions': questions_data
+            })
+
+    return {
+        'id': section.id,
+        'title': section.title,
+        'passages': passages_data
+    }
+
+def load_listening_section_content(section_id):
+    """Builds the audios -> questions -> options/rows/columns/snippets tree for a listening section.
+
+    Costs a fixed 7 queries (section, audios, questions, options, table rows,
+    table columns, question audios) no matter how many questions there are.
+    Returns None if the section does not exist.
+    """
+    with query_budget(7, f'listening section {section_id} loader'):
+        section = Section.query.filter_by(id=section_id, section_type='listening').first()
+        if not section:
+            return None
+
+        questions_loader = selectinload(ListeningAudio.questions)
+        audios = ListeningAudio.query\
+            .filter_by(section_id=section.id)\
+            .options(
+                questions_loader.selectinload(Question.options),
+                questions_loader.selectinload(Question.table_rows),
+                questions_loader.selectinload(Question.table_columns),
+                questions_loader.selectinload(Question.question_audios)
+            )\
+            .order_by(ListeningAudio.id)\
+            .all()
+
+        audios_data = []
+        for audio in audios:
+            questions_data = []
+            for q in audio.questions:
+                if q.type == 'table':
+                    questions_data.append({
+                        'id': q.id, 'type': q.type, 'prompt': q.prompt,
+                        'rows': [row.row_label for row in q.table_rows],
+                        'columns': [col.column_label for col in q.table_columns]
+                    })
+                else:
+                    options_data = [o.option_text for o in q.options]
+                    if q.type == 'audio':
+                        snippet = q.question_audios[0] if q.question_audios else None
+                        questions_data.append({'id': q.id, 'type': q.type, 'audio_url': snippet.audio_url if snippet else None, 'prompt': q.prompt, 'options': options_data})
+                    else:
+                        questions_data.append({'id': q.id, 'type': q.type, 'prompt': q.prompt, 'options': options_data})
+            audios_data.append({
+                'id': audio.id,
+                'title': audio.title,
+                'audio_url': audio.audio_url,
+                'photo_url': audio.photo_url,
+                'questions': questions_data
+            })
+
+    return {
+        'id': section.id,
+        'title': section.title,
+        'audios': audios_data
+    }
+
+def load_speaking_section_content(section_id):
+    """Builds the task1..task4 payload for a speaking section. Returns None if not found."""
+    section = Section.query.filter_by(id=section_id, section_type='speaking').first()
+    if not section:
+        return None
+
+    tasks = SpeakingTask.query.filter_by(section_id=section.id).order_by(SpeakingTask.task_number).all()
+    tasks_data = [{'id': t.id, 'task_number': t.task_number, 'passage': t.passage,
+                   'prompt': t.prompt, 'audio_url': t.audio_url} for t in tasks]
+
+    return {
+        'id': section.id,
+        'title': section.title,
+        'task1': tasks_data[0],
+        'task2': tasks_data[1],
+        'task3': tasks_data[2],
+        'task4': tasks_data[3]
+    }
+
+def load_writing_section_content(section_id):
+    """Builds the task1/task2 payload for a writing section. Returns None if not found."""
+    section = Section.query.filter_by(id=section_id, section_type='writing').first()
+    if not section:
+        return None
+
+    tasks = WritingTask.query.filter_by(section_id=section.id).order_by(WritingTask.task_number).all()
+    tasks_data = [{'id': t.id, 'task_number': t.task_number, 'passage': t.passage,
+                   'prompt': t.prompt, 'audio_url': t.audio_url} for t in tasks]
+
+    return {
+        'id': section.id,
+        'title': section.title,
+        'task1': tasks_data[0],
+        'task2': tasks_data[1]
+    }
+
+
+# Section snapshot cache
+# Section content rarely changes once authored, so each section's JSON is rendered
+# once per process and served from memory with a content-hash ETag. Every edit gives
+# the section a new content_version in the same transaction (touch_section), and each
+# read checks it with one primary-key lookup, so all workers and nodes drop a stale
+# render on their next request.
+
+SECTION_LOADERS = {
+    'reading': load_reading_section_content,
+    'listening': load_listening_section_content,
+    'speaking': load_speaking_section_content,
+    'writing': load_writing_section_content,
+}
+
+_section_snapshots = {}        # (section_type, section_id) -> (content_version, body_bytes, etag)
+_section_render_locks = {}     # (section_type, section_id) -> threading.Lock
+_section_snapshots_lock = threading.Lock()
+
+def new_content_version():
+    return uuid.uuid4().hex
+
+def touch_section(section):
+    """Marks a section's content as changed so every process re-renders it. Does NOT commit."""
+    section.content_version = new_content_version()
+
+def section_content_version(section_type, section_id):
+    """The section's current content_version, or None if there is no such section."""
+    return db.session.query(Section.content_version)\
+        .filter(Section.id == section_id, Section.section_type == section_type)\
+        .scalar()
+
+def get_section_snapshot(section_type, section_id):
+    """Returns (body_bytes, etag) for a section, rendering it at most once per content version.
+
+    Concurrent requests for an uncached section wait on a per-section lock so
+    only the first one hits the database. Returns None if the section does not exist.
+    """
+    key = (section_type, section_id)
+    version = section_content_version(section_type, section_id)
+    if version is None:
+        invalidate_section_snapshot(section_type, section_id)
+        return None
+    snapshot = _section_snapshots.get(key)
+    if snapshot and snapshot[0] == version:
+        return snapshot[1:]
+
+    with _section_snapshots_lock:
+        render_lock = _section_render_locks.setdefault(key, threading.Lock())
+
+    with render_lock:
+        snapshot = _section_snapshots.get(key)
+        if snapshot and snapshot[0] == version:
+            return snapshot[1:]
+
+        section_data = SECTION_LOADERS[section_type](section_id)
+        if section_data is None:
+            return None
+
+        body = app.json.dumps(section_data).encode('utf-8')
+        # Stored under the version read before rendering: if an edit committed in between,
+        # the next read sees a newer version and renders again
+        snapshot = (version, body, hashlib.sha256(body).hexdigest())
+        with _section_snapshots_lock:
+            _section_snapshots[key] = snapshot
+    return snapshot[1:]
+
+def invalidate_section_snapshot(section_type, section_id):
+    """Frees this process's snapshot of a section. Other processes notice edits through content_version."""
+    with _section_snapshots_lock:
+        _section_snapshots.pop((section_type, section_id), None)
+
+def section_snapshot_response(section_type, section_id):
+    """Serves a section snapshot, answering If-None-Match with 304 Not Modified."""
+    snapshot = get_section_snapshot(section_type, section_id)
+    if not snapshot:
+        return jsonify({'error': 'Section not found'}), 404
+
+    body, etag = snapshot
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.no_cache = True # Clients must revalidate, edits invalidate the snapshot
+    return response.make_conditional(request)
+
+# Answer-key index
+# Correct answers only change when a section is edited, so the scoring path keeps
+# one in-memory key per section: {question_id: (frozenset_of_correct_answers, points)}.
+# Option questions hold option ids, table questions hold (row_id, column_id) pairs.
+# Like snapshots, keys are tagged with the section's content_version and rebuilt when it moves.
+
+_answer_keys = {}              # (section_type, section_id) -> (content_version, answer key)
+_answer_keys_lock = threading.Lock()
+
+def build_answer_key(section_type, section_id):
+    """Loads the answer key for a reading/listening section in two queries."""
+    question_types = dict(
+        db.session.query(Question.id, Question.type)
+        .filter(Question.section_id == section_id)
+        .all()
+    )
+
+    correct = {question_id: set() for question_id in question_types}
+    correct_rows = db.session.query(
+            CorrectAnswer.question_id, CorrectAnswer.option_id,
+            CorrectAnswer.table_row_id, CorrectAnswer.table_column_id
+        )\
+        .filter(CorrectAnswer.question_id.in_(question_types.keys()))\
+        .all()
+    for question_id, option_id, row_id, column_id in correct_rows:
+        if question_types[question_id] == 'table':
+            correct[question_id].add((row_id, column_id))
+        else:
+            correct[question_id].add(option_id)
+
+    answer_key = {}
+    for question_id, question_type in question_types.items():
+        # Multiple-selection or table questions are worth 2 points, everything else 1
+        points = 2 if question_type in ('prose_summary', 'table') and len(correct[question_id]) > 1 else 1
+        answer_key[question_id] = (frozenset(correct[question_id]), points)
+    return answer_key
+
+def get_answer_key(section_type, section_id):
+    """Returns the cached answer key for a section, building it when missing or out of date."""
+    key = (section_type, section_id)
+    version = section_content_version(section_type, section_id)
+    cached = _answer_keys.get(key)
+    if version is not None and cached and cached[0] == version:
+        return cached[1]
+    answer_key = build_answer_key(section_type, section_id)
+    if version is not None:
+        # Tagged with the version read before building, so a key that raced with an edit is rebuilt next time
+        with _answer_keys_lock:
+            _answer_keys[key] = (version, answer_key)
+    return answer_key
+
+def invalidate_answer_key(section_type, section_id):
+    with _answer_keys_lock:
+        _answer_keys.pop((section_type, section_id), None)
+
+def score_submission(answer_key, submitted_answers):
+    """All-or-nothing scoring of {question_id: set_of_answers} against an answer key."""
+    total_score = 0
+    for question_id, (correct, points) in answer_key.items():
+        user_answers = submitted_answers.get(question_id)
+        if user_answers and user_answers == correct:
+            total_score += points
+    return total_score
+
+# Bulk answer submission helpers
+
+def load_choice_ids(model, question_ids):
+    """Maps question_id -> [ids ordered by id] for Option, TableQuestionRow or TableQuestionColumn in one query."""
+    choice_ids = {question_id: [] for question_id in question_ids}
+    rows = db.session.query(model.question_id, model.id)\
+        .filter(model.question_id.in_(question_ids))\
+        .order_by(model.question_id, model.id)\
+        .all()
+    for question_id, choice_id in rows:
+        choice_ids[question_id].append(choice_id)
+    return choice_ids
+
+def replace_user_answers(student_id, question_ids, answer_rows):
+    """Swaps a student's answers for the given questions: one DELETE plus one executemany INSERT.
+
+    Does NOT commit, so the caller's transaction covers the whole submission.
+    """
+    if not question_ids:
+        return
+    replaced = db.select(UserAnswer.id).where(
+        UserAnswer.user_id == student_id,
+        UserAnswer.question_id.in_(question_ids)
+    )
+    # Feedback on the old answers goes with them
+    db.session.execute(db.delete(Score).where(Score.user_answer_id.in_(replaced)))
+    db.session.execute(
+        db.delete(UserAnswer).where(
+            UserAnswer.user_id == student_id,
+            UserAnswer.question_id.in_(question_ids)
+        )
+    )
+    if answer_rows:
+        db.session.execute(db.insert(UserAnswer), answer_rows)
+
+def user_answer_row(student_id, question_id, option_id=None, table_row_id=None, table_column_id=None):
+    # Every row carries the same keys so the INSERT goes out as a single executemany batch
+    return {
+        'user_id': student_id,
+        'question_id': question_id,
+        'option_id': option_id,
+        'table_row_id': table_row_id,
+        'table_column_id': table_column_id
+    }
+
+def load_user_answer_sets(student_id, question_ids):
+    """Maps question_id -> the student's stored set of option ids or (row_id, column_id) pairs, in one query.
+
+    Scoring reads the stored answers rather than the request body, because a submission only
+    replaces the questions it contains and earlier answers to the rest still count.
+    """
+    answer_sets = {}
+    rows = db.session.query(
+            UserAnswer.question_id, UserAnswer.option_id,
+            UserAnswer.table_row_id, UserAnswer.table_column_id
+        )\
+        .filter(UserAnswer.user_id == student_id, UserAnswer.question_id.in_(list(question_ids)))\
+        .all()
+    for question_id, option_id, row_id, column_id in rows:
+        choice = (row_id, column_id) if row_id is not None else option_id
+        answer_sets.setdefault(question_id, set()).add(choice)
+    return answer_sets
+
+def max_section_score(answer_key):
+    return sum(points for _, points in answer_key.values())
+
+def scale_section_score(raw_score, max_score):
+    """Maps a raw reading/listening score onto the 0-30 TOEFL scale."""
+    if not max_score:
+        return 0
+    return round(raw_score / max_score * 30)
+
+def record_section_attempt(student_id, section_id, raw_score, max_score):
+    """Upserts the student's attempt for a section. Does NOT commit."""
+    attempt = SectionAttempt.query.filter_by(user_id=student_id, section_id=section_id).first()
+    if not attempt:
+        attempt = SectionAttempt(user_id=student_id, section_id=section_id)
+        db.session.add(attempt)
+    attempt.raw_score = raw_score
+    attempt.max_score = max_score
+    attempt.scaled_score = scale_section_score(raw_score, max_score)
+    attempt.submitted_at = datetime.datetime.utcnow()
+    return attempt
+
+def section_attempt_data(attempt):
+    if not attempt:
+        return None
+    return {
+        'rawScore': attempt.raw_score,
+        'maxScore': attempt.max_score,
+        'scaledScore': attempt.scaled_score,
+        'submittedAt': attempt.submitted_at.isoformat() if attempt.submitted_at else None
+    }
+
+def rescore_section_attempts(section):
+    """Re-scores every student's stored answers for a reading/listening section.
+
+    Loads the whole user x question answer set in one query, compares it with a
+    freshly built answer key using NumPy, then bulk-updates SectionAttempt rows
+    (creating them for students who have answers but no attempt yet).
+    Does NOT commit. Returns the number of attempts written.
+    """
+    # Answers may have been corrected outside the app: move every process to a fresh key
+    touch_section(section)
+    db.session.flush()
+    answer_key = get_answer_key(section.section_type, section.id)
+    if not answer_key:
+        return 0
+
+    question_ids = np.fromiter(answer_key.keys(), dtype=np.int64)
+    question_index = {int(question_id): i for i, question_id in enumerate(question_ids)}
+    points = np.array([answer_key[int(q)][1] for q in question_ids], dtype=np.int64)
+    correct_sizes = np.array([len(answer_key[int(q)][0]) for q in question_ids], dtype=np.int64)
+
+    # Every answer/choice is a (question, option, row, column) tuple; -1 stands in for NULL
+    answer_rows = db.session.query(
+            UserAnswer.user_id, UserAnswer.question_id, UserAnswer.option_id,
+            UserAnswer.table_row_id, UserAnswer.table_column_id
+        )\
+        .filter(UserAnswer.question_id.in_(question_index.keys()))\
+        .all()
+    answers = np.array(
+        [[user_id, question_id, option_id or -1, row_id or -1, column_id or -1]
+         for user_id, question_id, option_id, row_id, column_id in answer_rows],
+        dtype=np.int64
+    ).reshape(-1, 5)
+    answers = np.unique(answers, axis=0) # Scoring compares sets, so drop duplicate selections
+
+    correct_choices = []
+    for question_id, (correct, _) in answer_key.items():
+        for choice in correct:
+            option_id, row_id, column_id = (-1, choice[0], choice[1]) if isinstance(choice, tuple) else (choice, -1, -1)
+            correct_choices.append([question_id, option_id or -1, row_id or -1, column_id or -1])
+    correct_choices = np.array(correct_choices, dtype=np.int64).reshape(-1, 4)
+
+    # Dense ids for every distinct choice so membership is a single vectorized isin
+    _, choice_ids = np.unique(np.concatenate([answers[:, 1:], correct_choices]), axis=0, return_inverse=True)
+    choice_ids = choice_ids.reshape(-1)
+    is_correct_choice = np.isin(choice_ids[:len(answers)], choice_ids[len(answers):])
+
+    user_ids, user_idx = np.unique(answers[:, 0], return_inverse=True)
+    question_idx = np.array([question_index[int(q)] for q in answers[:, 1]], dtype=np.int64)
+    cells = user_idx.reshape(-1) * len(question_ids) + question_idx
+    matrix_shape = (len(user_ids), len(question_ids))
+    answered = np.bincount(cells, minlength=matrix_shape[0] * matrix_shape[1]).reshape(matrix_shape)
+    hits = np.bincount(cells, weights=is_correct_choice, minlength=matrix_shape[0] * matrix_shape[1]).reshape(matrix_shape)
+
+    # All-or-nothing: the student's set must equal the correct set exactly
+    question_correct = (answered > 0) & (answered == correct_sizes) & (hits == correct_sizes)
+    raw_scores = question_correct.astype(np.int64) @ points
+    max_score = int(points.sum())
+
+    existing_attempts = dict(
+        db.session.query(SectionAttempt.user_id, SectionAttempt.id)
+        .filter(SectionAttempt.section_id == section.id)
+        .all()
+    )
+    updates, inserts = [], []
+    now = datetime.datetime.utcnow()
+    for user_id, raw_score in zip(user_ids.tolist(), raw_scores.tolist()):
+        values = {
+            'raw_score': raw_score,
+            'max_score': max_score,
+            'scaled_score': scale_section_score(raw_score, max_score)
+        }
+        if user_id in existing_attempts:
+            updates.append({'id': existing_attempts[user_id], **values})
+        else:
+            inserts.append({'user_id': user_id, 'section_id': section.id, 'submitted_at': now, **values})
+
+    if updates:
+        db.session.execute(db.update(SectionAttempt), updates)
+    if inserts:
+        db.session.execute(db.insert(SectionAttempt), inserts)
+    return len(updates) + len(inserts)
+
+def score_link_column(response_type):
+    """The typed Score foreign key pointing at a response/answer of this section type."""
+    if response_type == 'speaking':
+        return Score.speaking_response_id
+    if response_type == 'writing':
+        return Score.writing_response_id
+    return Score.user_answer_id
+
+# Student progress
+# student_section_progress is derived data; these helpers recompute it from the
+# response/answer and Score tables so it can be refreshed inside any write transaction.
+
+def progress_counts_query(section_type):
+    """Per (user, section) response and Score counts for one section type.
+
+    Returns (query, user_column, section_column) so callers can narrow it down.
+    """
+    if section_type in ['speaking', 'writing']:
+        ResponseModel, TaskModel = (SpeakingResponse, SpeakingTask) if section_type == 'speaking' else (WritingResponse, WritingTask)
+        query = db.session.query(
+                ResponseModel.user_id.label('user_id'),
+                TaskModel.section_id.label('section_id'),
+                db.func.count(db.distinct(ResponseModel.id)).label('response_count'),
+                db.func.count(db.distinct(Score.id)).label('scored_count')
+            )\
+            .join(TaskModel, ResponseModel.task_id == TaskModel.id)\
+            .outerjoin(Score, score_link_column(section_type) == ResponseModel.id)\
+            .group_by(ResponseModel.user_id, TaskModel.section_id)
+        return query, ResponseModel.user_id, TaskModel.section_id
+
+    query = db.session.query(
+            UserAnswer.user_id.label('user_id'),
+            Question.section_id.label('section_id'),
+            db.func.count(db.distinct(UserAnswer.id)).label('response_count'),
+            db.func.count(db.distinct(Score.id)).label('scored_count')
+        )\
+        .join(Question, UserAnswer.question_id == Question.id)\
+        .outerjoin(Score, Score.user_answer_id == UserAnswer.id)\
+        .filter(Question.section_type == section_type)\
+        .group_by(UserAnswer.user_id, Question.section_id)
+    return query, UserAnswer.user_id, Question.section_id
+
+def apply_progress_counts(progress, response_count, scored_count):
+    progress.response_count = response_count
+    progress.scored_count = scored_count
+    progress.feedback_provided = response_count > 0 and response_count == scored_count
+
+def refresh_student_progress(user_id, section_id, section_type):
+    """Recomputes one student's progress row for a section. Does NOT commit."""
+    query, user_column, section_column = progress_counts_query(section_type)
+    counts = query.filter(user_column == user_id, section_column == section_id).first()
+
+    progress = StudentSectionProgress.query.filter_by(user_id=user_id, section_id=section_id).first()
+    if not progress:
+        progress = StudentSectionProgress(user_id=user_id, section_id=section_id, section_type=section_type)
+        db.session.add(progress)
+    apply_progress_counts(progress, counts.response_count if counts else 0, counts.scored_count if counts else 0)
+    return progress
+
+def rebuild_student_progress():
+    """Recomputes every progress row from scratch (backfill / repair). Does NOT commit."""
+    existing = {(p.user_id, p.section_id): p for p in StudentSectionProgress.query.all()}
+    seen = set()
+    for section_type in ['speaking', 'writing', 'reading', 'listening']:
+        query, _, _ = progress_counts_query(section_type)
+        for counts in query.all():
+            key = (counts.user_id, counts.section_id)
+            seen.add(key)
+            progress = existing.get(key)
+            if not progress:
+                progress = StudentSectionProgress(user_id=counts.user_id, section_id=counts.section_id, section_type=section_type)
+                db.session.add(progress)
+            apply_progress_counts(progress, counts.response_count, counts.scored_count)
+    for key, progress in existing.items():
+        if key not in seen:
+            db.session.delete(progress)
+    return len(seen)
+
+def invalidate_section(section_type, section_id):
+    """Frees this process's caches derived from a section's content. Other processes
+    follow the content_version that touch_section() sets in the editing transaction."""
+    invalidate_section_snapshot(section_type, section_id)
+    invalidate_answer_key(section_type, section_id)
+
+# Section deletion
+# Every content, answer and score table hangs off sections through ON DELETE CASCADE,
+# so deleting a section is a single DELETE. Its media files are then handed to a
+# background worker, which removes the ones no remaining row references (clones and
+# re-imports can share files).
+
+_media_purge_queue = queue.Queue() # sets of upload URLs to check and remove
+_media_purge_worker = None
+_media_purge_worker_lock = threading.Lock()
+
+def media_url_columns():
+    """(URL column, its section_id column, join) for every column that points at an uploaded file."""
+    return [
+        (ListeningAudio.audio_url, ListeningAudio.section_id, None),
+        (ListeningAudio.photo_url, ListeningAudio.section_id, None),
+        (QuestionAudio.audio_url, Question.section_id, (Question, QuestionAudio.question_id == Question.id)),
+        (SpeakingTask.audio_url, SpeakingTask.section_id, None),
+        (WritingTask.audio_url, WritingTask.section_id, None),
+        (SpeakingResponse.audio_url, SpeakingTask.section_id, (SpeakingTask, SpeakingResponse.task_id == SpeakingTask.id)),
+    ]
+
+def section_media_urls(section_id):
+    queries = []
+    for column, section_column, join in media_url_columns():
+        query = db.select(column.label('url')).where(section_column == section_id, column.isnot(None))
+        queries.append(query.join(*join) if join else query)
+    return set(db.session.execute(db.union(*queries)).scalars())
+
+def media_reference_columns():
+    """Every column that keeps a blob alive: content and responses, plus finalized uploads awaiting a submission."""
+    return [column for column, _, _ in media_url_columns()] + [ChunkedUpload.url]
+
+def referenced_media_urls(urls):
+    """The subset of `urls` that some row still points at."""
+    urls = {url for url in urls if url}
+    referenced = set()
+    for column in media_reference_columns():
+        if urls - referenced:
+            referenced.update(db.session.execute(db.select(column).where(column.in_(urls - referenced))).scalars())
+    return referenced
+
+def refresh_media_ref_counts(urls):
+    """Recounts the rows pointing at each MediaBlob in `urls`. Does NOT commit."""
+    urls = {url for url in urls if url}
+    if not urls:
+        return
+    counts = [db.select(db.func.count()).where(column == MediaBlob.url).scalar_subquery()
+              for column in media_reference_columns()]
+    db.session.execute(
+        db.update(MediaBlob)
+        .where(MediaBlob.url.in_(urls))
+        .values(ref_count=sum(counts[1:], counts[0]))
+        .execution_options(synchronize_session=False)
+    )
 
-    # db.session.commit() # below line is changed // REMOVE commit from here
-    return question # Return the question object added to the session
+def purge_unreferenced_media(urls):
+    """Removes the files and blobs behind `urls` that no row references any more. Commits; returns how many were removed.
+
+    References are checked after the blob rows are locked, so an upload reusing one of them
+    either committed its reference first or finds the row gone. Files are deleted only once
+    the rows' removal has committed.
+    """
+    urls = {url for url in urls if url}
+    if not urls:
+        return 0
+    db.session.execute(db.select(MediaBlob.id).where(MediaBlob.url.in_(urls)).with_for_update()).all()
+    unreferenced = urls - referenced_media_urls(urls)
+    if unreferenced:
+        db.session.execute(db.delete(MediaBlob).where(MediaBlob.url.in_(unreferenced)))
+    refresh_media_ref_counts(urls - unreferenced)
+    db.session.commit()
+    removed = 0
+    for url in unreferenced:
+        if media_storage.delete(media_key(url)):
+            removed += 1
+    return removed
+
+def run_media_purge_worker():
+    while True:
+        urls = _media_purge_queue.get()
+        try:
+            with app.app_context():
+                purge_unreferenced_media(urls)
+        except Exception as e:
+            print(f"Error purging media files: {e}")
+        finally:
+            _media_purge_queue.task_done()
+
+def schedule_media_purge(urls):
+    """Queues media for the background purge worker. Call after the deleting transaction has committed."""
+    global _media_purge_worker
+    urls = {url for url in urls if url}
+    if not urls:
+        return
+    with _media_purge_worker_lock:
+        if _media_purge_worker is None or not _media_purge_worker.is_alive():
+            _media_purge_worker = threading.Thread(target=run_media_purge_worker, name='media-purge', daemon=True)
+            _media_purge_worker.start()
+    _media_purge_queue.put(urls)
+
+def delete_section(section):
+    """Deletes a section with everything under it in one statement and schedules its media for purging. Commits."""
+    urls = section_media_urls(section.id)
+    db.session.execute(db.delete(Section).where(Section.id == section.id))
+    db.session.commit()
+    invalidate_section(section.section_type, section.id)
+    schedule_media_purge(urls)
 
 # Before request handler
 @app.before_request
@@ -276,7 +1289,8 @@ def log_request_info():
         elif request.content_type == 'application/json':
             print(f"JSON Body: {request.get_json(silent=True)}")
         else:
-            print(f"Raw Body: {request.get_data(as_text=True)}")
+            # Never read raw bodies here: upload chunks are streamed by their view
+            print(f"Raw Body: {request.content_length} bytes")
     else:
         print("No body content")
     print("=====================")
@@ -359,24 +1373,82 @@ def logout():
     """Logout endpoint (client should discard token)."""
     return jsonify({'message': 'Logout successful'}), 200
 
+# Media delivery
+# Extension-less uploads (speaking recordings are saved under a bare uuid) are
+# typed from their leading bytes.
+MEDIA_SNIFF_BYTES = 16
+MEDIA_SIGNATURES = [
+    (0, b'\x89PNG', 'image/png'),
+    (0, b'\xff\xd8\xff', 'image/jpeg'),
+    (0, b'GIF8', 'image/gif'),
+    (8, b'WEBP', 'image/webp'),
+    (8, b'WAVE', 'audio/wav'),
+    (0, b'ID3', 'audio/mpeg'),
+    (0, b'OggS', 'audio/ogg'),
+    (0, b'fLaC', 'audio/flac'),
+    (0, b'\x1a\x45\xdf\xa3', 'audio/webm'), # Matroska/WebM, what browsers record to
+    (4, b'ftyp', 'audio/mp4'),
+]
+
+def sniff_media_type(head):
+    """MIME type recognised from a file's first MEDIA_SNIFF_BYTES, or None."""
+    for offset, signature, sniffed in MEDIA_SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return sniffed
+    # Bare AAC (ADTS) or MPEG audio frames without a container
+    if len(head) > 1 and head[0] == 0xff and head[1] & 0xf6 == 0xf0:
+        return 'audio/aac'
+    if len(head) > 1 and head[0] == 0xff and head[1] & 0xe0 == 0xe0:
+        return 'audio/mpeg'
+    return None
+
+def guess_media_type(path):
+    mimetype, _ = mimetypes.guess_type(path)
+    if mimetype:
+        return mimetype
+    with open(path, 'rb') as f:
+        return sniff_media_type(f.read(MEDIA_SNIFF_BYTES)) or 'application/octet-stream'
+
 # Route to serve audio files
 @app.route('/files/<path:filename>')
 def get_file(filename):
-    # Construct full path
-    file_path = os.path.join(os.environ.get('BASE_DIR'), filename)
-    # Security check: ensure path is within BASE_DIR
-    if not file_path.startswith(os.environ.get('BASE_DIR')):
+    # safe_join refuses paths that would escape the storage root
+    if safe_join('.', filename) is None:
         abort(403, description="Access denied")
-    
+
+    presigned_url = media_storage.presigned_url(filename, app.config['MEDIA_URL_EXPIRY'])
+    if presigned_url:
+        # The client fetches the bytes (and ranges) from object storage directly
+        response = redirect(presigned_url)
+        max_age = max(0, min(app.config['FILES_MAX_AGE'], app.config['MEDIA_URL_EXPIRY'] - 60))
+        response.headers['Cache-Control'] = f'private, max-age={max_age}'
+        return response
+    file_path = media_storage.path(filename)
+
     # Check if file exists and is a file (not directory)
-    if not os.path.exists(file_path) or not os.path.isfile(file_path):
+    if not os.path.isfile(file_path):
         abort(404, description="File not found")
-    
-    return send_file(
+    mimetype = guess_media_type(file_path)
+
+    if app.config['FILES_ACCEL_REDIRECT_PREFIX']:
+        # nginx sends the bytes itself, including Range and conditional requests
+        response = Response(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = f"{app.config['FILES_ACCEL_REDIRECT_PREFIX'].rstrip('/')}/{url_quote(filename)}"
+        return response
+
+    # conditional=True answers Range requests with 206 and If-None-Match/If-Modified-Since with 304;
+    # with USE_X_SENDFILE the body is left to the front server
+    response = send_file(
         file_path,
-        mimetype='audio/mpeg',
-        as_attachment=False
+        mimetype=mimetype,
+        as_attachment=False,
+        conditional=True,
+        etag=True,
+        max_age=app.config['FILES_MAX_AGE']
     )
+    # Werkzeug only advertises ranges on range requests; tell players up front that seeking is cheap
+    response.headers.setdefault('Accept-Ranges', 'bytes')
+    return response
 
 
 # Readign section
@@ -397,41 +1469,34 @@ def create_reading_section():
         return jsonify({'error': 'No passages provided'}), 400
 
     try: # Add try...except block for robust error handling
-        section = Section(section_type='reading', title=title)
-        db.session.add(section)
-        # Flush here is okay if you need the section ID *before* adding passages,
-        # but often adding all then flushing/committing at the end is fine too.
-        # db.session.flush()
-
-        created_passages_info = [] # To store info for the response
-
+        # Validate everything before writing anything
         for passage_data in passages_data:
-            passage_title = passage_data.get('title')
-            content = passage_data.get('content')
-            if not passage_title or not content:
-                # Rollback because data is invalid
-                db.session.rollback()
+            if not passage_data.get('title') or not passage_data.get('content'):
                 return jsonify({'error': 'Missing title or content in passage'}), 400
+        question_specs = [[build_question_spec(question_data, 'reading') for question_data in passage_data.get('questions', [])]
+                          for passage_data in passages_data]
 
-            passage = ReadingPassage(title=passage_title, content=content, section=section)
-            db.session.add(passage)
-            db.session.flush() # Need passage.id before creating questions
-
-            passage_info = {'id': passage.id, 'title': passage.title, 'content': passage.content}
-            created_passages_info.append(passage_info)
+        section = Section(section_type='reading', title=title)
+        db.session.add(section)
+        db.session.flush()
 
-            for question_data in passage_data.get('questions', []):
-                print('Data before creating question: ', question_data) # Good debug print
-                # create_question now adds to session but doesn't commit
-                create_question(question_data, 'reading', reading_passage_id=passage.id)
+        passage_rows = [{'section_id': section.id, 'title': passage_data['title'], 'content': passage_data['content']}
+                        for passage_data in passages_data]
+        passage_ids = insert_in_order(ReadingPassage, passage_rows, ReadingPassage.section_id == section.id)
+        for passage_id, specs in zip(passage_ids, question_specs):
+            for spec in specs:
+                spec['question'].update(section_id=section.id, reading_passage_id=passage_id)
+        insert_question_specs([spec for specs in question_specs for spec in specs])
 
         # Single commit after all passages and questions are added successfully
         db.session.commit()
+        invalidate_section('reading', section.id)
 
         return jsonify({
             'id': section.id,
             'title': section.title,
-            'passages': created_passages_info
+            'passages': [{'id': passage_id, 'title': row['title'], 'content': row['content']}
+                         for passage_id, row in zip(passage_ids, passage_rows)]
         }), 201
 
     except Exception as e:
@@ -442,49 +1507,7 @@ def create_reading_section():
 
 @app.route('/reading/<int:section_id>', methods=['GET'])
 def get_reading_section(section_id):
-    section = Section.query.filter_by(id=section_id, section_type='reading').first()
-    if not section:
-        return jsonify({'error': 'Section not found'}), 404
-
-    passages = ReadingPassage.query.filter_by(section_id=section.id).order_by(ReadingPassage.id).all() # below line is changed // Added order_by for consistency
-    passages_data = []
-    for passage in passages:
-        questions = Question.query.filter_by(reading_passage_id=passage.id).order_by(Question.id).all() # below line is changed // Added order_by for consistency
-        questions_data = []
-        for q in questions:
-            # Fetch options ordered by ID to ensure consistent A, B, C, D mapping
-            options = Option.query.filter_by(question_id=q.id).order_by(Option.id).all() # below line is changed // Added order_by for consistency
-            options_data = [o.option_text for o in options]
-
-            # Add the paragraph_index to the question data dictionary
-            question_dict = {
-                'id': q.id,
-                'type': q.type,
-                'prompt': q.prompt,
-                'options': options_data,
-                'paragraph_index': q.paragraph_index # below line is changed // Added paragraph_index field
-                # Note: JSON serialization handles None -> null automatically
-            }
-            
-            # Add summary_statement if it exists (for prose_summary)
-            # Assuming your Question model has a 'summary_statement' field/relationship
-            if hasattr(q, 'summary_statement') and q.summary_statement:
-                 question_dict['summary_statement'] = q.summary_statement
-            
-            questions_data.append(question_dict)
-
-        passages_data.append({
-            'id': passage.id,
-            'title': passage.title,
-            'content': passage.content,
-            'questions': questions_data
-        })
-
-    return jsonify({
-        'id': section.id,
-        'title': section.title,
-        'passages': passages_data
-    }), 200
+    return section_snapshot_response('reading', section_id)
 
 @app.route('/reading/<int:section_id>', methods=['PUT'])
 @admin_required
@@ -498,7 +1521,9 @@ def update_reading_section(section_id):
         return jsonify({'error': 'Missing JSON data'}), 400
 
     section.title = data.get('title', section.title)
+    touch_section(section)
     db.session.commit()
+    invalidate_section('reading', section_id)
 
     return jsonify({'message': 'Section updated successfully'}), 200
 
@@ -509,8 +1534,7 @@ def delete_reading_section(section_id):
     if not section:
         return jsonify({'error': 'Section not found'}), 404
 
-    db.session.delete(section)
-    db.session.commit()
+    delete_section(section)
     return jsonify({'message': 'Section deleted successfully'}), 200
 
 @app.route('/readings', methods=['GET'])
@@ -545,103 +1569,63 @@ def submit_reading_answers(student_id, section_id):
         if len(passages) != len(passage_ids):
             return jsonify({'error': 'One or more passage IDs are invalid or do not belong to section'}), 404
 
-        # Step 2: Process and store user answers
+        # Step 2: Validate every submitted question against its passage in one query
+        submitted_pairs = {}  # question_id -> (passage_id, raw answer indices)
         for passage_id_str, questions in data.items():
-            passage_id = int(passage_id_str)
             for question_id_str, user_answer_indices in questions.items():
-                question_id = int(question_id_str)
-                # Verify question belongs to the passage
-                question = db.session.query(Question).filter_by(
-                    id=question_id,
-                    reading_passage_id=passage_id
-                ).first()
-                if not question:
-                    return jsonify({'error': f'Question ID {question_id} not in passage {passage_id}'}), 404
-
-                # Get options for the question, ordered by id
-                options = db.session.query(Option).filter_by(
-                    question_id=question_id
-                ).order_by(Option.id).all()
-                option_ids = [opt.id for opt in options]
-
-                # Map user answer indices to option_ids
-                try:
-                    selected_option_ids = []
-                    for idx in user_answer_indices:
-                        if idx.isalpha():
-                            # Convert letter (e.g., "b") to index (e.g., 1)
-                            index = ord(idx.lower()) - ord('a')
-                        else:
-                            index = int(idx)
-                        if 0 <= index < len(option_ids):
-                            selected_option_ids.append(option_ids[index])
-                        else:
-                            return jsonify({'error': f'Invalid option index {idx} for question {question_id}'}), 400
-                except ValueError:
-                    return jsonify({'error': f'Invalid answer format for question {question_id}'}), 400
-
-                # Delete previous answers for this user and question
-                db.session.query(UserAnswer).filter_by(
-                    user_id=student_id,
-                    question_id=question_id
-                ).delete()
-
-                # Insert new user answers
-                for opt_id in selected_option_ids:
-                    user_answer = UserAnswer(
-                        user_id=student_id,
-                        question_id=question_id,
-                        option_id=opt_id
-                    )
-                    db.session.add(user_answer)
-
-        # Commit all changes to the database
-        db.session.commit()
+                submitted_pairs[int(question_id_str)] = (int(passage_id_str), user_answer_indices)
 
-        # Step 3: Calculate the section's score
-        total_score = 0
-        # Get all questions in the section via reading passages
-        questions = (
-            db.session.query(Question, db.func.count(CorrectAnswer.id).label('correct_count'))
-            .outerjoin(CorrectAnswer, Question.id == CorrectAnswer.question_id)
-            .join(ReadingPassage, Question.reading_passage_id == ReadingPassage.id)
-            .filter(ReadingPassage.section_id == section_id)
-            .group_by(Question.id)
+        question_ids = list(submitted_pairs.keys())
+        question_passages = dict(
+            db.session.query(Question.id, Question.reading_passage_id)
+            .filter(Question.id.in_(question_ids))
             .all()
-        )
-
-        for question, correct_count in questions:
-            # Determine points based on question type and number of correct answers
-            if question.type in ('prose_summary', 'table') and correct_count > 1:
-                points = 2  # Multiple-selection or table questions
-            else:
-                points = 1  # Default for other types (e.g., 'insert-a-text')
-
-            # Get correct answers
-            correct_option_ids = set(
-                ca.option_id for ca in db.session.query(CorrectAnswer)
-                .filter_by(question_id=question.id)
-                .all()
-            )
+        ) if question_ids else {}
+        for question_id, (passage_id, _) in submitted_pairs.items():
+            if question_passages.get(question_id) != passage_id:
+                return jsonify({'error': f'Question ID {question_id} not in passage {passage_id}'}), 404
+
+        # Step 3: Map answer indices to option ids (options ordered by id) and store them in bulk
+        option_ids_by_question = load_choice_ids(Option, question_ids) if question_ids else {}
+        answer_rows = []
+        for question_id, (passage_id, user_answer_indices) in submitted_pairs.items():
+            option_ids = option_ids_by_question[question_id]
+            try:
+                selected_option_ids = []
+                for idx in user_answer_indices:
+                    if idx.isalpha():
+                        # Convert letter (e.g., "b") to index (e.g., 1)
+                        index = ord(idx.lower()) - ord('a')
+                    else:
+                        index = int(idx)
+                    if 0 <= index < len(option_ids):
+                        selected_option_ids.append(option_ids[index])
+                    else:
+                        return jsonify({'error': f'Invalid option index {idx} for question {question_id}'}), 400
+            except ValueError:
+                return jsonify({'error': f'Invalid answer format for question {question_id}'}), 400
 
-            # Get user answers
-            user_option_ids = set(
-                ua.option_id for ua in db.session.query(UserAnswer)
-                .filter_by(question_id=question.id, user_id=student_id)
-                .all()
-            )
+            answer_rows.extend(user_answer_row(student_id, question_id, option_id=opt_id) for opt_id in selected_option_ids)
 
-            print('correct answers: ', correct_option_ids, '\nuser options: ', user_option_ids)
+        replace_user_answers(student_id, question_ids, answer_rows)
 
-            # how to calculate to 30
-            # total_score = (raw_score / max_possible_score) * 30
+        # Step 4: Calculate the section's score against the cached answer key
+        # and store it with the 0-30 scaled score in the same transaction
+        answer_key = get_answer_key('reading', section_id)
+        total_score = score_submission(answer_key, load_user_answer_sets(student_id, answer_key.keys()))
+        attempt = record_section_attempt(student_id, section_id, total_score, max_section_score(answer_key))
+        refresh_student_progress(student_id, section_id, 'reading')
 
-            # Scoring: all-or-nothing
-            if user_option_ids == correct_option_ids and user_option_ids:
-                total_score += points
+        # Commit all changes to the database
+        db.session.commit()
 
-        # Step 4: Return the section's score
-        return jsonify({'section_id': section_id, 'score': total_score})
+        # Step 5: Return the section's score
+        return jsonify({
+            'section_id': section_id,
+            'score': total_score,
+            'max_score': attempt.max_score,
+            'scaled_score': attempt.scaled_score
+        })
 
     except Exception as e:
         db.session.rollback()  # Roll back on error
@@ -650,6 +1634,11 @@ def submit_reading_answers(student_id, section_id):
 # Listening section
 
 @app.route('/listening', methods=['POST'])
+@upload_policy('AUTHORING_UPLOAD_MAX_BYTES', 'MEDIA_FILE_MAX_BYTES', {
+    'audioItem_*_audioFile': AUDIO_TYPES,
+    'audioItem_*_imageFile': IMAGE_TYPES,
+    'question_*_snippetFile': AUDIO_TYPES
+})
 @admin_required
 def create_listening_section():
     if 'sectionData' not in request.form:
@@ -668,9 +1657,8 @@ def create_listening_section():
     if not audios_data:
         return jsonify({'error': 'No audio items provided in sectionData'}), 400
 
-    section = Section(section_type='listening', title=title)
-    db.session.add(section)
-
+    # Files are only stored once the whole payload is valid, so a 400 leaves nothing behind
+    audio_rows, question_specs, pending = [], [], []
     for audio_data in audios_data:
         audio_item_id = audio_data.get('id') # Make sure frontend includes 'id' here
         if not audio_item_id:
@@ -688,14 +1676,13 @@ def create_listening_section():
             return jsonify({'error': f'Missing audio file for audio item {audio_item_id} (expected key: {audio_file_key})'}), 400
 
         photo_file = request.files.get(image_file_key)
-        audio_url = save_file(audio_file, 'listening_audios')
-        photo_url = save_file(photo_file, 'listening_photos') if photo_file else None
+        audio_row = {'title': audio_title, 'audio_url': None, 'photo_url': None}
+        audio_rows.append(audio_row)
+        pending.append((audio_row, 'audio_url', audio_file, 'listening_audios'))
+        if photo_file:
+            pending.append((audio_row, 'photo_url', photo_file, 'listening_photos'))
 
-        audio = ListeningAudio(title=audio_title, audio_url=audio_url, photo_url=photo_url, section=section)
-        db.session.add(audio)
-        db.session.flush() # to get the id to use in create_question
-        
-        
+        specs = []
         for question_data in audio_data.get('questions', []):
             question_id = question_data.get('id') # Make sure frontend includes question 'id' here
             if not question_id:
@@ -705,9 +1692,37 @@ def create_listening_section():
             question_audio_file = request.files.get(snippet_file_key)
 
             question_data_cleaned = {k: v for k, v in question_data.items() if k != 'id'}
-            create_question(question_data_cleaned, 'listening', listening_audio_id=audio.id, audio_file=question_audio_file)
+            spec = build_question_spec(question_data_cleaned, 'listening')
+            if spec['question']['type'] == 'audio' and question_audio_file:
+                pending.append((spec, 'audio_url', question_audio_file, 'question_audios'))
+            specs.append(spec)
+        question_specs.append(specs)
+
+    # Everything is validated; store the files, then write the section with one batched INSERT per table
+    saved = []
+    try:
+        save_uploads(pending, saved)
+        section = Section(section_type='listening', title=title)
+        db.session.add(section)
+        db.session.flush()
 
-    db.session.commit()
+        audio_ids = insert_in_order(
+            ListeningAudio,
+            [{**row, 'section_id': section.id} for row in audio_rows],
+            ListeningAudio.section_id == section.id
+        )
+        for audio_id, specs in zip(audio_ids, question_specs):
+            for spec in specs:
+                spec['question'].update(section_id=section.id, listening_audio_id=audio_id)
+        insert_question_specs([spec for specs in question_specs for spec in specs])
+        refresh_media_ref_counts(section_media_urls(section.id))
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        purge_unreferenced_media(saved)
+        raise
+    invalidate_section('listening', section.id)
     
     return jsonify({
         'id': section.id,
@@ -718,43 +1733,7 @@ def create_listening_section():
 
 @app.route('/listening/<int:section_id>', methods=['GET'])
 def get_listening_section(section_id):
-    section = Section.query.filter_by(id=section_id, section_type='listening').first()
-    if not section:
-        return jsonify({'error': 'Section not found'}), 404
-
-    audios = ListeningAudio.query.filter_by(section_id=section.id).all()
-    audios_data = []
-    for audio in audios:
-        questions = Question.query.filter_by(listening_audio_id=audio.id).all()
-        questions_data = []
-        for q in questions:
-            if q.type == 'table':
-                table_rows = TableQuestionRow.query.filter_by(question_id=q.id).all()
-                table_columns = TableQuestionColumn.query.filter_by(question_id=q.id).all()
-                rows = [row.row_label for row in table_rows]
-                columns = [col.column_label for col in table_columns]
-                questions_data.append({'id': q.id, 'type': q.type, 'prompt': q.prompt,  'rows': rows, 'columns': columns})
-            else:
-                options = Option.query.filter_by(question_id=q.id).all()
-                options_data = [o.option_text for o in options]
-                if q.type == 'audio':
-                    audio_url = QuestionAudio.query.filter_by(question_id=q.id).first()
-                    questions_data.append({'id': q.id, 'type': q.type, 'audio_url': audio_url.audio_url, 'prompt': q.prompt, 'options': options_data})
-                else:
-                    questions_data.append({'id': q.id, 'type': q.type, 'prompt': q.prompt, 'options': options_data})
-        audios_data.append({
-            'id': audio.id,
-            'title': audio.title,
-            'audio_url': audio.audio_url,
-            'photo_url': audio.photo_url,
-            'questions': questions_data
-        })
-
-    return jsonify({
-        'id': section.id,
-        'title': section.title,
-        'audios': audios_data
-    }), 200
+    return section_snapshot_response('listening', section_id)
 
 @app.route('/listening/<int:section_id>', methods=['PUT'])
 @admin_required
@@ -768,7 +1747,9 @@ def update_listening_section(section_id):
         return jsonify({'error': 'Missing JSON data'}), 400
 
     section.title = data.get('title', section.title)
+    touch_section(section)
     db.session.commit()
+    invalidate_section('listening', section_id)
 
     return jsonify({'message': 'Section updated successfully'}), 200
 
@@ -779,21 +1760,7 @@ def delete_listening_section(section_id):
     if not section:
         return jsonify({'error': 'Section not found'}), 404
 
-    audios = ListeningAudio.query.filter_by(section_id=section.id).all()
-    for audio in audios:
-        if audio.audio_url:
-            try:
-                os.remove(audio.audio_url.lstrip('/'))
-            except OSError:
-                pass
-        if audio.photo_url:
-            try:
-                os.remove(audio.photo_url.lstrip('/'))
-            except OSError:
-                pass
-
-    db.session.delete(section)
-    db.session.commit()
+    delete_section(section)
     return jsonify({'message': 'Section deleted successfully'}), 200
 
 @app.route('/listenings', methods=['GET'])
@@ -830,130 +1797,251 @@ def submit_listening_answers(student_id, section_id):
         if len(audios) != len(audio_ids):
             return jsonify({'error': 'One or more audio IDs are invalid or do not belong to this section'}), 404
 
-        # **Step 2: Process and Store User Answers**
+        # **Step 2: Validate every submitted question against its audio in one query**
+        submitted_pairs = {}  # question_id -> (audio_id, raw user answers)
         for audio_id_str, questions in answers.items():
-            audio_id = int(audio_id_str)
             for question_id_str, user_answers in questions.items():
-                question_id = int(question_id_str)
-                # Verify the question belongs to the audio
-                question = db.session.query(Question).filter_by(
-                    id=question_id,
-                    listening_audio_id=audio_id
-                ).first()
-                if not question:
-                    return jsonify({'error': f'Question ID {question_id} not found in audio {audio_id}'}), 404
-
-                # Fetch all options for the question
-                options = db.session.query(Option).filter_by(question_id=question_id).order_by(Option.id).all()
-                option_map = {chr(97 + i): opt.id for i, opt in enumerate(options)}  # 'a' -> option_id, 'b' -> option_id, etc.
-                # Delete previous answers for this user and question
-                db.session.query(UserAnswer).filter_by(
-                    user_id=student_id,
-                    question_id=question_id
-                ).delete()
-
-                if question.type == 'table':
-                    # Process table question answers
-                    for row_id_str, columns in user_answers.items():
-                        # implementing a translation but in the future it would be better just to pass the row ids from the front-end
-                        row_id = int(row_id_str)
-                        rows = TableQuestionRow.query.filter_by(question_id=question_id).all()
-                        row_id = rows[row_id].id
-                        for col_id_str, selected in columns.items():
-                            if selected:  # True indicates the cell is selected
-                                col_id = int(col_id_str)
-                                columns = TableQuestionColumn.query.filter_by(question_id=question_id).all()
-                                col_id = columns[col_id].id
-                                user_answer = UserAnswer(
-                                    user_id=student_id,
-                                    question_id=question_id,
-                                    table_row_id=row_id,
-                                    table_column_id=col_id
-                                )
-                                db.session.add(user_answer)
-                else:
-                    # Handle multiple-choice questions
-                    selected_option_ids = []
-                    for answer in user_answers:
-                        if isinstance(answer, str) and answer.lower() in option_map:
-                            selected_option_ids.append(option_map[answer.lower()])
-                        else:
-                            return jsonify({'error': f'Invalid option {answer} for question {question_id}'}), 400
-
-                    # Store the selected options
-                    for option_id in selected_option_ids:
-                        user_answer = UserAnswer(
-                            user_id=student_id,
-                            question_id=question_id,
-                            option_id=option_id
-                        )
-                        db.session.add(user_answer)
+                submitted_pairs[int(question_id_str)] = (int(audio_id_str), user_answers)
 
-        # Commit all changes to the database
-        db.session.commit()
+        question_ids = list(submitted_pairs.keys())
+        question_info = {
+            question_id: (audio_id, question_type)
+            for question_id, audio_id, question_type in db.session.query(Question.id, Question.listening_audio_id, Question.type)
+                .filter(Question.id.in_(question_ids))
+                .all()
+        } if question_ids else {}
+        for question_id, (audio_id, _) in submitted_pairs.items():
+            if question_id not in question_info or question_info[question_id][0] != audio_id:
+                return jsonify({'error': f'Question ID {question_id} not found in audio {audio_id}'}), 404
+
+        # **Step 3: Translate answers to option ids / table cells and store them in bulk**
+        table_question_ids = [qid for qid in question_ids if question_info[qid][1] == 'table']
+        choice_question_ids = [qid for qid in question_ids if question_info[qid][1] != 'table']
+        option_ids_by_question = load_choice_ids(Option, choice_question_ids) if choice_question_ids else {}
+        row_ids_by_question = load_choice_ids(TableQuestionRow, table_question_ids) if table_question_ids else {}
+        column_ids_by_question = load_choice_ids(TableQuestionColumn, table_question_ids) if table_question_ids else {}
+
+        answer_rows = []
+        for question_id, (audio_id, user_answers) in submitted_pairs.items():
+            if question_info[question_id][1] == 'table':
+                # Process table question answers
+                # implementing a translation but in the future it would be better just to pass the row ids from the front-end
+                row_ids = row_ids_by_question[question_id]
+                column_ids = column_ids_by_question[question_id]
+                try:
+                    for row_index_str, columns in user_answers.items():
+                        row_id = row_ids[int(row_index_str)]
+                        for col_index_str, selected in columns.items():
+                            if selected:  # True indicates the cell is selected
+                                col_id = column_ids[int(col_index_str)]
+                                answer_rows.append(user_answer_row(student_id, question_id, table_row_id=row_id, table_column_id=col_id))
+                except (ValueError, IndexError, AttributeError):
+                    return jsonify({'error': f'Invalid table selection for question {question_id}'}), 400
+            else:
+                # Handle multiple-choice questions
+                option_map = {chr(97 + i): option_id for i, option_id in enumerate(option_ids_by_question[question_id])}  # 'a' -> option_id, 'b' -> option_id, etc.
+                selected_option_ids = []
+                for answer in user_answers:
+                    if isinstance(answer, str) and answer.lower() in option_map:
+                        selected_option_ids.append(option_map[answer.lower()])
+                    else:
+                        return jsonify({'error': f'Invalid option {answer} for question {question_id}'}), 400
 
-        # **Step 3: Calculate the Score**
-        total_score = 0
-        questions = (
-            db.session.query(Question, db.func.count(CorrectAnswer.id).label('correct_count'))
-            .outerjoin(CorrectAnswer, Question.id == CorrectAnswer.question_id)
-            .join(ListeningAudio, Question.listening_audio_id == ListeningAudio.id)
-            .filter(ListeningAudio.section_id == section_id)
-            .group_by(Question.id)
-            .all()
-        )
+                answer_rows.extend(user_answer_row(student_id, question_id, option_id=option_id) for option_id in selected_option_ids)
 
-        for question, correct_count in questions:
-            # Assign points based on question type and number of correct answers
-            if question.type in ('prose_summary', 'table') and correct_count > 1:
-                points = 2  # For multiple-selection or table questions
-            else:
-                points = 1  # Default case
-
-            # Get correct and user answers
-            if question.type == 'table':
-                user_option_ids = set()
-                for ua in db.session.query(UserAnswer) \
-                        .filter_by(question_id=question.id, user_id=student_id) \
-                        .all():
-                    user_option_ids.add((ua.table_row_id, ua.table_column_id))
-
-                correct_option_ids = set()
-                for ca in db.session.query(CorrectAnswer) \
-                        .filter_by(question_id=question.id) \
-                        .all():
-                    correct_option_ids.add((ca.table_row_id, ca.table_column_id))
-            else:
-                user_option_ids = set(
-                    ua.option_id for ua in db.session.query(UserAnswer)
-                    .filter_by(question_id=question.id, user_id=student_id)
-                    .all()
-                )
-                correct_option_ids = set(
-                    ca.option_id for ca in db.session.query(CorrectAnswer)
-                    .filter_by(question_id=question.id)
-                    .all()
-                )
+        replace_user_answers(student_id, question_ids, answer_rows)
 
-            print('correct answers: ', correct_option_ids, '\nuser options: ', user_option_ids)
+        # **Step 4: Calculate the Score** against the cached answer key and store the attempt
+        answer_key = get_answer_key('listening', section_id)
+        total_score = score_submission(answer_key, load_user_answer_sets(student_id, answer_key.keys()))
+        attempt = record_section_attempt(student_id, section_id, total_score, max_section_score(answer_key))
+        refresh_student_progress(student_id, section_id, 'listening')
 
-            # All-or-nothing scoring
-            if user_option_ids == correct_option_ids and user_option_ids:
-                total_score += points
+        # Commit all changes to the database
+        db.session.commit()
 
-        # **Step 4: Return the Response**
+        # **Step 5: Return the Response**
         return jsonify({
             'section_id': section_id,
-            'score': total_score
+            'score': total_score,
+            'max_score': attempt.max_score,
+            'scaled_score': attempt.scaled_score
         })
 
     except Exception as e:
         db.session.rollback()  # Roll back on error
         return jsonify({'error': str(e)}), 500
 
+# Resumable uploads
+# init -> PUT chunks at an explicit offset -> finalize. Each chunk is spooled locally and
+# kept in media storage as UPLOAD_FOLDER/.partial/<id>/<offset>, so consecutive chunks may
+# land on different nodes. `received` only advances past bytes that are stored, so after a
+# dropped connection the client asks for the offset and resumes from there instead of
+# re-sending the whole recording; a retried chunk overwrites the part at its offset.
+
+UPLOAD_PURPOSES = {'speaking_recording': 'speaking_responses'} # purpose -> blob subfolder
+
+def partial_upload_prefix(upload):
+    return f"{app.config['UPLOAD_FOLDER']}/.partial/{upload.id}/"
+
+def partial_upload_key(upload, offset):
+    return f'{partial_upload_prefix(upload)}{offset:012d}'
+
+def delete_partial_upload(upload):
+    media_storage.delete_prefix(partial_upload_prefix(upload))
+
+def chunked_upload_data(upload):
+    return {
+        'uploadId': upload.id,
+        'offset': upload.received,
+        'size': upload.size,
+        'finalized': upload.url is not None,
+        'url': upload.url
+    }
+
+def get_student_upload(student_id, upload_id):
+    return ChunkedUpload.query.filter_by(id=upload_id, user_id=student_id).first()
+
+def expire_chunked_uploads():
+    """Drops uploads untouched for CHUNKED_UPLOAD_EXPIRY_HOURS and their part files. Commits; returns how many.
+
+    Blobs of finalized uploads that were never submitted become unreferenced and go with the next purge.
+    """
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=app.config['CHUNKED_UPLOAD_EXPIRY_HOURS'])
+    expired = ChunkedUpload.query.filter(ChunkedUpload.updated_at < cutoff).all()
+    for upload in expired:
+        delete_partial_upload(upload)
+        db.session.delete(upload)
+    db.session.commit()
+    return len(expired)
+
+@app.route('/uploads', methods=['POST'])
+@student_required
+def create_chunked_upload(student_id):
+    data = request.get_json(silent=True) or {}
+    purpose = data.get('purpose', 'speaking_recording')
+    size = data.get('size')
+    if purpose not in UPLOAD_PURPOSES:
+        return jsonify({'error': f'Unknown upload purpose {purpose!r}'}), 400
+    if type(size) is not int or size <= 0: # bool is an int subclass
+        return jsonify({'error': 'size must be a positive number of bytes'}), 400
+    if size > app.config['CHUNKED_UPLOAD_MAX_BYTES']:
+        return jsonify({'error': f"Uploads are limited to {app.config['CHUNKED_UPLOAD_MAX_BYTES']} bytes"}), 413
+
+    upload = ChunkedUpload(id=str(uuid.uuid4()), user_id=student_id, purpose=purpose,
+                           filename=secure_filename(data.get('filename') or ''), size=size, received=0)
+    db.session.add(upload)
+    db.session.commit()
+    return jsonify(chunked_upload_data(upload)), 201
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+@student_required
+def get_chunked_upload(student_id, upload_id):
+    upload = get_student_upload(student_id, upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    return jsonify(chunked_upload_data(upload)), 200
+
+@app.route('/uploads/<upload_id>', methods=['PUT'])
+@upload_policy('CHUNKED_UPLOAD_MAX_BYTES')
+@student_required
+def put_upload_chunk(student_id, upload_id):
+    upload = get_student_upload(student_id, upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    if upload.url:
+        return jsonify({'error': 'Upload is already finalized', **chunked_upload_data(upload)}), 409
+    offset = request.args.get('offset', type=int)
+    if offset != upload.received:
+        # Tells the client where to resume
+        return jsonify({'error': f'Expected offset {upload.received}', **chunked_upload_data(upload)}), 409
+    remaining = upload.size - offset
+    if request.content_length is not None and request.content_length > remaining:
+        return jsonify({'error': f'Chunk exceeds the declared size by {request.content_length - remaining} bytes'}), 413
+
+    written, error = 0, None
+    temp_path = spool_path()
+    try:
+        with open(temp_path, 'wb') as f:
+            try:
+                while True:
+                    chunk = request.stream.read(min(UPLOAD_CHUNK_SIZE, remaining - written + 1))
+                    if not chunk:
+                        break
+                    if written + len(chunk) > remaining:
+                        error = (jsonify({'error': 'Chunk exceeds the declared size'}), 413)
+                        break
+                    f.write(chunk)
+                    written += len(chunk)
+            except (ClientDisconnected, OSError) as e:
+                # Client went away mid-chunk: keep what arrived so the retry resumes after it.
+                # Anything else, such as RequestEntityTooLarge, is not resumable and propagates
+                print(f"Upload {upload.id} interrupted after {written} bytes: {e}")
+                error = (jsonify({'error': 'Upload interrupted'}), 400)
+            f.truncate(written)
+            # `received` only moves past bytes that are on disk, so a crash cannot lose an acknowledged chunk
+            f.flush()
+            os.fsync(f.fileno())
+        if written:
+            # Replaces the part of an earlier attempt at this offset that was never acknowledged
+            media_storage.put_file(temp_path, partial_upload_key(upload, offset))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    upload.received = offset + written
+    db.session.commit()
+    if error:
+        return error
+    return jsonify(chunked_upload_data(upload)), 200
+
+@app.route('/uploads/<upload_id>/finalize', methods=['POST'])
+@student_required
+def finalize_chunked_upload(student_id, upload_id):
+    upload = get_student_upload(student_id, upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    if upload.url: # Retried finalize
+        return jsonify(chunked_upload_data(upload)), 200
+    if upload.received != upload.size:
+        return jsonify({'error': f'Upload incomplete: {upload.received} of {upload.size} bytes received',
+                        **chunked_upload_data(upload)}), 409
+
+    # Parts chain by offset: each starts where the previous one ended
+    temp_path, sha256, offset = spool_path(), hashlib.sha256(), 0
+    try:
+        with open(temp_path, 'wb') as f:
+            while offset < upload.size:
+                with closing(media_storage.open(partial_upload_key(upload, offset))) as part:
+                    part_size = 0
+                    for chunk in iter(lambda: part.read(UPLOAD_CHUNK_SIZE), b''):
+                        sha256.update(chunk)
+                        f.write(chunk)
+                        part_size += len(chunk)
+                if not part_size:
+                    raise IOError(f'empty part at offset {offset}')
+                offset += part_size
+        if offset != upload.size:
+            raise IOError(f'parts add up to {offset} of {upload.size} bytes')
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        print(f"Error assembling upload {upload.id}: {e}")
+        return jsonify({'error': 'Upload data is incomplete, please upload the file again'}), 500
+
+    upload.url = store_blob(temp_path, sha256.hexdigest(), upload.size,
+                            upload.filename, UPLOAD_PURPOSES[upload.purpose])
+    delete_partial_upload(upload)
+    db.session.flush()
+    refresh_media_ref_counts({upload.url})
+    db.session.commit()
+    return jsonify(chunked_upload_data(upload)), 200
+
+
 # Speaking section
 
 @app.route('/speaking', methods=['POST'])
+@upload_policy('AUTHORING_UPLOAD_MAX_BYTES', 'MEDIA_FILE_MAX_BYTES', AUDIO_TYPES)
 @admin_required
 def create_speaking_section():
     if 'sectionData' not in request.form:
@@ -993,57 +2081,40 @@ def create_speaking_section():
 
     # --- MODIFICATION END ---
 
-    section = Section(section_type='speaking', title=title)
-    db.session.add(section)
-    db.session.flush() # Flush to get section.id if needed by SpeakingTask relationships immediately (depends on model)
-
-    try:
-        # Task 1: prompt only
-        task1_data = tasks_dict[1]
-        db.session.add(SpeakingTask(section=section, task_number=1, prompt=task1_data['prompt']))
-
-        # Task 2: passage, prompt, audio
-        task2_data = tasks_dict[2]
-        # --- Use correct file key ---
-        task2_audio = request.files.get('audio_task_2')
-        if not task2_audio:
-            # Rollback or cleanup might be needed if transaction fails midway
-            return jsonify({'error': 'Missing audio file for task 2 (expected key: audio_task_2)'}), 400
-        if 'passage' not in task2_data or not task2_data.get('passage','').strip():
-             return jsonify({'error': f'Missing or empty passage for task 2'}), 400
-        db.session.add(SpeakingTask(
-            section=section, task_number=2, passage=task2_data.get('passage'),
-            prompt=task2_data['prompt'], audio_url=save_file(task2_audio, 'speaking_audios')
-        ))
-
-        # Task 3: passage, prompt, audio
-        task3_data = tasks_dict[3]
+    # Tasks 2-4 need audio and tasks 2-3 a passage; check every task before storing any file
+    task_rows = {num: {'task_number': num, 'prompt': tasks_dict[num]['prompt'], 'passage': None, 'audio_url': None}
+                 for num in range(1, 5)}
+    pending = []
+    for task_num in (2, 3, 4):
         # --- Use correct file key ---
-        task3_audio = request.files.get('audio_task_3')
-        if not task3_audio:
-            return jsonify({'error': 'Missing audio file for task 3 (expected key: audio_task_3)'}), 400
-        if 'passage' not in task3_data or not task3_data.get('passage','').strip():
-             return jsonify({'error': f'Missing or empty passage for task 3'}), 400
-        db.session.add(SpeakingTask(
-            section=section, task_number=3, passage=task3_data.get('passage'),
-            prompt=task3_data['prompt'], audio_url=save_file(task3_audio, 'speaking_audios')
-        ))
+        task_audio = request.files.get(f'audio_task_{task_num}')
+        if not task_audio:
+            return jsonify({'error': f'Missing audio file for task {task_num} (expected key: audio_task_{task_num})'}), 400
+        if task_num in (2, 3):
+            if 'passage' not in tasks_dict[task_num] or not tasks_dict[task_num].get('passage','').strip():
+                return jsonify({'error': f'Missing or empty passage for task {task_num}'}), 400
+            task_rows[task_num]['passage'] = tasks_dict[task_num].get('passage')
+        pending.append((task_rows[task_num], 'audio_url', task_audio, 'speaking_audios'))
+
+    saved = []
+    try:
+        save_uploads(pending, saved)
+        section = Section(section_type='speaking', title=title)
+        db.session.add(section)
+        db.session.flush() # Flush to get section.id if needed by SpeakingTask relationships immediately (depends on model)
 
-        # Task 4: prompt, audio
-        task4_data = tasks_dict[4]
-        # --- Use correct file key ---
-        task4_audio = request.files.get('audio_task_4')
-        if not task4_audio:
-            return jsonify({'error': 'Missing audio file for task 4 (expected key: audio_task_4)'}), 400
-        db.session.add(SpeakingTask(
-            section=section, task_number=4, prompt=task4_data['prompt'],
-            audio_url=save_file(task4_audio, 'speaking_audios')
-        ))
+        # Task 1: prompt only; tasks 2-3: passage, prompt, audio; task 4: prompt, audio
+        for task_num in range(1, 5):
+            db.session.add(SpeakingTask(section=section, **task_rows[task_num]))
+        db.session.flush()
+        refresh_media_ref_counts(section_media_urls(section.id))
 
         db.session.commit()
+        invalidate_section('speaking', section.id)
 
     except Exception as e:
         db.session.rollback() # Rollback on any error during processing
+        purge_unreferenced_media(saved)
         print(f"Error creating speaking section: {e}") # Log the error
         return jsonify({'error': f'An internal error occurred: {str(e)}'}), 500
 
@@ -1060,22 +2131,7 @@ def create_speaking_section():
 
 @app.route('/speaking/<int:section_id>', methods=['GET'])
 def get_speaking_section(section_id):
-    section = Section.query.filter_by(id=section_id, section_type='speaking').first()
-    if not section:
-        return jsonify({'error': 'Section not found'}), 404
-
-    tasks = SpeakingTask.query.filter_by(section_id=section.id).all()
-    tasks_data = [{'id': t.id, 'task_number': t.task_number, 'passage': t.passage, 
-                   'prompt': t.prompt, 'audio_url': t.audio_url} for t in tasks]
-
-    return jsonify({
-        'id': section.id,
-        'title': section.title,
-        'task1': tasks_data[0],
-        'task2': tasks_data[1],
-        'task3': tasks_data[2],
-        'task4': tasks_data[3]
-    }), 200
+    return section_snapshot_response('speaking', section_id)
 
 @app.route('/speaking/<int:section_id>', methods=['PUT'])
 @admin_required
@@ -1089,7 +2145,9 @@ def update_speaking_section(section_id):
         return jsonify({'error': 'Missing JSON data'}), 400
 
     section.title = data.get('title', section.title)
+    touch_section(section)
     db.session.commit()
+    invalidate_section('speaking', section_id)
 
     return jsonify({'message': 'Section updated successfully'}), 200
 
@@ -1100,16 +2158,7 @@ def delete_speaking_section(section_id):
     if not section:
         return jsonify({'error': 'Section not found'}), 404
 
-    tasks = SpeakingTask.query.filter_by(section_id=section.id).all()
-    for task in tasks:
-        if task.audio_url:
-            try:
-                os.remove(task.audio_url.lstrip('/'))
-            except OSError:
-                pass
-
-    db.session.delete(section)
-    db.session.commit()
+    delete_section(section)
     return jsonify({'message': 'Section deleted successfully'}), 200
 
 @app.route('/speakings', methods=['GET'])
@@ -1123,7 +2172,83 @@ def get_speaking_sections():
         'sections': [{'id': section.id, 'title': section.title} for section in sections],
     }), 200
 
+def finalized_speaking_upload(student_id, upload_id, field_name, task_number):
+    """Looks up the student's finalized upload for a task. Returns (upload, None) or (None, error response)."""
+    upload = get_student_upload(student_id, str(upload_id or ''))
+    if not upload:
+        return None, (jsonify({'error': f'Missing {field_name}'}), 400)
+    if not upload.url:
+        return None, (jsonify({'error': f'Upload for task {task_number} is not finalized'}), 409)
+    return upload, None
+
+def replace_speaking_response(student_id, task, audio_url):
+    """Stores a student's response to a task in place of any earlier one. Returns the replaced
+    recording's URL (purge it once this commits) or None. Does NOT commit."""
+    replaced_url = None
+    prev_response = SpeakingResponse.query.filter_by(task_id=task.id, user_id=student_id).first()
+    if prev_response:
+        replaced_url = prev_response.audio_url
+        db.session.delete(prev_response)
+        # The unit of work inserts before it deletes; flush so the (task, user) unique index holds
+        db.session.flush()
+    db.session.add(SpeakingResponse(user_id=student_id, task_id=task.id, audio_url=audio_url))
+    return replaced_url
+
+@app.route('/speaking/<int:section_id>/tasks/<int:task_number>/submit', methods=['POST'])
+@upload_policy('SPEAKING_TASK_SUBMIT_MAX_BYTES', 'RECORDING_MAX_BYTES', AUDIO_TYPES)
+@student_required
+def submit_speaking_task(student_id, section_id, task_number):
+    """Submit one task's recording as soon as it ends, as multipart `recording` or JSON {"uploadId": ...}.
+
+    Spreads the upload load over the session; POST /speaking/<id>/finalize then checks all four arrived.
+    """
+    task = SpeakingTask.query.filter_by(section_id=section_id, task_number=task_number).first()
+    if not task:
+        return jsonify({'error': f'Speaking task {task_number} not found for this section'}), 404
+
+    file = request.files.get('recording')
+    upload = None
+    if file is None:
+        upload, error = finalized_speaking_upload(
+            student_id, (request.get_json(silent=True) or {}).get('uploadId'), 'recording', task_number)
+        if error:
+            return error
+        audio_url = upload.url
+    elif file.filename == '':
+        return jsonify({'error': f'No selected file for task {task_number}'}), 400
+    else:
+        audio_url = save_file(file, 'speaking_responses')
+
+    replaced_url = replace_speaking_response(student_id, task, audio_url)
+    if upload:
+        db.session.delete(upload)
+    refresh_student_progress(student_id, section_id, 'speaking')
+    db.session.flush()
+    refresh_media_ref_counts({audio_url})
+    db.session.commit()
+    schedule_media_purge({replaced_url} - {audio_url})
+    return jsonify({'message': f'Speaking task {task_number} submitted successfully', 'taskNumber': task_number}), 200
+
+@app.route('/speaking/<int:section_id>/finalize', methods=['POST'])
+@student_required
+def finalize_speaking_answers(student_id, section_id):
+    """Checks that the student has a response for every task of the section."""
+    task_numbers = dict(db.session.query(SpeakingTask.task_number, db.func.count(SpeakingResponse.id))\
+        .outerjoin(SpeakingResponse, db.and_(SpeakingResponse.task_id == SpeakingTask.id, SpeakingResponse.user_id == student_id))\
+        .filter(SpeakingTask.section_id == section_id)\
+        .group_by(SpeakingTask.task_number)\
+        .all())
+    if not task_numbers:
+        return jsonify({'error': 'Section not found or not a speaking section'}), 404
+
+    missing = sorted(num for num, count in task_numbers.items() if not count)
+    if missing:
+        return jsonify({'error': f"Missing recordings for task(s) {', '.join(map(str, missing))}",
+                        'missingTasks': missing}), 400
+    return jsonify({'message': 'Speaking answers submitted successfully', 'submittedTasks': sorted(task_numbers)}), 200
+
 @app.route('/speaking/<int:section_id>/submit', methods=['POST'])
+@upload_policy('SPEAKING_SUBMIT_MAX_BYTES', 'RECORDING_MAX_BYTES', AUDIO_TYPES)
 @student_required
 def submit_speaking_answers(student_id, section_id):
     """Submit speaking answers for a given section."""
@@ -1135,44 +2260,57 @@ def submit_speaking_answers(student_id, section_id):
     # Define expected task numbers
     task_numbers = [1, 2, 3, 4]
 
-    # Check if all required recording files are present
+    # Each recording is either a multipart file or, as JSON {"uploads": {"task1": <uploadId>, ...}},
+    # a finalized resumable upload
+    upload_ids = (request.get_json(silent=True) or {}).get('uploads') or {}
+    uploads = {}
     for num in task_numbers:
         field_name = f'task{num}Recording'
-        if field_name not in request.files:
-            return jsonify({'error': f'Missing {field_name}'}), 400
-
-    # Process each recording
+        if field_name in request.files:
+            continue
+        upload, error = finalized_speaking_upload(student_id, upload_ids.get(f'task{num}'), field_name, num)
+        if error:
+            return error
+        uploads[num] = upload
+
+    # Check every task and file before storing any recording, so a 4xx leaves nothing behind
+    tasks = {task.task_number: task for task in SpeakingTask.query.filter_by(section_id=section_id)}
+    rows, pending = {}, []
     for num in task_numbers:
-        # Find the corresponding task
-        task = db.session.query(SpeakingTask).filter_by(section_id=section_id, task_number=num).first()
-        if not task:
+        if num not in tasks:
             return jsonify({'error': f'Speaking task {num} not found for this section'}), 404
 
         # Get the uploaded file
-        file = request.files[f'task{num}Recording']
-        if file.filename == '':
+        file = request.files.get(f'task{num}Recording')
+        if file is not None and file.filename == '':
             return jsonify({'error': f'No selected file for task {num}'}), 400
-        
-        # Delete previous response audios for this user and task
-        prev_response = SpeakingResponse.query.filter_by(task_id=task.id, user_id=student_id).first()
-        if prev_response:
-            os.remove(prev_response.audio_url.lstrip('/'))
-            db.session.delete(prev_response)
-
-        # Save the file and get its URL/path
-        file.filename = str(uuid.uuid4())
-        audio_url = save_file(file, 'speaking_responses')
+        # A finalized upload is consumed by its response
+        rows[num] = {'audio_url': uploads[num].url if num in uploads else None}
+        if num not in uploads:
+            pending.append((rows[num], 'audio_url', file, 'speaking_responses'))
 
-        # Store the response in the database
-        response = SpeakingResponse(
-            user_id=student_id,
-            task_id=task.id,
-            audio_url=audio_url
-        )
-        db.session.add(response)
+    # Process each recording
+    replaced_urls, saved = set(), []
+    try:
+        save_uploads(pending, saved)
+        new_urls = {row['audio_url'] for row in rows.values()}
+        for num in task_numbers:
+            replaced_urls.add(replace_speaking_response(student_id, tasks[num], rows[num]['audio_url']))
 
-    # Commit all changes
-    db.session.commit()
+        for upload in set(uploads.values()):
+            db.session.delete(upload)
+
+        refresh_student_progress(student_id, section_id, 'speaking')
+        db.session.flush()
+        refresh_media_ref_counts(new_urls)
+
+        # Commit all changes
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        purge_unreferenced_media(saved)
+        raise
+    schedule_media_purge(replaced_urls - new_urls)
     return jsonify({'message': 'Speaking answers submitted successfully'}), 200
 
 @app.route('/speaking/<int:section_id>/review/<int:student_id>', methods=['GET'])
@@ -1194,7 +2332,7 @@ def review_speaking_section(user_id, student_id, section_id):
         
         responses = db.session.query(SpeakingResponse, Score)\
         .join(SpeakingResponse.task)\
-        .outerjoin(Score, Score.response_id == SpeakingResponse.id)\
+        .outerjoin(Score, Score.speaking_response_id == SpeakingResponse.id)\
         .filter(
             SpeakingResponse.user_id == s_id,
             SpeakingTask.section_id == section_id
@@ -1260,6 +2398,7 @@ def submit_speaking_review(current_user_id, section_id):
             return jsonify({'error': 'Must submit reviews for all speaking tasks in the section'}), 400
 
         # Process each review
+        reviewed_user_ids = set()
         for item in data:
             response_id = item.get('response_id')
             task_id = item.get('task_id')
@@ -1280,19 +2419,17 @@ def submit_speaking_review(current_user_id, section_id):
             response = SpeakingResponse.query.get(response_id)
             if not response:
                 return jsonify({'error': f'No speaking response found for task {task_id}'}), 404
+            reviewed_user_ids.add(response.user_id)
 
             # Update or create the review
-            existing_score = db.session.query(Score).filter_by(
-                response_id=response.id,
-                response_type='speaking'
-            ).first()
+            existing_score = db.session.query(Score).filter_by(speaking_response_id=response.id).first()
             if existing_score:
                 existing_score.score = score_value
                 existing_score.feedback = feedback
                 existing_score.scored_by = current_user_id
             else:
                 new_score = Score(
-                    response_id=response.id,
+                    speaking_response_id=response.id,
                     response_type='speaking',
                     score=score_value,
                     feedback=feedback,
@@ -1300,6 +2437,9 @@ def submit_speaking_review(current_user_id, section_id):
                 )
                 db.session.add(new_score)
 
+        for reviewed_user_id in reviewed_user_ids:
+            refresh_student_progress(reviewed_user_id, section_id, 'speaking')
+
         # Save all changes
         db.session.commit()
         return jsonify({'message': 'Speaking reviews submitted successfully'}), 200
@@ -1313,6 +2453,7 @@ def submit_speaking_review(current_user_id, section_id):
 # Writing section
     
 @app.route('/writing', methods=['POST'])
+@upload_policy('AUTHORING_UPLOAD_MAX_BYTES', 'MEDIA_FILE_MAX_BYTES', AUDIO_TYPES)
 @admin_required
 def create_writing_section():
     if 'sectionData' not in request.form:
@@ -1349,20 +2490,22 @@ def create_writing_section():
     if not all(num in tasks_dict for num in range(1, 3)):
         return jsonify({'error': 'Missing data for one or more required tasks (1-2)'}), 400
 
-    section = Section(section_type='writing', title=title)
-    db.session.add(section)
-    db.session.flush() 
+    task1_audio = request.files.get('audio_task_1')
+    if not task1_audio:
+        return jsonify({'error': 'Missing audio file for task 1 (expected key: audio_task_1)'}), 400
 
+    saved = []
     try:
-        task1_data = tasks_dict[1]
-
-        task1_audio = request.files.get('audio_task_1')
-        if not task1_audio:
-            return jsonify({'error': 'Missing audio file for task 1 (expected key: audio_task_1)'}), 400
+        task1_row = {'audio_url': None}
+        save_uploads([(task1_row, 'audio_url', task1_audio, 'writing_audios')], saved)
+        section = Section(section_type='writing', title=title)
+        db.session.add(section)
+        db.session.flush() 
 
+        task1_data = tasks_dict[1]
         db.session.add(WritingTask(
             section=section, task_number=1, passage=task1_data['passage'],
-            prompt=task1_data['prompt'], audio_url=save_file(task1_audio, 'writing_audios')
+            prompt=task1_data['prompt'], audio_url=task1_row['audio_url']
         ))
 
         task2_data = tasks_dict[2]
@@ -1370,11 +2513,15 @@ def create_writing_section():
             section=section, task_number=2, passage=task2_data['passage'],
             prompt=task2_data['prompt']
         ))
+        db.session.flush()
+        refresh_media_ref_counts(section_media_urls(section.id))
 
         db.session.commit()
+        invalidate_section('writing', section.id)
 
     except Exception as e:
         db.session.rollback() 
+        purge_unreferenced_media(saved)
         print(f"Error creating writing section: {e}")
         return jsonify({'error': f'An internal error occurred: {str(e)}'}), 500
 
@@ -1389,20 +2536,7 @@ def create_writing_section():
 
 @app.route('/writing/<int:section_id>', methods=['GET'])
 def get_writing_section(section_id):
-    section = Section.query.filter_by(id=section_id, section_type='writing').first()
-    if not section:
-        return jsonify({'error': 'Section not found'}), 404
-
-    tasks = WritingTask.query.filter_by(section_id=section.id).all()
-    tasks_data = [{'id': t.id, 'task_number': t.task_number, 'passage': t.passage, 
-                   'prompt': t.prompt, 'audio_url': t.audio_url} for t in tasks]
-
-    return jsonify({
-        'id': section.id,
-        'title': section.title,
-        'task1': tasks_data[0],
-        'task2': tasks_data[1]
-    }), 200
+    return section_snapshot_response('writing', section_id)
 
 @app.route('/writing/<int:section_id>', methods=['PUT'])
 @admin_required
@@ -1416,7 +2550,9 @@ def update_writing_section(section_id):
         return jsonify({'error': 'Missing JSON data'}), 400
 
     section.title = data.get('title', section.title)
+    touch_section(section)
     db.session.commit()
+    invalidate_section('writing', section_id)
 
     return jsonify({'message': 'Section updated successfully'}), 200
 
@@ -1427,16 +2563,7 @@ def delete_writing_section(section_id):
     if not section:
         return jsonify({'error': 'Section not found'}), 404
 
-    tasks = WritingTask.query.filter_by(section_id=section.id).all()
-    for task in tasks:
-        if task.audio_url:
-            try:
-                os.remove(task.audio_url.lstrip('/'))
-            except OSError:
-                pass
-
-    db.session.delete(section)
-    db.session.commit()
+    delete_section(section)
     return jsonify({'message': 'Section deleted successfully'}), 200
 
 @app.route('/writings', methods=['GET'])
@@ -1498,6 +2625,7 @@ def submit_writing_answers(student_id, section_id):
                     word_count=word_count
                 )
                 db.session.add(new_response)
+        refresh_student_progress(student_id, section_id, 'writing')
         db.session.commit()
         return jsonify({'message': 'Writing answers submitted successfully'}), 200
 
@@ -1523,7 +2651,7 @@ def review_writing_section(user_id, section_id, student_id):
         # Fetch responses with tasks and scores
         responses = db.session.query(WritingResponse, WritingTask, Score)\
             .join(WritingTask, WritingResponse.task_id == WritingTask.id)\
-            .outerjoin(Score, (Score.response_id == WritingResponse.id) & (Score.response_type == 'writing'))\
+            .outerjoin(Score, Score.writing_response_id == WritingResponse.id)\
             .filter(
                 WritingResponse.user_id == s_id,
                 WritingTask.section_id == section_id
@@ -1573,6 +2701,7 @@ def submit_writing_review(current_user_id, section_id):
         if not section:
             return jsonify({'error': 'Writing section not found'}), 404
 
+        reviewed_user_ids = set()
         for review in data:
             response_id = review.get('response_id')
             score_value = review.get('score')
@@ -1586,20 +2715,21 @@ def submit_writing_review(current_user_id, section_id):
             response = WritingResponse.query.get(response_id)
             if not response:
                 return jsonify({'error': f'Response ID {response_id} not found'}), 404
+            reviewed_user_ids.add(response.user_id)
 
             # Validate score (assuming 0-100 range)
             if not isinstance(score_value, (int, float)) or score_value < 0 or score_value > 100:
                 return jsonify({'error': f'Invalid score {score_value} for response_id {response_id}'}), 400
 
             # Update or create score
-            existing_score = Score.query.filter_by(response_id=response_id, response_type='writing').first()
+            existing_score = Score.query.filter_by(writing_response_id=response_id).first()
             if existing_score:
                 existing_score.score = score_value
                 existing_score.feedback = feedback
                 existing_score.scored_by = current_user_id
             else:
                 new_score = Score(
-                    response_id=response_id,
+                    writing_response_id=response_id,
                     response_type='writing',
                     score=score_value,
                     feedback=feedback,
@@ -1607,6 +2737,9 @@ def submit_writing_review(current_user_id, section_id):
                 )
                 db.session.add(new_score)
 
+        for reviewed_user_id in reviewed_user_ids:
+            refresh_student_progress(reviewed_user_id, section_id, 'writing')
+
         db.session.commit()
         return jsonify({'message': 'Reviews submitted successfully'}), 200
 
@@ -1616,102 +2749,112 @@ def submit_writing_review(current_user_id, section_id):
     
 # Review pages
 
+def question_selection_repr(question, selections):
+    """JSON form of a set of answers: an option id, a list of option ids, or a list of table cells."""
+    if question.type == 'table':
+        return [{'rowId': row_id, 'colId': col_id} for row_id, col_id in sorted(selections)]
+    if question.type in ['multiple_to_single', 'audio', 'insert_text']:
+        return next(iter(selections)) if selections else None
+    return sorted(selections)
+
+def build_question_reviews(user_answers, answer_key):
+    """Groups a student's UserAnswer rows by question and emits one review entry per question.
+
+    Correctness uses the same answer key and all-or-nothing set comparison as
+    the submit endpoints, so multi-select and table questions are judged as a whole.
+    """
+    answers_by_question = {}
+    for ua in user_answers:
+        answers_by_question.setdefault(ua.question_id, []).append(ua)
+
+    reviews = []
+    for task_number, (question_id, answers) in enumerate(sorted(answers_by_question.items()), start=1):
+        question = answers[0].question
+        if question.type == 'table':
+            selections = {(ua.table_row_id, ua.table_column_id) for ua in answers if ua.table_row_id and ua.table_column_id}
+        else:
+            selections = {ua.option_id for ua in answers if ua.option_id}
+        correct, points = answer_key.get(question_id, (frozenset(), 0))
+        is_correct = bool(selections) and selections == correct
+
+        score_rec = next((score for ua in answers for score in ua.scores), None)
+        reviews.append({
+            'responseId': answers[0].id, # First UserAnswer.id, feedback is attached per answer row
+            'taskId': question.id,
+            'taskNumber': task_number,
+            'prompt': question.prompt,
+            'response': {
+                'responseId': answers[0].id,
+                'responseIds': [ua.id for ua in answers],
+                'userSelection': question_selection_repr(question, selections),
+                'isCorrect': is_correct
+            },
+            # Context
+            'options': [{'id': o.id, 'text': o.option_text} for o in question.options],
+            'rows': [{'id': r.id, 'label': r.row_label} for r in question.table_rows],
+            'columns': [{'id': c.id, 'label': c.column_label} for c in question.table_columns],
+            'correctAnswer': question_selection_repr(question, correct) if question.type == 'table' else sorted(correct),
+            'points': points,
+            'pointsEarned': points if is_correct else 0,
+            'score': {
+                'score': float(score_rec.score) if score_rec.score is not None else None,
+                'feedback': score_rec.feedback,
+                'scorer': score_rec.scorer.username if score_rec.scorer else None
+            } if score_rec else None # Send null if no score record
+        })
+    return reviews
+
+def answer_review_loader_options():
+    """Eager-loading options for reviewing UserAnswer rows without a cartesian join.
+
+    Many-to-one links (user, selected option/row/column) are joined, while question
+    context is selectin-loaded once per distinct question instead of being
+    re-joined onto every answer row.
+    """
+    question_loader = selectinload(UserAnswer.question)
+    return [
+        joinedload(UserAnswer.user),
+        question_loader.selectinload(Question.options),
+        question_loader.selectinload(Question.table_rows),
+        question_loader.selectinload(Question.table_columns),
+        question_loader.selectinload(Question.correct_answers),
+        joinedload(UserAnswer.option),
+        joinedload(UserAnswer.table_row),
+        joinedload(UserAnswer.table_column),
+        selectinload(UserAnswer.scores).joinedload(Score.scorer)
+    ]
+
 # === USER REVIEW ENDPOINTS ===
 
 @app.route('/review/summaries', methods=['GET'])
 @student_required
 def get_user_review_summaries(student_id):
-    """Fetches a summary of sections the user has completed."""
+    """Fetches a summary of sections the user has completed.
+
+    Reads the materialized student_section_progress rows (one indexed lookup by
+    user_id), joined with the section title and the stored reading/listening attempt.
+    """
     try:
-        summaries = []
-
-        # --- Query for SPEAKING sections completed by the user ---
-        speaking_sections = db.session.query(Section.id, Section.title)\
-            .join(SpeakingTask, Section.id == SpeakingTask.section_id)\
-            .join(SpeakingResponse, SpeakingTask.id == SpeakingResponse.task_id)\
-            .filter(SpeakingResponse.user_id == student_id)\
-            .distinct().all()
-        summaries.extend([{'sectionId': s.id, 'sectionTitle': s.title, 'sectionType': 'speaking'} for s in speaking_sections])
-
-        # --- Query for WRITING sections completed by the user ---
-        writing_sections = db.session.query(Section.id, Section.title)\
-            .join(WritingTask, Section.id == WritingTask.section_id)\
-            .join(WritingResponse, WritingTask.id == WritingResponse.task_id)\
-            .filter(WritingResponse.user_id == student_id)\
-            .distinct().all()
-        summaries.extend([{'sectionId': s.id, 'sectionTitle': s.title, 'sectionType': 'writing'} for s in writing_sections])
-
-        # --- Query for READING sections completed by the user ---
-        reading_sections = db.session.query(Section.id, Section.title)\
-            .join(ReadingPassage, Section.id == ReadingPassage.section_id)\
-            .join(Question, ReadingPassage.id == Question.reading_passage_id)\
-            .join(UserAnswer, Question.id == UserAnswer.question_id)\
-            .filter(UserAnswer.user_id == student_id)\
-            .filter(Section.section_type == 'reading')\
-            .distinct().all()
-        summaries.extend([{'sectionId': s.id, 'sectionTitle': s.title, 'sectionType': 'reading'} for s in reading_sections])
-
-        # --- Query for LISTENING sections completed by the user ---
-        listening_sections = db.session.query(Section.id, Section.title)\
-            .join(ListeningAudio, Section.id == ListeningAudio.section_id)\
-            .join(Question, ListeningAudio.id == Question.listening_audio_id)\
-            .join(UserAnswer, Question.id == UserAnswer.question_id)\
-            .filter(UserAnswer.user_id == student_id)\
-            .filter(Section.section_type == 'listening')\
-            .distinct().all()
-        summaries.extend([{'sectionId': s.id, 'sectionTitle': s.title, 'sectionType': 'listening'} for s in listening_sections])
-
-        # todo: optimize later
-        processed_summaries = []
-        processed_section_ids = set()
-
-        for s_type, sections_list in [('speaking', speaking_sections), ('writing', writing_sections), ('reading', reading_sections), ('listening', listening_sections)]:
-            for section_info in sections_list:
-                section_id = section_info.id
-                # Avoid processing the same section ID if it somehow appeared in multiple lists
-                if section_id in processed_section_ids:
-                    continue
-                processed_section_ids.add(section_id)
-
-                # --- Check feedback status ---
-                all_feedback_provided = False # Default to false
-                try:
-                    if s_type == 'speaking':
-                        # Check if ALL SpeakingResponses for this user/section have a corresponding Score
-                        response_count = db.session.query(db.func.count(SpeakingResponse.id)).join(SpeakingTask).filter(SpeakingTask.section_id == section_id, SpeakingResponse.user_id == student_id).scalar()
-                        score_count = db.session.query(db.func.count(Score.id)).join(SpeakingResponse).join(SpeakingTask).filter(SpeakingTask.section_id == section_id, SpeakingResponse.user_id == student_id, Score.response_type == 'speaking').scalar()
-                        all_feedback_provided = response_count > 0 and response_count == score_count
-
-                    elif s_type == 'writing':
-                        # Check if ALL WritingResponses for this user/section have a corresponding Score
-                        response_count = db.session.query(db.func.count(WritingResponse.id)).join(WritingTask).filter(WritingTask.section_id == section_id, WritingResponse.user_id == student_id).scalar()
-                        score_count = db.session.query(db.func.count(Score.id)).join(WritingResponse).join(WritingTask).filter(WritingTask.section_id == section_id, WritingResponse.user_id == student_id, Score.response_type == 'writing').scalar()
-                        all_feedback_provided = response_count > 0 and response_count == score_count
-
-                    elif s_type in ['reading', 'listening']:
-                        # Check if ALL UserAnswers for this user/section have a corresponding Score
-                        answer_count = db.session.query(db.func.count(UserAnswer.id)).join(Question).filter(Question.section_id == section_id, UserAnswer.user_id == student_id).scalar()
-                        score_count = db.session.query(db.func.count(Score.id)).join(UserAnswer).join(Question).filter(Question.section_id == section_id, UserAnswer.user_id == student_id, Score.response_type == s_type).scalar()
-                        all_feedback_provided = answer_count > 0 and answer_count == score_count
-                except Exception as check_e:
-                    print(f"Warning: Could not determine feedback status for section {section_id}: {check_e}")
-                    all_feedback_provided = False # Default to false on error
-
-
-                processed_summaries.append({
-                    'sectionId': section_id,
-                    'sectionTitle': section_info.title,
-                    'sectionType': s_type,
-                    'feedbackProvided': all_feedback_provided # <<< ADDED STATUS
-                    # 'completedAt': ... # Add completion date if needed
-                })
+        rows = db.session.query(StudentSectionProgress, Section.title, SectionAttempt)\
+            .join(Section, StudentSectionProgress.section_id == Section.id)\
+            .outerjoin(SectionAttempt, (SectionAttempt.section_id == StudentSectionProgress.section_id) &
+                                       (SectionAttempt.user_id == StudentSectionProgress.user_id))\
+            .filter(StudentSectionProgress.user_id == student_id, StudentSectionProgress.response_count > 0)\
+            .all()
 
+        type_order = {'speaking': 0, 'writing': 1, 'reading': 2, 'listening': 3}
+        processed_summaries = []
+        for progress, section_title, attempt in sorted(rows, key=lambda r: (type_order.get(r[0].section_type, 4), r[0].section_id)):
+            processed_summaries.append({
+                'sectionId': progress.section_id,
+                'sectionTitle': section_title,
+                'sectionType': progress.section_type,
+                'feedbackProvided': progress.feedback_provided,
+                'attempt': section_attempt_data(attempt) # Stored score for reading/listening
+            })
 
-        # return jsonify(list(unique_summaries)), 200
         return jsonify(processed_summaries), 200
 
-        # return jsonify(summaries), 200
-
     except Exception as e:
         print(f"Error in /review/summaries: {e}")
         import traceback
@@ -1832,127 +2975,18 @@ def get_user_section_review_details(student_id, sectionType, sectionId):
 
 
         elif sectionType in ['reading', 'listening']:
-            # Determine the correct intermediate model and join conditions
-            if sectionType == 'reading':
-                IntermediateModel = ReadingPassage
-                intermediate_fk_on_question = Question.reading_passage_id
-                section_fk_on_intermediate = ReadingPassage.section_id
-            else: # listening
-                IntermediateModel = ListeningAudio
-                intermediate_fk_on_question = Question.listening_audio_id
-                section_fk_on_intermediate = ListeningAudio.section_id
-
-            # Fetch UserAnswers by joining through the correct path AND filtering correctly
             answers_query = db.session.query(UserAnswer)\
                 .join(Question, UserAnswer.question_id == Question.id)\
-                .join(IntermediateModel, intermediate_fk_on_question == IntermediateModel.id) \
-                .filter(section_fk_on_intermediate == sectionId) \
+                .filter(Question.section_id == sectionId) \
                 .filter(UserAnswer.user_id == student_id) \
-                .options( # Eager load everything needed
-                    joinedload(UserAnswer.user), # Though filtered, good practice
-                    joinedload(UserAnswer.question).options(
-                        # Load question context
-                        joinedload(Question.options), # Load all options for the question
-                        joinedload(Question.correct_answers).joinedload(CorrectAnswer.option), # Load correct options
-                        joinedload(Question.correct_answers).joinedload(CorrectAnswer.table_row), # Load correct table rows
-                        joinedload(Question.correct_answers).joinedload(CorrectAnswer.table_column), # Load correct table columns
-                        joinedload(Question.user_answers.and_(UserAnswer.user_id == student_id)).joinedload(UserAnswer.option), # Load user's selected option
-                        joinedload(Question.user_answers.and_(UserAnswer.user_id == student_id)).joinedload(UserAnswer.table_row), # Load user's selected row
-                        joinedload(Question.user_answers.and_(UserAnswer.user_id == student_id)).joinedload(UserAnswer.table_column) # Load user's selected col
-                    ),
-                    # Load user selection details
-                    joinedload(UserAnswer.option),
-                    joinedload(UserAnswer.table_row),
-                    joinedload(UserAnswer.table_column),
-                    # Load scores
-                    joinedload(UserAnswer.scores).joinedload(Score.scorer)
-                )\
+                .options(*answer_review_loader_options())\
                 .order_by(Question.id) # Order by Question ID for consistency
 
             user_answers = answers_query.all()
-            user_responses_map = {}
-
-            for ua in user_answers: # 'ua' is the UserAnswer object for the current student/question
-                # Ensure the student exists in the map
-                if ua.user_id not in user_responses_map:
-                    user_responses_map[ua.user_id] = {
-                        'student': {'id': ua.user.id, 'name': ua.user.username},
-                        'responses': []
-                    }
-
-                # Determine user's answer representation *directly from ua*
-                user_ans_repr = None
-                if ua.option: # Check if the UserAnswer links to an Option
-                    user_ans_repr = ua.option.id
-                elif ua.table_row and ua.table_column: # Check if it links to table row/col
-                    user_ans_repr = {'rowId': ua.table_row_id, 'colId': ua.table_column_id}
-                # Add elif for other potential answer storage methods if needed
-
-                # Access the loaded score directly from the UserAnswer's 'scores' relationship
-                score_rec = ua.scores[0] if ua.scores else None
-                score_data = {
-                    'score': float(score_rec.score) if score_rec and score_rec.score is not None else None,
-                    'feedback': score_rec.feedback if score_rec else None,
-                    'hasFeedback': bool(score_rec) # This status is needed for admin view, maybe not user view
-                }
-
-                # Get correct answer (you might need this logic for user view too)
-                correct_ans_repr = []
-                if ua.question.type in ['multiple_to_single', 'multiple_to_multiple', 'audio']:
-                    correct_ans_repr = [ca.option.id for ca in ua.question.correct_answers if ca.option]
-                elif ua.question.type == 'table':
-                    correct_ans_repr = [{'rowId': ca.table_row_id, 'colId': ca.table_column_id} for ca in ua.question.correct_answers if ca.table_row and ca.table_column]
-
-                # Determine if user's answer was correct
-                is_correct = False
-                if ua.question.type in ['multiple_to_single', 'audio']:
-                    is_correct = user_ans_repr is not None and correct_ans_repr and user_ans_repr == correct_ans_repr[0]
-                elif ua.question.type == 'multiple_to_multiple':
-                    # We need all user answers for *this specific question* to compare sets
-                    # This might require a slightly different query structure if not already loaded correctly
-                    # For simplicity, let's assume correctness check might be complex here or done differently
-                    pass # Complex comparison needed
-                elif ua.question.type == 'table':
-                    # Complex comparison needed
-                    pass
-
-
-                # Append the formatted response details
-                user_responses_map[ua.user_id]['responses'].append({
-                    'responseId': ua.id, # This is UserAnswer.id - Use as 'response.responseId'
-                    'taskId': ua.question.id,
-                    'taskNumber': ua.question.id, # Or index needed?
-                    'prompt': ua.question.prompt,
-                    # 'responseType': sectionType, # Not usually needed in UserTaskReview
-                    'response': { # Nest response specific details
-                        'responseId': ua.id,
-                        'userSelection': user_ans_repr,
-                        'isCorrect': is_correct
-                    },
-                    # Context
-                    'options': [{'id': o.id, 'text': o.option_text} for o in ua.question.options],
-                    'rows': [{'id': r.id, 'label': r.row_label} for r in getattr(ua.question, 'table_rows', [])],
-                    'columns': [{'id': c.id, 'label': c.column_label} for c in getattr(ua.question, 'table_columns', [])],
-                    'correctAnswer': correct_ans_repr,
-                    # Score/Feedback (should match UserTaskReview.score structure)
-                    'score': { # Nest score details
-                        'score': score_data['score'],
-                        'feedback': score_data['feedback'],
-                        'scorer': score_rec.scorer.username if score_rec and score_rec.scorer else None
-                    } if score_rec else None # Send null if no score record
-                })
-
-                submissions_or_tasks_list = list(user_responses_map.values())
+            results['tasks'] = build_question_reviews(user_answers, get_answer_key(sectionType, sectionId))
 
-                # Decide final return structure. The endpoint is for ONE user,
-                # so 'submissions_or_tasks_list' should only have one element.
-                if len(submissions_or_tasks_list) > 1:
-                    print(f"Warning: Found review data for more than one user ({len(submissions_or_tasks_list)}) for student_id {student_id}")
-
-                final_tasks = submissions_or_tasks_list[0]['responses'] if submissions_or_tasks_list else []
-
-                # Structure the final JSON to match UserSectionReviewDetail
-                results['tasks'] = final_tasks # Assign the list of formatted tasks
+            attempt = SectionAttempt.query.filter_by(user_id=student_id, section_id=sectionId).first()
+            results['attempt'] = section_attempt_data(attempt)
 
         return jsonify(results), 200
 
@@ -1985,16 +3019,11 @@ def get_admin_review_summaries(admin_id):
             query = query.join(WritingTask, Section.id == WritingTask.section_id)\
                          .join(WritingResponse, WritingTask.id == WritingResponse.task_id)\
                          .join(User, WritingResponse.user_id == User.id) # <<< Join User via Response
-        elif sectionType == 'reading':
-            query = query.join(ReadingPassage, Section.id == ReadingPassage.section_id)\
-                        .join(Question, ReadingPassage.id == Question.reading_passage_id)\
-                        .join(UserAnswer, Question.id == UserAnswer.question_id)\
-                        .join(User, UserAnswer.user_id == User.id)
-        elif sectionType == 'listening':
-            query = query.join(ListeningAudio, Section.id == ListeningAudio.section_id)\
-                        .join(Question, ListeningAudio.id == Question.listening_audio_id)\
-                        .join(UserAnswer, Question.id == UserAnswer.question_id)\
-                        .join(User, UserAnswer.user_id == User.id)
+        elif sectionType in ['reading', 'listening']:
+            # Reading/listening submissions are recorded as one SectionAttempt per student
+            query = query.join(SectionAttempt, Section.id == SectionAttempt.section_id)\
+                        .join(User, SectionAttempt.user_id == User.id)\
+                        .add_columns(db.func.avg(SectionAttempt.scaled_score).label('averageScaledScore'))
         else: 
             return jsonify({'error': 'Invalid section type'}), 400
 
@@ -2011,6 +3040,8 @@ def get_admin_review_summaries(admin_id):
 
         for summary in summaries:
             summary['sectionType'] = sectionType
+            if summary.get('averageScaledScore') is not None:
+                summary['averageScaledScore'] = round(float(summary['averageScaledScore']), 1)
 
         return jsonify(summaries), 200
     except Exception as e:
@@ -2021,161 +3052,245 @@ def get_admin_review_summaries(admin_id):
         return jsonify({'error': f'Failed to fetch admin review summaries for {sectionType}'}), 500
 
 
-@app.route('/admin/review/<sectionType>/<int:sectionId>', methods=['GET'])
-@admin_required # Assuming admin_required provides admin_id implicitly or via g.user
-def get_admin_section_review_details(sectionType, sectionId): # Removed admin_id if not needed directly
-    """Fetches all student responses/answers for a specific section for admin review."""
-    try:
-        section = db.session.query(Section).filter_by(id=sectionId, section_type=sectionType).first()
-        if not section:
-            return jsonify({'error': 'Section not found'}), 404
+ADMIN_REVIEW_PAGE_SIZE = 50
+ADMIN_REVIEW_MAX_PAGE_SIZE = 200
+ADMIN_REVIEW_STREAM_BATCH = 500
 
-        submissions = []
-        user_responses_map = {} # Temp map {user_id: {student: {...}, responses: [...]}}
+def admin_review_query(sectionType, sectionId):
+    """Returns (query, user_id_column) for every response in a section, ordered by student.
 
-        if sectionType == 'speaking':
-            # Fetch SpeakingResponses and eagerly load related data including Scores
-            responses_query = db.session.query(SpeakingResponse)\
-                .join(SpeakingTask, SpeakingResponse.task_id == SpeakingTask.id)\
-                .filter(SpeakingTask.section_id == sectionId)\
-                .options(
-                    joinedload(SpeakingResponse.user),
-                    joinedload(SpeakingResponse.task),
-                    joinedload(SpeakingResponse.scores).joinedload(Score.scorer) # Eager load scores and scorer
-                )\
-                .order_by(SpeakingResponse.user_id, SpeakingTask.task_number)
-
-            responses = responses_query.all()
-
-            for resp in responses:
-                if resp.user_id not in user_responses_map:
-                     user_responses_map[resp.user_id] = {
-                         'student': {'id': resp.user.id, 'name': resp.user.username},
-                         'responses': []
-                     }
-                # Access the loaded score (should be 0 or 1 score object)
-                score_rec = resp.scores[0] if resp.scores else None
-                score_data = {
-                     'score': float(score_rec.score) if score_rec and score_rec.score is not None else None,
-                     'feedback': score_rec.feedback if score_rec else None,
-                     'hasFeedback': bool(score_rec)
-                 }
-
-                user_responses_map[resp.user_id]['responses'].append({
-                    'responseId': resp.id, 'taskId': resp.task_id, 'taskNumber': resp.task.task_number,
-                    'taskPrompt': resp.task.prompt, 'responseType': 'speaking', 'audioUrl': resp.audio_url,
-                    **score_data
-                })
+    Collections are selectin-loaded (never joined) so the same query works for a
+    page of students and for yield_per streaming.
+    """
+    if sectionType == 'speaking':
+        query = db.session.query(SpeakingResponse)\
+            .join(SpeakingTask, SpeakingResponse.task_id == SpeakingTask.id)\
+            .filter(SpeakingTask.section_id == sectionId)\
+            .options(
+                joinedload(SpeakingResponse.user),
+                joinedload(SpeakingResponse.task),
+                selectinload(SpeakingResponse.scores).joinedload(Score.scorer) # Eager load scores and scorer
+            )\
+            .order_by(SpeakingResponse.user_id, SpeakingTask.task_number)
+        return query, SpeakingResponse.user_id
 
-        elif sectionType == 'writing':
-            # Fetch WritingResponses similarly
-            responses_query = db.session.query(WritingResponse)\
-                .join(WritingTask, WritingResponse.task_id == WritingTask.id)\
-                .filter(WritingTask.section_id == sectionId)\
-                .options(
-                    joinedload(WritingResponse.user),
-                    joinedload(WritingResponse.task),
-                    joinedload(WritingResponse.scores).joinedload(Score.scorer)
-                )\
-                .order_by(WritingResponse.user_id, WritingTask.task_number)
-
-            responses = responses_query.all()
-            # Process writing responses (similar logic to speaking)
-            for resp in responses:
-                 if resp.user_id not in user_responses_map:
-                     user_responses_map[resp.user_id] = {
-                         'student': {'id': resp.user.id, 'name': resp.user.username},
-                         'responses': []
-                     }
-                 score_rec = resp.scores[0] if resp.scores else None
-                 score_data = { 'score': float(score_rec.score) if score_rec and score_rec.score is not None else None, 'feedback': score_rec.feedback if score_rec else None, 'hasFeedback': bool(score_rec)}
-                 user_responses_map[resp.user_id]['responses'].append({
-                    'responseId': resp.id, 'taskId': resp.task_id, 'taskNumber': resp.task.task_number,
-                    'taskPrompt': resp.task.prompt, 'responseType': 'writing', 'responseText': resp.response_text, 'wordCount': resp.word_count,
-                    **score_data
-                 })
+    if sectionType == 'writing':
+        query = db.session.query(WritingResponse)\
+            .join(WritingTask, WritingResponse.task_id == WritingTask.id)\
+            .filter(WritingTask.section_id == sectionId)\
+            .options(
+                joinedload(WritingResponse.user),
+                joinedload(WritingResponse.task),
+                selectinload(WritingResponse.scores).joinedload(Score.scorer)
+            )\
+            .order_by(WritingResponse.user_id, WritingTask.task_number)
+        return query, WritingResponse.user_id
+
+    query = db.session.query(UserAnswer)\
+        .join(Question, UserAnswer.question_id == Question.id)\
+        .filter(Question.section_id == sectionId) \
+        .options(*answer_review_loader_options())\
+        .order_by(UserAnswer.user_id, Question.id) # Order is important for grouping
+    return query, UserAnswer.user_id
+
+def admin_review_responders(sectionType, sectionId):
+    """Returns (select, user_id_column) of the distinct students with response rows in a section."""
+    if sectionType == 'speaking':
+        return db.select(SpeakingResponse.user_id)\
+            .join(SpeakingTask, SpeakingResponse.task_id == SpeakingTask.id)\
+            .where(SpeakingTask.section_id == sectionId)\
+            .distinct(), SpeakingResponse.user_id
+    if sectionType == 'writing':
+        return db.select(WritingResponse.user_id)\
+            .join(WritingTask, WritingResponse.task_id == WritingTask.id)\
+            .where(WritingTask.section_id == sectionId)\
+            .distinct(), WritingResponse.user_id
+    return db.select(UserAnswer.user_id)\
+        .join(Question, UserAnswer.question_id == Question.id)\
+        .where(Question.section_id == sectionId)\
+        .distinct(), UserAnswer.user_id
+
+def admin_review_page_user_ids(sectionType, sectionId, after_user_id, limit):
+    """The next `limit` students with responses in a section, in user id order.
+
+    Taken from the progress table, plus any student in the same id range whose responses
+    predate it (no progress row until `flask rebuild-progress` runs), found from the
+    response rows so nobody is skipped.
+    """
+    progress_ids = db.session.execute(
+        db.select(StudentSectionProgress.user_id)
+        .where(
+            StudentSectionProgress.section_id == sectionId,
+            StudentSectionProgress.response_count > 0,
+            StudentSectionProgress.user_id > after_user_id
+        )
+        .order_by(StudentSectionProgress.user_id)
+        .limit(limit)
+    ).scalars().all()
+
+    responders, user_id_column = admin_review_responders(sectionType, sectionId)
+    untracked = responders.where(
+        user_id_column > after_user_id,
+        ~db.exists().where(
+            StudentSectionProgress.user_id == user_id_column,
+            StudentSectionProgress.section_id == sectionId,
+            StudentSectionProgress.response_count > 0
+        )
+    )
+    if len(progress_ids) == limit: # Only students who would sort into this page matter
+        untracked = untracked.where(user_id_column <= progress_ids[-1])
+    untracked_ids = db.session.execute(untracked.order_by(user_id_column).limit(limit)).scalars().all()
+    if untracked_ids:
+        print(f"Warning: students {untracked_ids[:5]} have {sectionType} section {sectionId} responses "
+              f"but no progress rows; run `flask rebuild-progress`")
+    return sorted(set(progress_ids) | set(untracked_ids))[:limit]
+
+def section_question_numbers(sectionId):
+    """Maps question_id -> its 1-based position in the section."""
+    question_ids = db.session.execute(
+        db.select(Question.id).where(Question.section_id == sectionId).order_by(Question.id)
+    ).scalars().all()
+    return {question_id: number for number, question_id in enumerate(question_ids, start=1)}
+
+def format_admin_review_response(sectionType, resp):
+    """Formats one speaking/writing response for the admin review list."""
+    # Access the loaded score (should be 0 or 1 score object)
+    score_rec = resp.scores[0] if resp.scores else None
+    score_data = {
+        'score': float(score_rec.score) if score_rec and score_rec.score is not None else None,
+        'feedback': score_rec.feedback if score_rec else None,
+        'hasFeedback': bool(score_rec)
+    }
 
+    if sectionType == 'speaking':
+        return {
+            'responseId': resp.id, 'taskId': resp.task_id, 'taskNumber': resp.task.task_number,
+            'taskPrompt': resp.task.prompt, 'responseType': 'speaking', 'audioUrl': resp.audio_url,
+            **score_data
+        }
+    return {
+        'responseId': resp.id, 'taskId': resp.task_id, 'taskNumber': resp.task.task_number,
+        'taskPrompt': resp.task.prompt, 'responseType': 'writing', 'responseText': resp.response_text, 'wordCount': resp.word_count,
+        **score_data
+    }
 
-        elif sectionType in ['reading', 'listening']:
-            # Determine the correct intermediate model and join condition based on type
-            if sectionType == 'reading':
-                IntermediateModel = ReadingPassage
-                intermediate_fk_on_question = Question.reading_passage_id
-                section_fk_on_intermediate = ReadingPassage.section_id
-            else: # listening
-                IntermediateModel = ListeningAudio
-                intermediate_fk_on_question = Question.listening_audio_id
-                section_fk_on_intermediate = ListeningAudio.section_id
-
-            # Fetch UserAnswers by joining through the correct path
-            answers_query = db.session.query(UserAnswer)\
-                .join(Question, UserAnswer.question_id == Question.id)\
-                .join(IntermediateModel, intermediate_fk_on_question == IntermediateModel.id) \
-                .filter(section_fk_on_intermediate == sectionId) \
-                .options( # Eager load everything needed
-                    joinedload(UserAnswer.user),
-                    joinedload(UserAnswer.question).options(
-                        joinedload(Question.options),
-                        joinedload(Question.table_rows),
-                        joinedload(Question.table_columns),
-                        joinedload(Question.correct_answers).joinedload(CorrectAnswer.option),
-                        joinedload(Question.correct_answers).joinedload(CorrectAnswer.table_row),
-                        joinedload(Question.correct_answers).joinedload(CorrectAnswer.table_column),
-                    ),
-                    joinedload(UserAnswer.option),
-                    joinedload(UserAnswer.table_row),
-                    joinedload(UserAnswer.table_column),
-                    joinedload(UserAnswer.scores).joinedload(Score.scorer) # Load score via relationship
-                )\
-                .order_by(UserAnswer.user_id, Question.id) # Order is important for grouping
+def format_admin_question_reviews(sectionType, user_answers, answer_key, question_numbers):
+    """One admin review entry per question a student answered, judged like the submit endpoints."""
+    entries = []
+    for review in build_question_reviews(user_answers, answer_key):
+        score = review['score']
+        entries.append({
+            'responseId': review['responseId'], # First UserAnswer.id, feedback is attached per answer row
+            'responseIds': review['response']['responseIds'],
+            'taskId': review['taskId'],
+            'taskNumber': question_numbers.get(review['taskId'], review['taskNumber']),
+            'taskPrompt': review['prompt'],
+            'responseType': sectionType,
+            'userSelection': review['response']['userSelection'],
+            'isCorrect': review['response']['isCorrect'],
+            'options': review['options'],
+            'rows': review['rows'],
+            'columns': review['columns'],
+            'score': score['score'] if score else None,
+            'feedback': score['feedback'] if score else None,
+            'hasFeedback': bool(score)
+        })
+    return entries
+
+def iter_admin_submissions(sectionType, sectionId, responses):
+    """Groups responses (ordered by user_id) into one submission per student, lazily."""
+    if sectionType in ['reading', 'listening']:
+        answer_key = get_answer_key(sectionType, sectionId)
+        question_numbers = section_question_numbers(sectionId)
+
+    def submission(student_responses):
+        user = student_responses[0].user
+        if sectionType in ['reading', 'listening']:
+            entries = format_admin_question_reviews(sectionType, student_responses, answer_key, question_numbers)
+        else:
+            entries = [format_admin_review_response(sectionType, resp) for resp in student_responses]
+        return {'student': {'id': user.id, 'name': user.username}, 'responses': entries}
+
+    student_responses = []
+    for resp in responses:
+        if student_responses and student_responses[0].user_id != resp.user_id:
+            yield submission(student_responses)
+            student_responses = []
+        student_responses.append(resp)
+    if student_responses:
+        yield submission(student_responses)
+
+def attach_section_attempts(sectionType, sectionId, submissions):
+    if sectionType not in ['reading', 'listening'] or not submissions:
+        return submissions
+    # Attach each student's stored score instead of recomputing it from answer rows
+    attempts = SectionAttempt.query.filter(
+        SectionAttempt.section_id == sectionId,
+        SectionAttempt.user_id.in_([sub['student']['id'] for sub in submissions])
+    ).all()
+    attempts_by_user = {attempt.user_id: attempt for attempt in attempts}
+    for submission in submissions:
+        submission['attempt'] = section_attempt_data(attempts_by_user.get(submission['student']['id']))
+    return submissions
 
-            user_answers = answers_query.all()
+@app.route('/admin/review/<sectionType>/<int:sectionId>', methods=['GET'])
+@admin_required # Assuming admin_required provides admin_id implicitly or via g.user
+def get_admin_section_review_details(sectionType, sectionId): # Removed admin_id if not needed directly
+    """Fetches student responses/answers for a specific section for admin review.
 
-            # --- The rest of the processing logic remains the same ---
-            # It correctly groups by user_id and processes each 'ua' in user_answers
-            for ua in user_answers:
-                if ua.user_id not in user_responses_map:
-                    user_responses_map[ua.user_id] = {
-                        'student': {'id': ua.user.id, 'name': ua.user.username},
-                        'responses': []
-                    }
-
-                # Determine user's answer representation (logic as before)
-                user_ans_repr = None
-                if ua.question.type in ['multiple_to_single', 'multiple_to_multiple', 'audio'] and ua.option:
-                    user_ans_repr = ua.option.id
-                elif ua.question.type == 'table' and ua.table_row and ua.table_column:
-                    user_ans_repr = {'rowId': ua.table_row_id, 'colId': ua.table_column_id}
-
-                # Access the loaded score
-                score_rec = ua.scores[0] if ua.scores else None
-                score_data = {
-                    'score': float(score_rec.score) if score_rec and score_rec.score is not None else None,
-                    'feedback': score_rec.feedback if score_rec else None,
-                    'hasFeedback': bool(score_rec)
-                }
+    Keyset-paginated by student: ?after_user_id=<id>&limit=<n> (default 50, max 200);
+    the response carries nextAfterUserId for the next page. With ?format=ndjson the
+    whole section is streamed instead, one student's submission per line.
+    """
+    if sectionType not in ['speaking', 'writing', 'reading', 'listening']:
+        return jsonify({'error': 'Invalid section type'}), 400
 
-                user_responses_map[ua.user_id]['responses'].append({
-                    'responseId': ua.id, # UserAnswer.id
-                    'taskId': ua.question.id,
-                    'taskNumber': ua.question.id, # Or index
-                    'taskPrompt': ua.question.prompt,
-                    'responseType': sectionType,
-                    'userSelection': user_ans_repr,
-                    'options': [{'id': o.id, 'text': o.option_text} for o in ua.question.options],
-                    'rows': [{'id': r.id, 'label': r.row_label} for r in getattr(ua.question, 'table_rows', [])],
-                    'columns': [{'id': c.id, 'label': c.column_label} for c in getattr(ua.question, 'table_columns', [])],
-                    **score_data
-                })
+    try:
+        after_user_id = int(request.args.get('after_user_id', 0))
+        limit = min(int(request.args.get('limit', ADMIN_REVIEW_PAGE_SIZE)), ADMIN_REVIEW_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'after_user_id and limit must be integers'}), 400
+    if limit < 1:
+        return jsonify({'error': 'limit must be positive'}), 400
+
+    try:
+        section = db.session.query(Section).filter_by(id=sectionId, section_type=sectionType).first()
+        if not section:
+            return jsonify({'error': 'Section not found'}), 404
 
-        # Convert map to list
-        submissions = list(user_responses_map.values())
+        responses_query, user_id_column = admin_review_query(sectionType, sectionId)
+
+        if request.args.get('format') == 'ndjson':
+            def generate():
+                # yield_per keeps a server-side cursor open and only one batch of ORM objects alive
+                responses = responses_query\
+                    .filter(user_id_column > after_user_id)\
+                    .execution_options(stream_results=True)\
+                    .yield_per(ADMIN_REVIEW_STREAM_BATCH)
+                buffered = [] # A bounded handful of students, so attempts are fetched per batch
+                for submission in iter_admin_submissions(sectionType, sectionId, responses):
+                    buffered.append(submission)
+                    if len(buffered) >= ADMIN_REVIEW_PAGE_SIZE:
+                        yield ''.join(json.dumps(sub) + '\n' for sub in attach_section_attempts(sectionType, sectionId, buffered))
+                        buffered = []
+                if buffered:
+                    yield ''.join(json.dumps(sub) + '\n' for sub in attach_section_attempts(sectionType, sectionId, buffered))
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+        # Pick the page of students first, then load only their responses
+        page_user_ids = admin_review_page_user_ids(sectionType, sectionId, after_user_id, limit)
+
+        submissions = []
+        if page_user_ids:
+            responses = responses_query.filter(user_id_column.in_(page_user_ids)).all()
+            submissions = attach_section_attempts(sectionType, sectionId, list(iter_admin_submissions(sectionType, sectionId, responses)))
 
         return jsonify({
             'sectionId': section.id,
             'sectionTitle': section.title,
             'sectionType': section.section_type,
-            'submissions': submissions
+            'submissions': submissions,
+            'nextAfterUserId': page_user_ids[-1] if len(page_user_ids) == limit else None
         }), 200
 
     except Exception as e:
@@ -2186,6 +3301,26 @@ def get_admin_section_review_details(sectionType, sectionId): # Removed admin_id
         return jsonify({'error': 'Failed to fetch admin review details'}), 500
 
 
+@app.route('/admin/sections/<int:section_id>/rescore', methods=['POST'])
+@admin_required
+def rescore_section(section_id):
+    """Recomputes stored reading/listening scores after an answer-key correction."""
+    section = db.session.query(Section).filter_by(id=section_id).first()
+    if not section:
+        return jsonify({'error': 'Section not found'}), 404
+    if section.section_type not in ['reading', 'listening']:
+        return jsonify({'error': 'Only reading and listening sections can be re-scored'}), 400
+
+    try:
+        rescored = rescore_section_attempts(section)
+        db.session.commit()
+        return jsonify({'sectionId': section.id, 'rescoredAttempts': rescored}), 200
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error re-scoring section {section_id}: {e}")
+        return jsonify({'error': 'Failed to re-score section'}), 500
+
+
 # --- Endpoint to GET details for the feedback form (Handles all types) ---
 @app.route('/admin/feedback/<responseType>/<int:responseId>', methods=['GET'])
 @admin_required # Use appropriate decorator
@@ -2227,21 +3362,7 @@ def get_feedback_target_details(responseType, responseId): # Removed admin_id if
             }
         elif responseType in ['reading', 'listening']:
              resp = db.session.query(UserAnswer)\
-                .options(
-                    joinedload(UserAnswer.user),
-                    joinedload(UserAnswer.question).options(
-                        joinedload(Question.options), # Load all needed context
-                        joinedload(Question.table_rows),
-                        joinedload(Question.table_columns),
-                        joinedload(Question.correct_answers).joinedload(CorrectAnswer.option),
-                        joinedload(Question.correct_answers).joinedload(CorrectAnswer.table_row),
-                        joinedload(Question.correct_answers).joinedload(CorrectAnswer.table_column),
-                     ),
-                    joinedload(UserAnswer.option),
-                    joinedload(UserAnswer.table_row),
-                    joinedload(UserAnswer.table_column),
-                    joinedload(UserAnswer.scores).joinedload(Score.scorer) # Load score via relationship
-                    )\
+                .options(*answer_review_loader_options())\
                 .filter(UserAnswer.id == responseId).first()
              if not resp: return jsonify({'error': f'{responseType.capitalize()} answer not found'}), 404
 
@@ -2320,27 +3441,28 @@ def submit_admin_feedback(admin_id, responseType, responseId): # Removed admin_i
 
 
     try:
-        target_id_column = None
         if responseType in ['speaking', 'writing']:
-            target_id_column = Score.response_id
-            # Verify original response exists
-            model = SpeakingResponse if responseType == 'speaking' else WritingResponse
-            if not db.session.query(model.id).filter_by(id=responseId).first():
+            # Verify original response exists (and find whose progress it affects)
+            model, task_model = (SpeakingResponse, SpeakingTask) if responseType == 'speaking' else (WritingResponse, WritingTask)
+            target = db.session.query(model.user_id, task_model.section_id)\
+                .join(task_model, model.task_id == task_model.id)\
+                .filter(model.id == responseId).first()
+            if not target:
                 return jsonify({'error': f'Original {responseType} response not found'}), 404
 
         elif responseType in ['reading', 'listening']:
-            target_id_column = Score.user_answer_id
-            # Verify original answer exists
-            if not db.session.query(UserAnswer.id).filter_by(id=responseId).first():
+            # Verify original answer exists (and find whose progress it affects)
+            target = db.session.query(UserAnswer.user_id, Question.section_id)\
+                .join(Question, UserAnswer.question_id == Question.id)\
+                .filter(UserAnswer.id == responseId, Question.section_type == responseType).first()
+            if not target:
                  return jsonify({'error': f'Original {responseType} answer not found'}), 404
         else:
              return jsonify({'error': 'Invalid response type'}), 400
 
         # Find existing Score record or create new
-        score_rec = db.session.query(Score).filter(
-            target_id_column == responseId,
-            Score.response_type == responseType # Always filter by type too
-        ).first()
+        target_id_column = score_link_column(responseType)
+        score_rec = db.session.query(Score).filter(target_id_column == responseId).first()
 
         if score_rec:
             # Update existing score
@@ -2356,18 +3478,10 @@ def submit_admin_feedback(admin_id, responseType, responseId): # Removed admin_i
                 feedback=feedback_text if feedback_text else None,
                 scored_by=admin_id
             )
-            # Set the correct linking ID
-            if responseType in ['speaking', 'writing']:
-                new_score.response_id = responseId
-            else: # Reading or Listening
-                new_score.user_answer_id = responseId
-
+            setattr(new_score, target_id_column.key, responseId) # Set the correct linking ID
             db.session.add(new_score)
-            # If linking UserAnswer via association table:
-            if responseType in ['reading', 'listening']:
-                ua = db.session.query(UserAnswer).get(responseId)
-                if ua:
-                    ua.scores.append(new_score) # Append to establish secondary relationship
+
+        refresh_student_progress(target.user_id, target.section_id, responseType)
 
         db.session.commit()
         return jsonify({'message': 'Feedback submitted successfully'}), 200
@@ -2380,6 +3494,841 @@ def submit_admin_feedback(admin_id, responseType, responseId): # Removed admin_i
         return jsonify({'error': 'Failed to submit feedback'}), 500
 
 
+# Section cloning
+# A clone is copied table by table: one SELECT of the original's rows and one batched
+# INSERT through insert_in_order(), which hands the new ids back in row order. Old and
+# new ids are paired from that explicit map, never from id order, so concurrent inserts
+# cannot mispair a child with its parent. Media URLs are copied as-is: the clone shares
+# the original's files.
+
+def clone_rows(model, where, owned_by, remap):
+    """Copies the `model` rows matching `where`, replacing the columns in `remap`.
+
+    `remap` maps a column key to either a fixed value or an {old id: new id} dict.
+    `owned_by` must match only the copies (see insert_in_order). Returns {old id: new id}.
+    """
+    table = model.__table__
+    columns = [column for column in table.columns if not column.primary_key]
+    source = db.session.execute(db.select(table.c.id, *columns).where(where).order_by(table.c.id)).all()
+    rows = []
+    for row in source:
+        values = {column.key: row._mapping[column] for column in columns}
+        for key, replacement in remap.items():
+            values[key] = replacement.get(values[key]) if isinstance(replacement, dict) else replacement
+        rows.append(values)
+    new_ids = insert_in_order(model, rows, owned_by)
+    return dict(zip([row.id for row in source], new_ids))
+
+def clone_section_content(source, target):
+    """Copies every passage/audio/task, question, choice and correct answer of `source` onto `target`. Does NOT commit."""
+    if source.section_type in ['speaking', 'writing']:
+        TaskModel = SpeakingTask if source.section_type == 'speaking' else WritingTask
+        clone_rows(TaskModel, TaskModel.section_id == source.id, TaskModel.section_id == target.id, {'section_id': target.id})
+        return
+
+    parent_maps = {}
+    for ParentModel in [ReadingPassage, ListeningAudio]:
+        parent_maps[ParentModel] = clone_rows(ParentModel, ParentModel.section_id == source.id,
+                                              ParentModel.section_id == target.id, {'section_id': target.id})
+    question_map = clone_rows(
+        Question, Question.section_id == source.id, Question.section_id == target.id,
+        {'section_id': target.id, 'reading_passage_id': parent_maps[ReadingPassage],
+         'listening_audio_id': parent_maps[ListeningAudio]}
+    )
+    if not question_map:
+        return
+
+    choice_maps = {}
+    for ChildModel in [Option, TableQuestionRow, TableQuestionColumn, QuestionAudio]:
+        choice_maps[ChildModel] = clone_rows(
+            ChildModel, ChildModel.question_id.in_(question_map.keys()),
+            ChildModel.question_id.in_(question_map.values()), {'question_id': question_map}
+        )
+    clone_rows(
+        CorrectAnswer, CorrectAnswer.question_id.in_(question_map.keys()),
+        CorrectAnswer.question_id.in_(question_map.values()),
+        {'question_id': question_map, 'option_id': choice_maps[Option],
+         'table_row_id': choice_maps[TableQuestionRow], 'table_column_id': choice_maps[TableQuestionColumn]}
+    )
+
+@app.route('/sections/<int:section_id>/clone', methods=['POST'])
+@admin_required
+def clone_section(section_id):
+    source = db.session.get(Section, section_id)
+    if not source:
+        return jsonify({'error': 'Section not found'}), 404
+    data = request.get_json(silent=True) or {}
+
+    try:
+        target = Section(section_type=source.section_type, title=data.get('title') or f'{source.title} (copy)')
+        db.session.add(target)
+        db.session.flush()
+        clone_section_content(source, target)
+        # The clone's rows point at the original's blobs
+        refresh_media_ref_counts(section_media_urls(target.id))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error cloning section {section_id}: {e}")
+        return jsonify({'error': f'An internal error occurred: {str(e)}'}), 500
+
+    return jsonify({'id': target.id, 'section_type': target.section_type, 'title': target.title}), 201
+
+
+# Section bundles
+# A bundle is a tar or zip archive holding manifest.json -- sections in the same shape
+# the authoring endpoints accept -- plus the media files it references by archive path.
+# Export streams the archive one member at a time; import validates the whole manifest,
+# saves the media and writes every section in one transaction through the bulk path.
+
+BUNDLE_FORMAT = 'toefl-sections'
+BUNDLE_VERSION = 1
+BUNDLE_CHUNK_SIZE = 64 * 1024
+
+def bundle_media_entry(url, media):
+    """Registers the file behind an upload URL for export; returns its archive path or None."""
+    if not url:
+        return None
+    key = media_key(url)
+    if media_storage.size(key) is None:
+        print(f"Warning: media file {url} is missing, exporting without it")
+        return None
+    subfolder = posixpath.basename(posixpath.dirname(key))
+    bundle_path = f'media/{subfolder}/{posixpath.basename(key)}'
+    media[bundle_path] = url
+    return bundle_path
+
+def question_authoring_data(question, media):
+    """Inverse of build_question_spec(): the authoring payload that recreates `question`."""
+    data = {'type': question.type, 'prompt': question.prompt}
+    if question.section_type == 'reading':
+        data['paragraph_index'] = question.paragraph_index
+
+    if question.type == 'table':
+        row_index = {row.id: i for i, row in enumerate(question.table_rows)}
+        column_index = {column.id: i for i, column in enumerate(question.table_columns)}
+        data['rows'] = [row.row_label for row in question.table_rows]
+        data['columns'] = [column.column_label for column in question.table_columns]
+        data['correctTableSelections'] = [
+            {'rowIndex': row_index[ca.table_row_id], 'colIndex': column_index[ca.table_column_id]}
+            for ca in question.correct_answers
+            if ca.table_row_id in row_index and ca.table_column_id in column_index
+        ]
+        return data
+
+    option_index = {option.id: i for i, option in enumerate(question.options)}
+    correct = sorted(option_index[ca.option_id] for ca in question.correct_answers if ca.option_id in option_index)
+    if question.type == 'insert_text':
+        data['correctInsertionPoint'] = question.options[correct[0]].option_text if correct else None
+        return data
+    data['options'] = [option.option_text for option in question.options]
+    if question.type in ['multiple_to_single', 'audio']:
+        data['correctOptionIndex'] = correct[0] if correct else None
+    else:
+        data['correctAnswerIndices'] = correct
+    if question.type == 'audio':
+        snippet = question.question_audios[0] if question.question_audios else None
+        data['audio'] = bundle_media_entry(snippet.audio_url if snippet else None, media)
+    return data
+
+def build_bundle_manifest(section_ids=None):
+    """Returns (manifest, {archive path: storage key}) for the given sections, or all of them."""
+    query = Section.query.order_by(Section.id)
+    if section_ids:
+        query = query.filter(Section.id.in_(section_ids))
+    sections = query.all()
+    if section_ids and len(sections) != len(set(section_ids)):
+        missing = sorted(set(section_ids) - {section.id for section in sections})
+        raise ValueError(f'Sections not found: {missing}')
+
+    question_options = [selectinload(Question.options), selectinload(Question.table_rows),
+                        selectinload(Question.table_columns), selectinload(Question.question_audios),
+                        selectinload(Question.correct_answers)]
+    media, sections_data = {}, []
+    for section in sections:
+        section_data = {'type': section.section_type, 'title': section.title}
+        if section.section_type == 'reading':
+            passages = ReadingPassage.query.filter_by(section_id=section.id)\
+                .options(selectinload(ReadingPassage.questions).options(*question_options))\
+                .order_by(ReadingPassage.id).all()
+            section_data['passages'] = [{
+                'title': passage.title,
+                'content': passage.content,
+                'questions': [question_authoring_data(q, media) for q in passage.questions]
+            } for passage in passages]
+        elif section.section_type == 'listening':
+            audios = ListeningAudio.query.filter_by(section_id=section.id)\
+                .options(selectinload(ListeningAudio.questions).options(*question_options))\
+                .order_by(ListeningAudio.id).all()
+            section_data['audioItems'] = [{
+                'title': audio.title,
+                'audio': bundle_media_entry(audio.audio_url, media),
+                'photo': bundle_media_entry(audio.photo_url, media),
+                'questions': [question_authoring_data(q, media) for q in audio.questions]
+            } for audio in audios]
+        else:
+            TaskModel = SpeakingTask if section.section_type == 'speaking' else WritingTask
+            tasks = TaskModel.query.filter_by(section_id=section.id).order_by(TaskModel.task_number).all()
+            section_data['tasks'] = [{
+                'taskNumber': task.task_number,
+                'prompt': task.prompt,
+                'passage': task.passage,
+                'audio': bundle_media_entry(task.audio_url, media)
+            } for task in tasks]
+        sections_data.append(section_data)
+
+    # Digests let an import check each file it reads
+    digests = dict(db.session.query(MediaBlob.url, MediaBlob.digest).filter(MediaBlob.url.in_(media.values())).all())
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'version': BUNDLE_VERSION,
+        'sections': sections_data,
+        'media': {bundle_path: {'sha256': digests[url]} for bundle_path, url in media.items() if url in digests}
+    }
+    return manifest, {bundle_path: media_key(url) for bundle_path, url in media.items()}
+
+def iter_tar_member(name, size, chunks):
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(datetime.datetime.now().timestamp())
+    yield info.tobuf(format=tarfile.PAX_FORMAT)
+    for chunk in chunks:
+        yield chunk
+    remainder = size % tarfile.BLOCKSIZE
+    if remainder:
+        yield tarfile.NUL * (tarfile.BLOCKSIZE - remainder)
+
+def iter_file_chunks(key, size):
+    # Stops at the size announced in the tar header even if the file grew meanwhile
+    with closing(media_storage.open(key)) as f:
+        while size > 0:
+            chunk = f.read(min(BUNDLE_CHUNK_SIZE, size))
+            if not chunk:
+                raise IOError(f'{key} shrank while it was being exported')
+            size -= len(chunk)
+            yield chunk
+
+def iter_bundle_tar(manifest, media):
+    """Yields a tar archive of the manifest and media, holding at most one chunk of a file in memory."""
+    manifest_bytes = json.dumps(manifest, indent=2).encode('utf-8')
+    yield from iter_tar_member('manifest.json', len(manifest_bytes), [manifest_bytes])
+    for bundle_path, key in media.items():
+        size = media_storage.size(key)
+        if size is None:
+            raise IOError(f'{key} was removed while it was being exported')
+        yield from iter_tar_member(bundle_path, size, iter_file_chunks(key, size))
+    yield tarfile.NUL * (2 * tarfile.BLOCKSIZE) # End-of-archive marker
+
+@contextmanager
+def open_bundle(fileobj):
+    """Yields (member names, open_member) for a zip or tar bundle read from a seekable file object."""
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        with zipfile.ZipFile(fileobj) as archive:
+            names = {posixpath.normpath(info.filename): info for info in archive.infolist() if not info.is_dir()}
+            yield set(names), lambda name: archive.open(names[name])
+        return
+    fileobj.seek(0)
+    try:
+        archive = tarfile.open(fileobj=fileobj, mode='r:*')
+    except tarfile.TarError:
+        raise ValueError('Bundle is neither a zip nor a tar archive')
+    with archive:
+        names = {posixpath.normpath(member.name): member for member in archive.getmembers() if member.isfile()}
+        yield set(names), lambda name: archive.extractfile(names[name])
+
+def plan_bundle_section(position, section_data, members):
+    """Validates one manifest section into rows for write_bundle_sections(). Touches neither disk nor session.
+
+    Media references are left as archive paths and listed in plan['media'] as
+    (row, key, archive path, upload subfolder) so they can be saved once validation passes.
+    """
+    def fail(message):
+        raise ValueError(f'Section {position + 1}: {message}')
+
+    def media_ref(row, key, path, subfolder, required=False):
+        if not path:
+            if required:
+                fail(f'missing {key}')
+            return
+        if path not in members:
+            fail(f'{path} is not in the bundle')
+        plan['media'].append((row, key, path, subfolder))
+
+    def question_spec(question_data, section_type):
+        if not question_data.get('type') or not question_data.get('prompt'):
+            fail('question without type or prompt')
+        spec = build_question_spec(question_data, section_type)
+        if question_data['type'] == 'audio':
+            media_ref(spec, 'audio_url', question_data.get('audio'), 'question_audios')
+        return spec
+
+    section_type = section_data.get('type')
+    title = section_data.get('title')
+    if section_type not in ['reading', 'listening', 'speaking', 'writing']:
+        fail(f'unknown section type {section_type!r}')
+    if not title:
+        fail('missing title')
+    plan = {'section': {'section_type': section_type, 'title': title}, 'parents': [], 'tasks': [], 'media': []}
+
+    if section_type == 'reading':
+        passages_data = section_data.get('passages', [])
+        if not passages_data:
+            fail('no passages')
+        for passage_data in passages_data:
+            if not passage_data.get('title') or not passage_data.get('content'):
+                fail('missing title or content in passage')
+            row = {'title': passage_data['title'], 'content': passage_data['content']}
+            plan['parents'].append((row, [question_spec(q, 'reading') for q in passage_data.get('questions', [])]))
+
+    elif section_type == 'listening':
+        audios_data = section_data.get('audioItems', [])
+        if not audios_data:
+            fail('no audio items')
+        for audio_data in audios_data:
+            if not audio_data.get('title'):
+                fail('missing title for an audio item')
+            row = {'title': audio_data['title'], 'audio_url': None, 'photo_url': None}
+            media_ref(row, 'audio_url', audio_data.get('audio'), 'listening_audios', required=True)
+            media_ref(row, 'photo_url', audio_data.get('photo'), 'listening_photos')
+            plan['parents'].append((row, [question_spec(q, 'listening') for q in audio_data.get('questions', [])]))
+
+    else:
+        # Same task rules as create_speaking_section / create_writing_section
+        task_count, passage_tasks, audio_tasks = (4, {2, 3}, {2, 3, 4}) if section_type == 'speaking' else (2, {1, 2}, {1})
+        tasks_dict = {}
+        for task_data in section_data.get('tasks', []):
+            task_num = task_data.get('taskNumber')
+            if not isinstance(task_num, int) or not (1 <= task_num <= task_count) or task_num in tasks_dict:
+                fail(f'invalid or duplicate taskNumber {task_num!r}')
+            if not (task_data.get('prompt') or '').strip():
+                fail(f'missing or empty prompt for task {task_num}')
+            if task_num in passage_tasks and not (task_data.get('passage') or '').strip():
+                fail(f'missing or empty passage for task {task_num}')
+            tasks_dict[task_num] = task_data
+        if set(tasks_dict) != set(range(1, task_count + 1)):
+            fail(f'expected tasks 1-{task_count}')
+        for task_num in sorted(tasks_dict):
+            task_data = tasks_dict[task_num]
+            row = {'task_number': task_num, 'prompt': task_data['prompt'], 'passage': task_data.get('passage'), 'audio_url': None}
+            media_ref(row, 'audio_url', task_data.get('audio'), f'{section_type}_audios', required=task_num in audio_tasks)
+            plan['tasks'].append(row)
+
+    return plan
+
+def write_bundle_sections(plans):
+    """Writes validated section plans with one batched INSERT per table. Does NOT commit; returns the Sections."""
+    sections = [Section(**plan['section']) for plan in plans]
+    db.session.add_all(sections)
+    db.session.flush()
+    section_ids = [section.id for section in sections]
+
+    specs = []
+    for ParentModel, parent_key, section_type in [(ReadingPassage, 'reading_passage_id', 'reading'),
+                                                  (ListeningAudio, 'listening_audio_id', 'listening')]:
+        parents = [(section.id, row, parent_specs) for section, plan in zip(sections, plans)
+                   if section.section_type == section_type for row, parent_specs in plan['parents']]
+        parent_ids = insert_in_order(
+            ParentModel,
+            [{**row, 'section_id': section_id} for section_id, row, _ in parents],
+            ParentModel.section_id.in_(section_ids)
+        )
+        for parent_id, (section_id, _, parent_specs) in zip(parent_ids, parents):
+            for spec in parent_specs:
+                spec['question'].update({'section_id': section_id, parent_key: parent_id})
+                specs.append(spec)
+    insert_question_specs(specs)
+
+    for TaskModel, section_type in [(SpeakingTask, 'speaking'), (WritingTask, 'writing')]:
+        task_rows = [{**row, 'section_id': section.id} for section, plan in zip(sections, plans)
+                     if section.section_type == section_type for row in plan['tasks']]
+        if task_rows:
+            db.session.execute(db.insert(TaskModel), task_rows, execution_options={'render_nulls': True})
+    return sections
+
+def import_section_bundle(fileobj):
+    """Imports every section of a bundle in one transaction; returns the created Sections.
+
+    Raises ValueError for an invalid bundle before anything is written. On any
+    failure the transaction is rolled back and the media saved so far is deleted.
+    """
+    with open_bundle(fileobj) as (members, open_member):
+        if 'manifest.json' not in members:
+            raise ValueError('Bundle has no manifest.json')
+        try:
+            with open_member('manifest.json') as f:
+                manifest = json.load(f)
+        except ValueError:
+            raise ValueError('manifest.json is not valid JSON')
+        if not isinstance(manifest, dict) or manifest.get('format') != BUNDLE_FORMAT:
+            raise ValueError(f'manifest.json is not a {BUNDLE_FORMAT} manifest')
+        if manifest.get('version') != BUNDLE_VERSION:
+            raise ValueError(f'Unsupported bundle version {manifest.get("version")!r}')
+        sections_data = manifest.get('sections') or []
+        if not sections_data:
+            raise ValueError('Bundle contains no sections')
+        plans = [plan_bundle_section(i, section_data, members) for i, section_data in enumerate(sections_data)]
+
+        media_digests = manifest.get('media') if isinstance(manifest.get('media'), dict) else {}
+        saved = {}
+        try:
+            # Every member is read and hashed once, so a manifest can't point questions at
+            # someone else's stored media; content the store already has is not stored again
+            for plan in plans:
+                for row, key, path, subfolder in plan['media']:
+                    if (path, subfolder) not in saved:
+                        with open_member(path) as source:
+                            temp_path, digest, size = spool_stream(source)
+                        expected = (media_digests.get(path) or {}).get('sha256')
+                        if expected and expected != digest:
+                            os.remove(temp_path)
+                            raise ValueError(f'{path} does not match its sha256 in manifest.json')
+                        saved[(path, subfolder)] = store_blob(temp_path, digest, size, posixpath.basename(path), subfolder)
+                    row[key] = saved[(path, subfolder)]
+
+            sections = write_bundle_sections(plans)
+            refresh_media_ref_counts(saved.values())
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Blobs other rows use survive; files written for this import do not
+            purge_unreferenced_media(saved.values())
+            raise
+
+    for section in sections:
+        invalidate_section(section.section_type, section.id)
+    return sections
+
+@app.route('/admin/sections/export', methods=['GET'])
+@admin_required
+def export_sections():
+    # ?ids=1,2,3 -- every section when omitted
+    try:
+        section_ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip()]
+        manifest, media = build_bundle_manifest(section_ids)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    filename = f'sections-{datetime.datetime.utcnow():%Y%m%d-%H%M%S}.tar'
+    return Response(
+        iter_bundle_tar(manifest, media),
+        mimetype='application/x-tar',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@app.route('/admin/sections/import', methods=['POST'])
+@upload_policy('BUNDLE_IMPORT_MAX_BYTES', 'BUNDLE_IMPORT_MAX_BYTES')
+@admin_required
+def import_sections():
+    bundle = request.files.get('bundle')
+    if not bundle:
+        return jsonify({'error': 'Missing bundle file (expected key: bundle)'}), 400
+
+    try:
+        sections = import_section_bundle(bundle.stream)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error importing section bundle: {e}")
+        return jsonify({'error': f'An internal error occurred: {str(e)}'}), 500
+
+    return jsonify({
+        'sections': [{'id': s.id, 'type': s.section_type, 'title': s.title} for s in sections]
+    }), 201
+
+
+# CLI commands
+
+@app.cli.command('rescore-section')
+@click.argument('section_id', type=int)
+def rescore_section_command(section_id):
+    """Re-score every stored attempt of a reading/listening section."""
+    section = db.session.query(Section).filter_by(id=section_id).first()
+    if not section or section.section_type not in ['reading', 'listening']:
+        raise click.ClickException(f'No reading/listening section with id {section_id}')
+    rescored = rescore_section_attempts(section)
+    db.session.commit()
+    click.echo(f'Re-scored {rescored} attempts for section {section_id}')
+
+
+@app.cli.command('rebuild-progress')
+def rebuild_progress_command():
+    """Recompute the student_section_progress table from responses and scores."""
+    rebuilt = rebuild_student_progress()
+    db.session.commit()
+    click.echo(f'Rebuilt progress for {rebuilt} student/section pairs')
+
+
+@app.cli.command('ensure-indexes')
+def ensure_indexes_command():
+    """Create any index declared in models.py that an existing database is missing."""
+    # db.create_all() only builds indexes together with new tables
+    created, failed = 0, 0
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in sa_inspect(db.engine).get_indexes(table.name)}
+        # Earlier migrate-cascades runs left indexes named after their temporary copy of the table
+        for name in sorted(name for name in existing if f'{table.name}_rebuild_' in name):
+            with db.engine.begin() as conn:
+                conn.execute(db.text(f'DROP INDEX {name}'))
+            click.echo(f'Dropped {name}')
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name in existing:
+                continue
+            try:
+                index.create(bind=db.engine)
+                created += 1
+                click.echo(f'Created {index.name}')
+            except Exception as e:
+                # Typically a unique index over rows that are already duplicated
+                failed += 1
+                click.echo(f'Could not create {index.name}: {e}', err=True)
+    click.echo(f'Created {created} indexes, {failed} failed')
+
+
+@app.cli.command('migrate-section-versions')
+def migrate_section_versions_command():
+    """Add sections.content_version to an existing database and give every section one."""
+    columns = {column['name'] for column in sa_inspect(db.engine).get_columns('sections')}
+    if 'content_version' not in columns:
+        db.session.execute(db.text('ALTER TABLE sections ADD COLUMN content_version VARCHAR(32)'))
+        click.echo('Added sections.content_version')
+    missing = db.session.execute(db.select(Section.id).where(Section.content_version.is_(None))).scalars().all()
+    if missing:
+        db.session.execute(
+            db.update(Section),
+            [{'id': section_id, 'content_version': new_content_version()} for section_id in missing]
+        )
+    db.session.commit()
+    click.echo(f'Versioned {len(missing)} sections')
+
+
+@app.cli.command('backfill-question-sections')
+def backfill_question_sections_command():
+    """Add questions.section_id to an existing database and fill it from passages/audios."""
+    columns = {column['name'] for column in sa_inspect(db.engine).get_columns('questions')}
+    if 'section_id' not in columns:
+        db.session.execute(db.text('ALTER TABLE questions ADD COLUMN section_id INTEGER REFERENCES sections (id)'))
+        click.echo('Added questions.section_id')
+
+    filled = 0
+    for IntermediateModel, intermediate_fk_on_question in [(ReadingPassage, Question.reading_passage_id),
+                                                           (ListeningAudio, Question.listening_audio_id)]:
+        section_id = db.select(IntermediateModel.section_id)\
+            .where(IntermediateModel.id == intermediate_fk_on_question)\
+            .scalar_subquery()
+        result = db.session.execute(
+            db.update(Question)
+            .where(intermediate_fk_on_question.isnot(None))
+            .where(Question.section_id.is_(None) | (Question.section_id != section_id))
+            .values(section_id=section_id)
+            .execution_options(synchronize_session=False)
+        )
+        filled += result.rowcount
+    db.session.commit()
+
+    for index in Question.__table__.indexes:
+        if 'section_id' in index.columns:
+            index.create(bind=db.engine, checkfirst=True)
+    click.echo(f'Backfilled section_id on {filled} questions')
+
+
+def unlinked_score_filter():
+    return db.and_(Score.speaking_response_id.is_(None), Score.writing_response_id.is_(None), Score.user_answer_id.is_(None))
+
+@app.cli.command('migrate-score-links')
+def migrate_score_links_command():
+    """Move scores from response_id/response_type and user_answer_score_assoc to typed foreign keys."""
+    inspector = sa_inspect(db.engine)
+    # scores_legacy only survives a run that failed halfway (SQLite does not roll back DDL)
+    resuming = inspector.has_table('scores_legacy')
+    if not resuming and 'response_id' not in {column['name'] for column in inspector.get_columns('scores')}:
+        # Rows written without a link while the check constraint was missing can't be reached or cascaded to
+        dropped = db.session.execute(db.delete(Score).where(unlinked_score_filter())).rowcount
+        db.session.commit()
+        click.echo('scores already uses typed links' + (f'; dropped {dropped} scores with no link' if dropped else ''))
+        return
+
+    with db.engine.begin() as conn:
+        # Reflect the old table so dates and numerics come back as Python types
+        legacy_table = db.Table('scores_legacy' if resuming else 'scores', db.MetaData(), autoload_with=conn)
+        legacy = conn.execute(db.select(legacy_table).order_by(legacy_table.c.id)).mappings().all()
+        assoc = {}
+        if inspector.has_table('user_answer_score_assoc'):
+            assoc = dict(conn.execute(db.text('SELECT score_id, user_answer_id FROM user_answer_score_assoc')).all())
+        existing = {
+            'speaking': set(conn.execute(db.select(SpeakingResponse.id)).scalars()),
+            'writing': set(conn.execute(db.select(WritingResponse.id)).scalars()),
+            'answer': set(conn.execute(db.select(UserAnswer.id)).scalars()),
+        }
+
+        # Later rows win, so each response keeps its most recent score
+        migrated = {}
+        for row in legacy:
+            values = {
+                'speaking_response_id': None, 'writing_response_id': None, 'user_answer_id': None,
+                **{key: row[key] for key in ('id', 'response_type', 'score', 'feedback', 'scored_by', 'created_at', 'updated_at')}
+            }
+            if row['response_type'] in ['speaking', 'writing']:
+                link_id = row['response_id'] if row['response_id'] in existing[row['response_type']] else None
+            elif row['response_type'] in ['reading', 'listening']:
+                link_id = row['user_answer_id'] or assoc.get(row['id'])
+                link_id = link_id if link_id in existing['answer'] else None
+            else:
+                link_id = None
+            if link_id is None:
+                continue # Orphaned or untyped score
+            link = score_link_column(row['response_type']).key
+            values[link] = link_id
+            migrated[(link, link_id)] = values
+        rows = list(migrated.values())
+
+        if resuming:
+            conn.execute(db.delete(Score))
+        else:
+            # Keep the old table around until the new one is filled
+            for index in inspector.get_indexes('scores'):
+                conn.execute(db.text(f'DROP INDEX {index["name"]}'))
+            conn.execute(db.text('ALTER TABLE scores RENAME TO scores_legacy'))
+            Score.__table__.create(conn)
+        if rows:
+            conn.execute(db.insert(Score), rows)
+        if conn.dialect.name == 'postgresql':
+            conn.execute(db.text("SELECT setval(pg_get_serial_sequence('scores', 'id'), COALESCE(MAX(id), 1)) FROM scores"))
+        if inspector.has_table('user_answer_score_assoc'):
+            conn.execute(db.text('DROP TABLE user_answer_score_assoc'))
+        conn.execute(db.text('DROP TABLE scores_legacy'))
+
+    click.echo(f'Migrated {len(rows)} scores, dropped {len(legacy) - len(rows)} orphaned or duplicate rows')
+
+
+@app.cli.command('migrate-cascades')
+def migrate_cascades_command():
+    """Recreate foreign keys of an existing database with the ON DELETE rules declared in models.py."""
+    inspector = sa_inspect(db.engine)
+    stale = [] # (table, [(declared constraint, reflected foreign key or None)])
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        missing = {column.name for column in table.columns} - {column['name'] for column in inspector.get_columns(table.name)}
+        if missing:
+            raise click.ClickException(f'{table.name} lacks {sorted(missing)}; run backfill-question-sections / migrate-score-links first')
+        reflected = {(tuple(fk['constrained_columns']), fk['referred_table']): fk for fk in inspector.get_foreign_keys(table.name)}
+        changes = []
+        for constraint in table.foreign_key_constraints:
+            fk = reflected.get((tuple(constraint.column_keys), constraint.referred_table.name))
+            current = ((fk or {}).get('options') or {}).get('ondelete')
+            if fk is None or (current or '').upper() != (constraint.ondelete or '').upper():
+                changes.append((constraint, fk))
+        if changes:
+            stale.append((table, changes))
+
+    # Cascades follow questions.section_id and the typed score links, so rows the data
+    # migrations have not reached yet would outlive their section or response
+    unfinished = []
+    if inspector.has_table('scores_legacy'):
+        unfinished.append('migrate-score-links stopped halfway (scores_legacy exists)')
+    with db.engine.connect() as conn:
+        if inspector.has_table('questions'):
+            unsectioned = conn.scalar(db.select(db.func.count(Question.id)).where(Question.section_id.is_(None)))
+            if unsectioned:
+                unfinished.append(f'{unsectioned} questions have no section_id; run backfill-question-sections')
+        if inspector.has_table('scores'):
+            unlinked = conn.scalar(db.select(db.func.count(Score.id)).where(unlinked_score_filter()))
+            if unlinked:
+                unfinished.append(f'{unlinked} scores have no typed response link; run migrate-score-links')
+    if unfinished:
+        raise click.ClickException('; '.join(unfinished))
+
+    if not stale:
+        click.echo('Foreign keys already match models.py')
+        return
+
+    if db.engine.dialect.name == 'postgresql':
+        with db.engine.begin() as conn:
+            for table, changes in stale:
+                for constraint, fk in changes:
+                    if fk and fk.get('name'):
+                        conn.execute(db.text(f'ALTER TABLE {table.name} DROP CONSTRAINT {fk["name"]}'))
+                    conn.execute(AddConstraint(constraint))
+    elif db.engine.dialect.name == 'sqlite':
+        # SQLite cannot alter a foreign key, so each table is rebuilt: create a copy with the
+        # declared schema, move the rows over, drop the original and rename the copy into place.
+        # The copy is created without indexes (they would be named after the copy) and the
+        # declared ones are built once the rows are in and the table has its real name.
+        rebuild_metadata = db.MetaData()
+        for table in db.metadata.sorted_tables:
+            table.to_metadata(rebuild_metadata)
+        with db.engine.connect() as conn:
+            # Must be switched off outside a transaction, and back on before the connection returns to the pool
+            conn.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            try:
+                # pysqlite would otherwise run the DDL in autocommit mode
+                conn.exec_driver_sql('BEGIN')
+                for table, _ in stale:
+                    for index in inspector.get_indexes(table.name):
+                        conn.execute(db.text(f'DROP INDEX {index["name"]}'))
+                    rebuilt = rebuild_metadata.tables[table.name].to_metadata(rebuild_metadata, name=f'{table.name}_rebuild')
+                    conn.execute(CreateTable(rebuilt))
+                    columns = [column.name for column in table.columns]
+                    conn.execute(rebuilt.insert().from_select(columns, db.select(*[table.c[name] for name in columns])))
+                    conn.execute(db.text(f'DROP TABLE {table.name}'))
+                    conn.execute(db.text(f'ALTER TABLE {rebuilt.name} RENAME TO {table.name}'))
+                    for index in table.indexes:
+                        index.create(conn)
+                violations = conn.exec_driver_sql('PRAGMA foreign_key_check').all()
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.exec_driver_sql('PRAGMA foreign_keys=ON')
+        if violations:
+            click.echo(f'Warning: {len(violations)} rows reference rows that no longer exist '
+                       f'(first: {violations[0][0]} rowid {violations[0][1]} -> {violations[0][2]})', err=True)
+    else:
+        raise click.ClickException(f'migrate-cascades does not support {db.engine.dialect.name}')
+
+    for table, changes in stale:
+        click.echo(f'Updated {len(changes)} foreign keys on {table.name}')
+
+
+@app.cli.command('migrate-media-blobs')
+def migrate_media_blobs_command():
+    """Move files uploaded before content addressing into the blob store, merging duplicates.
+
+    Works on local storage; run it before switching to another backend with copy-media.
+    """
+    if not isinstance(media_storage, LocalStorage):
+        raise click.ClickException('migrate-media-blobs needs STORAGE_BACKEND=local')
+    urls = set()
+    for column, _, _ in media_url_columns():
+        urls.update(db.session.execute(db.select(column).where(column.isnot(None)).distinct()).scalars())
+    known = set(db.session.execute(db.select(MediaBlob.url)).scalars())
+
+    canonical = {} # legacy URL -> blob URL
+    for url in sorted(urls - known):
+        local_path = media_storage.path(media_key(url))
+        if not local_path or not os.path.isfile(local_path):
+            click.echo(f'Skipping {url}: file is missing', err=True)
+            continue
+        sha256 = hashlib.sha256()
+        with open(local_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        blob_url = existing_blob_url(digest)
+        if not blob_url:
+            folder, filename = os.path.split(local_path)
+            blob_name = f'{digest}{os.path.splitext(filename)[1].lower()}'
+            blob_path = os.path.join(folder, blob_name)
+            blob_url = f'{posixpath.dirname(url)}/{blob_name}'
+            if not os.path.exists(blob_path):
+                # Link first and drop the old name only once the rows point at the new one
+                try:
+                    os.link(local_path, blob_path)
+                except OSError:
+                    shutil.copyfile(local_path, blob_path)
+            db.session.add(MediaBlob(digest=digest, url=blob_url, size=os.path.getsize(blob_path), ref_count=0))
+            db.session.flush()
+        canonical[url] = blob_url
+
+    for url, blob_url in canonical.items():
+        if url == blob_url:
+            continue
+        for column, _, _ in media_url_columns():
+            db.session.execute(
+                db.update(column.class_).where(column == url).values({column.key: blob_url})
+                .execution_options(synchronize_session=False)
+            )
+    refresh_media_ref_counts(set(canonical.values()))
+    db.session.commit()
+
+    for url, blob_url in canonical.items():
+        if url != blob_url:
+            media_storage.delete(media_key(url))
+    click.echo(f'Moved {len(canonical)} files into {len(set(canonical.values()))} blobs')
+
+
+@app.cli.command('purge-media')
+@click.option('--dry-run', is_flag=True, help='Only list the files that would be removed.')
+def purge_media_command(dry_run):
+    """Remove uploaded files that no row references, e.g. left behind by a purge that never ran.
+
+    Also drops resumable uploads untouched for CHUNKED_UPLOAD_EXPIRY_HOURS.
+    """
+    if not dry_run:
+        click.echo(f'Expired {expire_chunked_uploads()} stale resumable uploads')
+    urls = set()
+    for subfolder in folders:
+        urls.update(f'/{key}' for key in media_storage.list_keys(f"{app.config['UPLOAD_FOLDER']}/{subfolder}/")
+                    if not posixpath.basename(key).startswith('.'))
+    unreferenced = urls - referenced_media_urls(urls)
+    if dry_run:
+        for url in sorted(unreferenced):
+            click.echo(url)
+        click.echo(f'{len(unreferenced)} of {len(urls)} files are unreferenced')
+        return
+    removed = purge_unreferenced_media(unreferenced)
+    click.echo(f'Removed {removed} of {len(urls)} files')
+
+
+@app.cli.command('copy-media')
+@click.argument('source_root', type=click.Path(exists=True, file_okay=False))
+def copy_media_command(source_root):
+    """Copy every referenced media file from a local directory into the configured storage.
+
+    For moving to STORAGE_BACKEND=s3 (or a new STORAGE_ROOT): point SOURCE_ROOT at the old
+    root. Files storage already has are skipped, so it can be re-run.
+    """
+    urls = set(db.session.execute(db.select(MediaBlob.url)).scalars())
+    for column, _, _ in media_url_columns():
+        urls.update(db.session.execute(db.select(column).where(column.isnot(None)).distinct()).scalars())
+    source = LocalStorage(source_root)
+    copied = missing = 0
+    for url in sorted(urls):
+        key = media_key(url)
+        if media_storage.size(key) is not None:
+            continue
+        if source.size(key) is None:
+            click.echo(f'Skipping {url}: not in {source_root}', err=True)
+            missing += 1
+            continue
+        temp_path = spool_path()
+        shutil.copyfile(source.path(key), temp_path)
+        media_storage.put_file(temp_path, key, guess_media_type(source.path(key)))
+        copied += 1
+    click.echo(f'Copied {copied} of {len(urls)} files ({missing} missing)')
+
+
+@app.cli.command('export-sections')
+@click.argument('output', type=click.Path(dir_okay=False, writable=True))
+@click.argument('section_ids', nargs=-1, type=int)
+def export_sections_command(output, section_ids):
+    """Write SECTION_IDS (default: every section) and their media to a tar bundle."""
+    try:
+        manifest, media = build_bundle_manifest(list(section_ids))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    with open(output, 'wb') as f:
+        for chunk in iter_bundle_tar(manifest, media):
+            f.write(chunk)
+    click.echo(f'Exported {len(manifest["sections"])} sections and {len(media)} media files to {output}')
+
+
+@app.cli.command('import-sections')
+@click.argument('bundle', type=click.Path(exists=True, dir_okay=False))
+def import_sections_command(bundle):
+    """Create every section in a zip or tar bundle, in one transaction."""
+    with open(bundle, 'rb') as f:
+        try:
+            sections = import_section_bundle(f)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    for section in sections:
+        click.echo(f'Created {section.section_type} section {section.id}: {section.title}')
+    click.echo(f'Imported {len(sections)} sections')
+
+
 # Create database tables
 with app.app_context():
     db.create_all()
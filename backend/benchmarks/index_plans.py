@@ -0,0 +1,239 @@
+"""Query plans and timings for the hot endpoints, with and without the secondary indexes.
+
+Seeds a throwaway SQLite database with a few hundred sections of each kind and
+a few hundred students' answers, responses and scores. Each endpoint is then
+called through the test client twice: once after dropping every index declared
+in models.py, once after recreating them. For each run it reports the SQL
+statements issued, the tables SQLite had to scan in full (from EXPLAIN QUERY
+PLAN) and the median wall time. Pass --plans to print every plan.
+
+    cd backend && python benchmarks/index_plans.py [--plans]
+"""
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+WORKDIR = tempfile.mkdtemp(prefix='toefl-bench-')
+os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(WORKDIR, "bench.db")}'
+os.environ['UPLOAD_FOLDER'] = os.path.join(WORKDIR, 'uploads')
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from app import app, generate_token, invalidate_section, rebuild_student_progress
+from models import db, User, Section, ReadingPassage, Question, Option, CorrectAnswer, UserAnswer, \
+                   SpeakingTask, WritingTask, SpeakingResponse, WritingResponse, Score
+
+STUDENTS = 500
+SECTIONS_PER_TYPE = 200
+PASSAGES_PER_SECTION = 3
+QUESTIONS_PER_PASSAGE = 10
+SECTIONS_PER_STUDENT = 10 # sections of each type every student has submitted
+RUNS = 5
+
+
+def seed():
+    """Bulk-inserts the dataset with explicit ids; returns the ids the endpoints are called with."""
+    rng = random.Random(42)
+    insert = lambda model, rows: db.session.execute(db.insert(model), rows)
+
+    admin = User(username='admin', email='admin@example.com', role='admin', password_hash='-')
+    db.session.add(admin)
+    db.session.flush()
+    student_ids = list(range(admin.id + 1, admin.id + 1 + STUDENTS))
+    insert(User, [{'id': uid, 'username': f'student{uid}', 'email': f'student{uid}@example.com',
+                   'role': 'student', 'password_hash': '-'} for uid in student_ids])
+
+    reading_ids = list(range(1, SECTIONS_PER_TYPE + 1))
+    speaking_ids = list(range(SECTIONS_PER_TYPE + 1, 2 * SECTIONS_PER_TYPE + 1))
+    writing_ids = list(range(2 * SECTIONS_PER_TYPE + 1, 3 * SECTIONS_PER_TYPE + 1))
+    insert(Section, [{'id': sid, 'section_type': kind, 'title': f'{kind} {sid}'}
+                     for kind, ids in (('reading', reading_ids), ('speaking', speaking_ids), ('writing', writing_ids))
+                     for sid in ids])
+
+    # Reading content: every question has four options, the second one correct
+    passages, questions, options, correct = [], [], [], []
+    section_questions = {sid: [] for sid in reading_ids} # section -> [(question id, option ids)]
+    for sid in reading_ids:
+        for _ in range(PASSAGES_PER_SECTION):
+            passage_id = len(passages) + 1
+            passages.append({'id': passage_id, 'section_id': sid, 'title': 'Passage', 'content': '...'})
+            for _ in range(QUESTIONS_PER_PASSAGE):
+                question_id = len(questions) + 1
+                questions.append({'id': question_id, 'section_type': 'reading', 'section_id': sid,
+                                  'type': 'multiple_to_single', 'prompt': 'Q', 'reading_passage_id': passage_id})
+                option_ids = list(range(len(options) + 1, len(options) + 5))
+                options.extend({'id': oid, 'question_id': question_id, 'option_text': 'O'} for oid in option_ids)
+                correct.append({'question_id': question_id, 'option_id': option_ids[1]})
+                section_questions[sid].append((question_id, option_ids))
+    insert(ReadingPassage, passages)
+    insert(Question, questions)
+    insert(Option, options)
+    insert(CorrectAnswer, correct)
+
+    speaking_tasks = [{'id': i + 1, 'section_id': sid, 'task_number': n, 'prompt': 'P'}
+                      for i, (sid, n) in enumerate((sid, n) for sid in speaking_ids for n in range(1, 5))]
+    writing_tasks = [{'id': i + 1, 'section_id': sid, 'task_number': n, 'prompt': 'P', 'passage': '...'}
+                     for i, (sid, n) in enumerate((sid, n) for sid in writing_ids for n in range(1, 3))]
+    insert(SpeakingTask, speaking_tasks)
+    insert(WritingTask, writing_tasks)
+    tasks_by_section = {}
+    for task in speaking_tasks + writing_tasks:
+        tasks_by_section.setdefault(task['section_id'], []).append(task['id'])
+
+    # Submissions: every student answers a random sample of sections of each type
+    answers, speaking, writing, scores = [], [], [], []
+    for uid in student_ids:
+        for sid in rng.sample(reading_ids, SECTIONS_PER_STUDENT):
+            answers.extend({'id': len(answers) + 1, 'user_id': uid, 'question_id': qid,
+                            'option_id': rng.choice(option_ids)} for qid, option_ids in section_questions[sid])
+        for sid in rng.sample(speaking_ids, SECTIONS_PER_STUDENT):
+            speaking.extend({'id': len(speaking) + 1, 'user_id': uid, 'task_id': tid,
+                             'audio_url': f'/uploads/speaking_responses/{uid}-{tid}'} for tid in tasks_by_section[sid])
+        for sid in rng.sample(writing_ids, SECTIONS_PER_STUDENT):
+            writing.extend({'id': len(writing) + 1, 'user_id': uid, 'task_id': tid,
+                            'response_text': 'essay', 'word_count': 1} for tid in tasks_by_section[sid])
+    insert(UserAnswer, answers)
+    insert(SpeakingResponse, speaking)
+    insert(WritingResponse, writing)
+    for kind, rows in (('speaking', speaking), ('writing', writing)):
+        scores.extend({'response_type': kind, f'{kind}_response_id': row['id'], 'score': 3, 'feedback': 'ok',
+                       'scored_by': admin.id} for row in rows[::2])
+    scores.extend({'response_type': 'reading', 'user_answer_id': row['id'], 'score': 1, 'feedback': 'ok',
+                   'scored_by': admin.id} for row in answers[::50])
+    insert(Score, scores)
+    rebuild_student_progress()
+    db.session.commit()
+
+    # Call every endpoint for the first student and the sections they submitted
+    student_id = student_ids[0]
+    first = lambda model: db.session.query(model).filter(model.user_id == student_id).order_by(model.id).first()
+    speaking_response = first(SpeakingResponse)
+    writing_response = first(WritingResponse)
+    reading_answer = first(UserAnswer)
+    return {
+        'admin': admin,
+        'student': db.session.get(User, student_id),
+        'reading': reading_answer.question.reading_passage.section_id,
+        'speaking': speaking_response.task.section_id,
+        'writing': writing_response.task.section_id,
+        'speaking_response': speaking_response.id,
+    }
+
+
+def endpoints(ids, client):
+    """(label, callable) pairs; each callable issues one request and returns the status code."""
+    admin = {'Authorization': f'Bearer {generate_token(ids["admin"])}'}
+    student = {'Authorization': f'Bearer {generate_token(ids["student"])}'}
+    reading, speaking, writing, student_id = ids['reading'], ids['speaking'], ids['writing'], ids['student'].id
+
+    section = client.get(f'/reading/{reading}').get_json()
+    submission = {'answers': {str(p['id']): {str(q['id']): ['b'] for q in p['questions']} for p in section['passages']}}
+
+    def get_reading():
+        # Bypass the snapshot cache so the loader actually runs
+        invalidate_section('reading', reading)
+        return client.get(f'/reading/{reading}').status_code
+
+    def submit_reading():
+        invalidate_section('reading', reading)
+        return client.post(f'/reading/{reading}/submit', json=submission, headers=student).status_code
+
+    return [
+        ('GET /readings', lambda: client.get('/readings').status_code),
+        ('GET /reading/<id>', get_reading),
+        ('POST /reading/<id>/submit', submit_reading),
+        ('GET /review/reading/<id>', lambda: client.get(f'/review/reading/{reading}', headers=student).status_code),
+        ('GET /review/speaking/<id>', lambda: client.get(f'/review/speaking/{speaking}', headers=student).status_code),
+        ('GET /review/summaries', lambda: client.get('/review/summaries', headers=student).status_code),
+        ('GET /speaking/<id>/review/<student>',
+         lambda: client.get(f'/speaking/{speaking}/review/{student_id}', headers=admin).status_code),
+        ('GET /writing/<id>/review/<student>',
+         lambda: client.get(f'/writing/{writing}/review/{student_id}', headers=admin).status_code),
+        ('GET /admin/review/reading/<id>', lambda: client.get(f'/admin/review/reading/{reading}', headers=admin).status_code),
+        ('GET /admin/feedback/speaking/<id>',
+         lambda: client.get(f'/admin/feedback/speaking/{ids["speaking_response"]}', headers=admin).status_code),
+    ]
+
+
+def profile(call):
+    """Returns (status, statements, {table: full scans}, plans, median seconds)."""
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    status = call()
+    event.remove(db.engine, 'before_cursor_execute', capture)
+
+    scans, plans = {}, []
+    with db.engine.connect() as conn:
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith('SELECT'):
+                continue
+            plan = [row[3] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+            plans.append((statement, plan))
+            subqueries = {step.split()[1] for step in plan if step.startswith(('CO-ROUTINE ', 'MATERIALIZE '))}
+            for step in plan:
+                # "SCAN <table>" without "USING ... INDEX" reads every row of the table
+                table = step.split()[1] if step.startswith('SCAN ') and 'INDEX' not in step else None
+                if table and table not in subqueries:
+                    scans[table] = scans.get(table, 0) + 1
+
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+    return status, len(statements), scans, plans, statistics.median(timings)
+
+
+def declared_indexes():
+    return [index for table in db.metadata.sorted_tables for index in table.indexes]
+
+
+def main():
+    show_plans = '--plans' in sys.argv
+    results = {}
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        ids = seed()
+        client = app.test_client()
+        calls = endpoints(ids, client)
+
+        for index in declared_indexes():
+            index.drop(bind=db.engine)
+        db.session.execute(db.text('ANALYZE'))
+        results['before'] = [(label, profile(call)) for label, call in calls]
+
+        for index in declared_indexes():
+            index.create(bind=db.engine)
+        db.session.execute(db.text('ANALYZE'))
+        results['after'] = [(label, profile(call)) for label, call in calls]
+
+    print(f'{len(declared_indexes())} declared indexes, {STUDENTS} students, {SECTIONS_PER_TYPE} sections per type\n')
+    print(f'{"endpoint":<36} | {"stmts":>5} | {"no indexes: ms":>14} {"full scans":<40} | {"indexes: ms":>11} {"full scans":<20}')
+    for (label, before), (_, after) in zip(results['before'], results['after']):
+        fmt = lambda scans: ', '.join(f'{table}x{n}' if n > 1 else table for table, n in sorted(scans.items())) or '-'
+        print(f'{label:<36} | {after[1]:>5} | {before[4] * 1000:>14.1f} {fmt(before[2]):<40} | '
+              f'{after[4] * 1000:>11.1f} {fmt(after[2]):<20}')
+
+    if show_plans:
+        for phase in ('before', 'after'):
+            print(f'\n=== {phase} ===')
+            for label, (_, _, _, plans, _) in results[phase]:
+                print(f'\n## {label}')
+                for statement, plan in plans:
+                    print(' '.join(statement.split())[:160])
+                    for step in plan:
+                        print(f'    {step}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark for the reading/listening review loaders.
+
+Seeds a throwaway SQLite database with reading sections of growing size, then
+compares the old chained-joinedload query with answer_review_loader_options():
+SQL statements issued, rows the database returns, and wall time. Rows and time
+for the current loader should grow linearly with the number of answers.
+
+    cd backend && python benchmarks/review_loaders.py
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+WORKDIR = tempfile.mkdtemp(prefix='toefl-bench-')
+os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(WORKDIR, "bench.db")}'
+os.environ['UPLOAD_FOLDER'] = os.path.join(WORKDIR, 'uploads')
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload
+
+from app import app, answer_review_loader_options
+from models import db, User, Section, ReadingPassage, Question, Option, CorrectAnswer, UserAnswer, Score
+
+SECTION_SIZES = [5, 20, 80, 320] # prose_summary questions per section, 3 answers each
+
+
+def seed_section(student, questions):
+    section = Section(section_type='reading', title=f'Bench {questions}')
+    passage = ReadingPassage(title='Passage', content='...', section=section)
+    db.session.add_all([section, passage])
+    for i in range(questions):
+        question = Question(section_type='reading', type='prose_summary', prompt=f'Q{i}', reading_passage=passage)
+        options = [Option(question=question, option_text=f'Option {n}') for n in range(6)]
+        db.session.add(question)
+        db.session.add_all(options)
+        db.session.add_all(CorrectAnswer(question=question, option=options[n]) for n in (0, 2, 4))
+        db.session.add_all(UserAnswer(user=student, question=question, option=options[n]) for n in (0, 2, 5))
+    db.session.commit()
+    return section.id
+
+
+def legacy_options(student_id):
+    # The chain the review endpoints used before switching to selectin loading
+    return [
+        joinedload(UserAnswer.user),
+        joinedload(UserAnswer.question).options(
+            joinedload(Question.options),
+            joinedload(Question.correct_answers).joinedload(CorrectAnswer.option),
+            joinedload(Question.correct_answers).joinedload(CorrectAnswer.table_row),
+            joinedload(Question.correct_answers).joinedload(CorrectAnswer.table_column),
+            joinedload(Question.user_answers.and_(UserAnswer.user_id == student_id)).joinedload(UserAnswer.option),
+            joinedload(Question.user_answers.and_(UserAnswer.user_id == student_id)).joinedload(UserAnswer.table_row),
+            joinedload(Question.user_answers.and_(UserAnswer.user_id == student_id)).joinedload(UserAnswer.table_column)
+        ),
+        joinedload(UserAnswer.option),
+        joinedload(UserAnswer.table_row),
+        joinedload(UserAnswer.table_column),
+        joinedload(UserAnswer.scores).joinedload(Score.scorer)
+    ]
+
+
+def run_loader(section_id, student_id, loader_options):
+    """Returns (answers loaded, statements, rows returned by the database, seconds)."""
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    db.session.expunge_all()
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    started = time.perf_counter()
+    answers = db.session.query(UserAnswer)\
+        .join(Question, UserAnswer.question_id == Question.id)\
+        .join(ReadingPassage, Question.reading_passage_id == ReadingPassage.id)\
+        .filter(ReadingPassage.section_id == section_id, UserAnswer.user_id == student_id)\
+        .options(*loader_options)\
+        .order_by(Question.id)\
+        .all()
+    elapsed = time.perf_counter() - started
+    event.remove(db.engine, 'before_cursor_execute', capture)
+
+    # Re-run the captured statements to count the raw rows each one returned
+    rows = 0
+    with db.engine.connect() as conn:
+        for statement, parameters in statements:
+            rows += len(conn.exec_driver_sql(statement, parameters).fetchall())
+    return len(answers), len(statements), rows, elapsed
+
+
+def main():
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        student = User(username='bench', email='bench@example.com', role='student', password_hash='-')
+        db.session.add(student)
+        db.session.commit()
+        sections = [(size, seed_section(student, size)) for size in SECTION_SIZES]
+        results = []
+        for size, section_id in sections:
+            legacy = run_loader(section_id, student.id, legacy_options(student.id))
+            current = run_loader(section_id, student.id, answer_review_loader_options())
+            results.append((legacy, current))
+
+    print(f'{"answers":>8} | {"joined: stmts":>13} {"rows":>8} {"ms":>8} | {"selectin: stmts":>15} {"rows":>6} {"ms":>7} {"rows/answer":>11}')
+    for legacy, current in results:
+        answers = current[0]
+        print(f'{answers:>8} | {legacy[1]:>13} {legacy[2]:>8} {legacy[3] * 1000:>8.1f} | '
+              f'{current[1]:>15} {current[2]:>6} {current[3] * 1000:>7.1f} {current[2] / answers:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,8 @@
+import uuid
+
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 
-from sqlalchemy.sql import and_ 
-from sqlalchemy.orm import foreign 
-
 db = SQLAlchemy()
 
 # Users Model
@@ -30,20 +29,23 @@ class User(db.Model):
 class Section(db.Model):
     __tablename__ = 'sections'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    section_type = db.Column(db.String(50), nullable=False)
+    section_type = db.Column(db.String(50), nullable=False, index=True)
     title = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    # Changes whenever the section's content does; per-process caches compare it on every read
+    content_version = db.Column(db.String(32), nullable=False, default=lambda: uuid.uuid4().hex)
 
-    listening_audios = db.relationship('ListeningAudio', backref='section', lazy=True)
-    reading_passages = db.relationship('ReadingPassage', backref='section', lazy=True)
-    speaking_tasks = db.relationship('SpeakingTask', backref='section', lazy=True)
-    writing_tasks = db.relationship('WritingTask', backref='section', lazy=True)
+    # Child rows go with the section through ON DELETE CASCADE, never through the ORM
+    listening_audios = db.relationship('ListeningAudio', backref='section', lazy=True, passive_deletes=True)
+    reading_passages = db.relationship('ReadingPassage', backref='section', lazy=True, passive_deletes=True)
+    speaking_tasks = db.relationship('SpeakingTask', backref='section', lazy=True, passive_deletes=True)
+    writing_tasks = db.relationship('WritingTask', backref='section', lazy=True, passive_deletes=True)
 
 # Listening Audios Model
 class ListeningAudio(db.Model):
     __tablename__ = 'listening_audios'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    section_id = db.Column(db.Integer, db.ForeignKey('sections.id'), nullable=False)
+    section_id = db.Column(db.Integer, db.ForeignKey('sections.id', ondelete='CASCADE'), nullable=False, index=True)
     title = db.Column(db.String(255), nullable=False)
     audio_url = db.Column(db.String(255), nullable=False)
     photo_url = db.Column(db.String(255))
@@ -52,7 +54,7 @@ class ListeningAudio(db.Model):
 class ReadingPassage(db.Model):
     __tablename__ = 'reading_passages'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    section_id = db.Column(db.Integer, db.ForeignKey('sections.id'), nullable=False)
+    section_id = db.Column(db.Integer, db.ForeignKey('sections.id', ondelete='CASCADE'), nullable=False, index=True)
     title = db.Column(db.String(255), nullable=False)
     content = db.Column(db.Text, nullable=False)
 
@@ -61,57 +63,59 @@ class Question(db.Model):
     __tablename__ = 'questions'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     section_type = db.Column(db.String(50), nullable=False)
+    # Denormalized from the passage/audio so section-level queries skip the intermediate join
+    section_id = db.Column(db.Integer, db.ForeignKey('sections.id', ondelete='CASCADE'), index=True)
     type = db.Column(db.String(50), nullable=False)
     prompt = db.Column(db.Text, nullable=False)
-    listening_audio_id = db.Column(db.Integer, db.ForeignKey('listening_audios.id'))
-    reading_passage_id = db.Column(db.Integer, db.ForeignKey('reading_passages.id'))
+    listening_audio_id = db.Column(db.Integer, db.ForeignKey('listening_audios.id', ondelete='CASCADE'), index=True)
+    reading_passage_id = db.Column(db.Integer, db.ForeignKey('reading_passages.id', ondelete='CASCADE'), index=True)
     paragraph_index = db.Column(db.Integer, nullable=True)
 
 
-    listening_audio = db.relationship('ListeningAudio', backref='questions')
-    reading_passage = db.relationship('ReadingPassage', backref='questions')
-    options = db.relationship('Option', backref='question', lazy=True)
-    table_rows = db.relationship('TableQuestionRow', backref='question', lazy=True)
-    table_columns = db.relationship('TableQuestionColumn', backref='question', lazy=True)
+    listening_audio = db.relationship('ListeningAudio', backref=db.backref('questions', order_by='Question.id'))
+    reading_passage = db.relationship('ReadingPassage', backref=db.backref('questions', order_by='Question.id'))
+    options = db.relationship('Option', backref='question', lazy=True, order_by='Option.id') # id order drives the A, B, C, D mapping
+    table_rows = db.relationship('TableQuestionRow', backref='question', lazy=True, order_by='TableQuestionRow.id')
+    table_columns = db.relationship('TableQuestionColumn', backref='question', lazy=True, order_by='TableQuestionColumn.id')
     correct_answers = db.relationship('CorrectAnswer', backref='question', lazy=True)
-    question_audios = db.relationship('QuestionAudio', backref='question', lazy=True)
+    question_audios = db.relationship('QuestionAudio', backref='question', lazy=True, order_by='QuestionAudio.id')
 
 # Options Model
 class Option(db.Model):
     __tablename__ = 'options'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False, index=True)
     option_text = db.Column(db.Text, nullable=False)
 
 # Table Question Rows Model
 class TableQuestionRow(db.Model):
     __tablename__ = 'table_question_rows'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False, index=True)
     row_label = db.Column(db.Text, nullable=False)
 
 # Table Question Columns Model
 class TableQuestionColumn(db.Model):
     __tablename__ = 'table_question_columns'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False, index=True)
     column_label = db.Column(db.Text, nullable=False)
 
 # Question Audio Model
 class QuestionAudio(db.Model):
     __tablename__ = 'question_audios'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False, index=True)
     audio_url = db.Column(db.String(255), nullable=False)
 
 # Correct Answers Model
 class CorrectAnswer(db.Model):
     __tablename__ = 'correct_answers'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
-    table_row_id = db.Column(db.Integer, db.ForeignKey('table_question_rows.id'))
-    table_column_id = db.Column(db.Integer, db.ForeignKey('table_question_columns.id'))
-    option_id = db.Column(db.Integer, db.ForeignKey('options.id'))
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False, index=True)
+    table_row_id = db.Column(db.Integer, db.ForeignKey('table_question_rows.id', ondelete='CASCADE'))
+    table_column_id = db.Column(db.Integer, db.ForeignKey('table_question_columns.id', ondelete='CASCADE'))
+    option_id = db.Column(db.Integer, db.ForeignKey('options.id', ondelete='CASCADE'))
 
     table_row = db.relationship('TableQuestionRow')
     table_column = db.relationship('TableQuestionColumn')
@@ -121,7 +125,7 @@ class CorrectAnswer(db.Model):
 class SpeakingTask(db.Model):
     __tablename__ = 'speaking_tasks'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    section_id = db.Column(db.Integer, db.ForeignKey('sections.id'), nullable=False)
+    section_id = db.Column(db.Integer, db.ForeignKey('sections.id', ondelete='CASCADE'), nullable=False, index=True)
     task_number = db.Column(db.Integer, nullable=False)
     passage = db.Column(db.Text)
     prompt = db.Column(db.Text, nullable=False)
@@ -133,7 +137,7 @@ class SpeakingTask(db.Model):
 class WritingTask(db.Model):
     __tablename__ = 'writing_tasks'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    section_id = db.Column(db.Integer, db.ForeignKey('sections.id'), nullable=False)
+    section_id = db.Column(db.Integer, db.ForeignKey('sections.id', ondelete='CASCADE'), nullable=False, index=True)
     task_number = db.Column(db.Integer, nullable=False)
     passage = db.Column(db.Text, nullable=False)
     prompt = db.Column(db.Text, nullable=False)
@@ -146,22 +150,19 @@ class SpeakingResponse(db.Model):
     __tablename__ = 'speaking_responses'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    task_id = db.Column(db.Integer, db.ForeignKey('speaking_tasks.id'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('speaking_tasks.id', ondelete='CASCADE'), nullable=False)
     audio_url = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
 
     user = db.relationship('User', backref='speaking_responses')
     # task = db.relationship('SpeakingTask', backref='speaking_responses')
 
-    scores = db.relationship(
-        'Score',
-        primaryjoin=lambda: and_(
-            foreign(Score.response_id) == SpeakingResponse.id,
-            Score.response_type == 'speaking'
-        ),
-        backref='speaking_response', # Add specific backref
-        cascade="all, delete-orphan",
-        lazy='selectin'
+    scores = db.relationship('Score', backref='speaking_response', cascade="all, delete-orphan", lazy='selectin')
+
+    # One recording per student per task; submissions replace the previous row.
+    # Unique indexes (not constraints) so `flask ensure-indexes` can add them to existing tables.
+    __table_args__ = (
+        db.Index('uq_speaking_responses_task_user', 'task_id', 'user_id', unique=True),
     )
 
 # Writing Responses Model
@@ -169,7 +170,7 @@ class WritingResponse(db.Model):
     __tablename__ = 'writing_responses'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    task_id = db.Column(db.Integer, db.ForeignKey('writing_tasks.id'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('writing_tasks.id', ondelete='CASCADE'), nullable=False)
     response_text = db.Column(db.Text, nullable=False)
     word_count = db.Column(db.Integer)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
@@ -177,32 +178,22 @@ class WritingResponse(db.Model):
     user = db.relationship('User', backref='writing_responses')
     # task = db.relationship('WritingTask', backref='writing_responses') # Changed backref slightly
 
-    scores = db.relationship(
-        'Score',
-        primaryjoin=lambda: and_(
-            foreign(Score.response_id) == WritingResponse.id,
-            Score.response_type == 'writing'
-        ),
-        backref='writing_response', # Add specific backref
-        cascade="all, delete-orphan",
-        lazy='selectin'
+    scores = db.relationship('Score', backref='writing_response', cascade="all, delete-orphan", lazy='selectin')
+
+    # One essay per student per task; resubmissions update it in place
+    __table_args__ = (
+        db.Index('uq_writing_responses_task_user', 'task_id', 'user_id', unique=True),
     )
 
 # Scores Model
-user_answer_score_assoc = db.Table('user_answer_score_assoc',
-    db.Column('user_answer_id', db.Integer, db.ForeignKey('user_answers.id'), primary_key=True),
-    db.Column('score_id', db.Integer, db.ForeignKey('scores.id'), primary_key=True)
-)
-
-
 class Score(db.Model):
     __tablename__ = 'scores'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    # Keep these generic for S/W
-    response_id = db.Column(db.Integer, nullable=True) # ID from SpeakingResponse or WritingResponse
-    response_type = db.Column(db.String(50), nullable=True) # 'speaking' or 'writing'
-    # Add specific FK for R/L
-    user_answer_id = db.Column(db.Integer, db.ForeignKey('user_answers.id'), nullable=True)
+    response_type = db.Column(db.String(50), nullable=False) # 'speaking', 'writing', 'reading' or 'listening'
+    # Exactly one typed link is set, matching response_type
+    speaking_response_id = db.Column(db.Integer, db.ForeignKey('speaking_responses.id', ondelete='CASCADE'), nullable=True)
+    writing_response_id = db.Column(db.Integer, db.ForeignKey('writing_responses.id', ondelete='CASCADE'), nullable=True)
+    user_answer_id = db.Column(db.Integer, db.ForeignKey('user_answers.id', ondelete='CASCADE'), nullable=True) # Reading/listening
     # Score and Feedback details
     score = db.Column(db.Numeric(5, 2), nullable=True) # Nullable score
     feedback = db.Column(db.Text, nullable=True) # Nullable feedback
@@ -212,36 +203,109 @@ class Score(db.Model):
 
     scorer = db.relationship('User', backref='scores_given') # Adjusted backref slightly
 
-    # Relationship back to UserAnswer (Optional but can be useful)
-    # Use secondary table for M-N potential, although likely 1-1 in practice here
-    user_answers = db.relationship('UserAnswer', secondary=user_answer_score_assoc, backref='scores')
-
-    # Add constraints to ensure only one type of response link is used
+    # Ensure exactly the link column for response_type is used
     __table_args__ = (
         db.CheckConstraint(
-            '((response_id IS NOT NULL AND user_answer_id IS NULL) OR (response_id IS NULL AND user_answer_id IS NOT NULL))',
+            "(response_type = 'speaking' AND speaking_response_id IS NOT NULL AND writing_response_id IS NULL AND user_answer_id IS NULL) OR "
+            "(response_type = 'writing' AND writing_response_id IS NOT NULL AND speaking_response_id IS NULL AND user_answer_id IS NULL) OR "
+            "(response_type IN ('reading', 'listening') AND user_answer_id IS NOT NULL AND speaking_response_id IS NULL AND writing_response_id IS NULL)",
             name='score_response_link_check'
         ),
-         db.CheckConstraint(
-            "(response_type IN ('speaking', 'writing') AND response_id IS NOT NULL AND user_answer_id IS NULL) OR "
-            "(response_type IN ('reading', 'listening') AND user_answer_id IS NOT NULL AND response_id IS NULL AND response_type IS NOT NULL)",
-            name='score_response_type_check'
-        ),
+        # At most one score per graded response/answer; NULLs in the unused link columns don't collide
+        db.Index('uq_scores_speaking_response', 'speaking_response_id', unique=True),
+        db.Index('uq_scores_writing_response', 'writing_response_id', unique=True),
+        db.Index('uq_scores_user_answer', 'user_answer_id', unique=True),
     )
 
 
-# Modify UserAnswer to link to Score via secondary table
+# User Answers Model
 class UserAnswer(db.Model):
     __tablename__ = 'user_answers'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    table_row_id = db.Column(db.Integer, db.ForeignKey('table_question_rows.id'))
-    table_column_id = db.Column(db.Integer, db.ForeignKey('table_question_columns.id'))
-    option_id = db.Column(db.Integer, db.ForeignKey('options.id'))
+    table_row_id = db.Column(db.Integer, db.ForeignKey('table_question_rows.id', ondelete='CASCADE'))
+    table_column_id = db.Column(db.Integer, db.ForeignKey('table_question_columns.id', ondelete='CASCADE'))
+    option_id = db.Column(db.Integer, db.ForeignKey('options.id', ondelete='CASCADE'))
 
     user = db.relationship('User', backref='answers')
     question = db.relationship('Question', backref='user_answers')
     table_row = db.relationship('TableQuestionRow')
     table_column = db.relationship('TableQuestionColumn')
     option = db.relationship('Option')
+    scores = db.relationship('Score', backref='user_answer', cascade="all, delete-orphan", lazy=True)
+
+    # Several rows per question for multi-select/table answers, so indexed but not unique
+    __table_args__ = (
+        db.Index('ix_user_answers_user_question', 'user_id', 'question_id'),
+    )
+
+# Section Attempts Model
+# One row per student per reading/listening section, overwritten on resubmission
+# just like the UserAnswer rows it summarizes.
+class SectionAttempt(db.Model):
+    __tablename__ = 'section_attempts'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    section_id = db.Column(db.Integer, db.ForeignKey('sections.id', ondelete='CASCADE'), nullable=False)
+    submitted_at = db.Column(db.DateTime, default=db.func.current_timestamp(), nullable=False)
+    raw_score = db.Column(db.Integer, nullable=False)
+    max_score = db.Column(db.Integer, nullable=False)
+    scaled_score = db.Column(db.Integer, nullable=False) # 0-30 TOEFL band
+
+    user = db.relationship('User', backref='section_attempts')
+    section = db.relationship('Section', backref='attempts')
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'section_id', name='uq_section_attempt_user_section'),
+    )
+
+# Student Section Progress Model
+# Materialized "has this student completed the section and is it fully graded",
+# kept up to date by the submit and review endpoints in the same transaction.
+class StudentSectionProgress(db.Model):
+    __tablename__ = 'student_section_progress'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    section_id = db.Column(db.Integer, db.ForeignKey('sections.id', ondelete='CASCADE'), nullable=False)
+    section_type = db.Column(db.String(50), nullable=False)
+    response_count = db.Column(db.Integer, nullable=False, default=0) # Responses or answer rows submitted
+    scored_count = db.Column(db.Integer, nullable=False, default=0) # How many of them have a Score
+    feedback_provided = db.Column(db.Boolean, nullable=False, default=False)
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+    section = db.relationship('Section')
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'section_id', name='uq_student_section_progress_user_section'),
+    )
+
+# Media Blobs Model
+# Uploads are stored content-addressed: one file per distinct content, named after its
+# SHA-256 and shared by every row whose audio/photo URL points at it. ref_count is the
+# number of such rows, refreshed by the writes that add or drop references.
+class MediaBlob(db.Model):
+    __tablename__ = 'media_blobs'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    digest = db.Column(db.String(64), nullable=False, unique=True) # hex SHA-256 of the content
+    url = db.Column(db.String(255), nullable=False, unique=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+# Chunked Uploads Model
+# A resumable upload: each chunk is stored as its own part under
+# UPLOAD_FOLDER/.partial/<id>/, named by the offset it starts at, until `received` reaches
+# the declared size. Finalize joins the parts into the blob store and sets `url`. The row
+# is deleted once a submission uses the file.
+class ChunkedUpload(db.Model):
+    __tablename__ = 'chunked_uploads'
+    id = db.Column(db.String(36), primary_key=True) # uuid4, also the name of the parts' directory
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    purpose = db.Column(db.String(50), nullable=False) # e.g. 'speaking_recording'
+    filename = db.Column(db.String(255))
+    size = db.Column(db.BigInteger, nullable=False) # Declared total size in bytes
+    received = db.Column(db.BigInteger, nullable=False, default=0) # Bytes in stored (fsynced) parts so far
+    url = db.Column(db.String(255)) # Set by finalize
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
@@ -0,0 +1,144 @@
+import os
+import shutil
+
+from werkzeug.security import safe_join
+
+# Media storage backends
+# Every stored file is addressed by a key: its upload URL without the leading slash
+# (e.g. "uploads/listening_audios/<sha256>.mp3"), so database rows read the same whatever
+# backend holds the bytes. Both backends take ownership of the local file handed to
+# put_file() and read back through open(), which returns a binary file-like object.
+
+class LocalStorage:
+    """Files under a directory on this machine; the app serves them through /files."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        """Absolute path of a key, or None if it would escape the root."""
+        return safe_join(self.root, key)
+
+    def size(self, key):
+        path = self.path(key)
+        return os.path.getsize(path) if path and os.path.isfile(path) else None
+
+    def put_file(self, local_path, key, content_type=None):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.move(local_path, path)
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def delete(self, key):
+        """Removes a key; returns whether there was anything to remove."""
+        try:
+            os.remove(self.path(key))
+            return True
+        except OSError:
+            return False
+
+    def delete_prefix(self, prefix):
+        """Removes everything under a "directory/" prefix."""
+        directory = self.path(prefix)
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def list_keys(self, prefix):
+        """Keys of the files directly under a "directory/" prefix."""
+        directory = self.path(prefix)
+        if not directory or not os.path.isdir(directory):
+            return []
+        return [prefix + name for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name))]
+
+    def presigned_url(self, key, expires_in):
+        return None # Served by the app (or its front proxy) instead
+
+
+class S3Storage:
+    """Objects in an S3-compatible bucket (AWS S3, MinIO, moto server, ...). Clients
+    download through time-limited presigned GET URLs, so no app node proxies media and
+    nodes share no disk."""
+
+    def __init__(self, bucket, endpoint_url=None, region=None, access_key_id=None,
+                 secret_access_key=None, public_endpoint_url=None):
+        import boto3 # Only needed for this backend
+        from botocore.config import Config
+        from botocore.exceptions import ClientError
+
+        def make_client(endpoint):
+            return boto3.client(
+                's3',
+                endpoint_url=endpoint,
+                region_name=region,
+                aws_access_key_id=access_key_id,
+                aws_secret_access_key=secret_access_key,
+                # Path-style addressing works with stand-ins that have no wildcard DNS
+                config=Config(signature_version='s3v4', s3={'addressing_style': 'path' if endpoint else 'auto'})
+            )
+
+        self.bucket = bucket
+        self.client = make_client(endpoint_url)
+        # Presigned URLs must name a host the browser can reach, which a private endpoint may not be
+        self.presign_client = make_client(public_endpoint_url) if public_endpoint_url else self.client
+        self.client_error = ClientError
+
+    def size(self, key):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)['ContentLength']
+        except self.client_error as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def put_file(self, local_path, key, content_type=None):
+        extra_args = {'ContentType': content_type} if content_type else None
+        self.client.upload_file(local_path, self.bucket, key, ExtraArgs=extra_args)
+        os.remove(local_path)
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+
+    def delete(self, key):
+        """Removes a key; returns whether there was anything to remove."""
+        existed = self.size(key) is not None
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+        return existed
+
+    def delete_prefix(self, prefix):
+        """Removes everything under a "directory/" prefix."""
+        for page in self.client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=prefix):
+            objects = [{'Key': item['Key']} for item in page.get('Contents', [])]
+            if objects: # A page holds at most 1000 keys, as many as one delete_objects call takes
+                self.client.delete_objects(Bucket=self.bucket, Delete={'Objects': objects, 'Quiet': True})
+
+    def list_keys(self, prefix):
+        """Keys of the objects directly under a "directory/" prefix."""
+        keys = []
+        for page in self.client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=prefix, Delimiter='/'):
+            keys.extend(item['Key'] for item in page.get('Contents', []))
+        return keys
+
+    def presigned_url(self, key, expires_in):
+        return self.presign_client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': key}, ExpiresIn=expires_in)
+
+
+def make_storage(config):
+    """Builds the backend named by STORAGE_BACKEND ('local' or 's3')."""
+    backend = (config.get('STORAGE_BACKEND') or 'local').lower()
+    if backend == 'local':
+        return LocalStorage(config.get('STORAGE_ROOT') or '.')
+    if backend == 's3':
+        if not config.get('S3_BUCKET'):
+            raise RuntimeError('STORAGE_BACKEND=s3 needs S3_BUCKET')
+        return S3Storage(
+            config['S3_BUCKET'],
+            endpoint_url=config.get('S3_ENDPOINT_URL'),
+            region=config.get('S3_REGION'),
+            access_key_id=config.get('S3_ACCESS_KEY_ID'),
+            secret_access_key=config.get('S3_SECRET_ACCESS_KEY'),
+            public_endpoint_url=config.get('S3_PUBLIC_ENDPOINT_URL')
+        )
+    raise RuntimeError(f'Unknown STORAGE_BACKEND {backend!r}')
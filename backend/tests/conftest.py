@@ -0,0 +1,171 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# app.py reads its configuration and creates its tables at import time
+WORKDIR = tempfile.mkdtemp(prefix='toefl-tests-')
+os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(WORKDIR, "test.db")}'
+# Relative, like a deployment's, so media URLs read /uploads/...
+os.environ['UPLOAD_FOLDER'] = 'uploads'
+os.environ['STORAGE_ROOT'] = WORKDIR
+os.chdir(WORKDIR)
+os.environ.setdefault('SECRET_KEY', 'test')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app, generate_token
+from models import db, User
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(role):
+    user = User(username=f'{role}-{User.query.count()}', email=f'{role}{User.query.count()}@example.com', role=role)
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def admin_headers(app):
+    return {'Authorization': f'Bearer {generate_token(make_user("admin"))}'}
+
+
+@pytest.fixture
+def student(app):
+    return make_user('student')
+
+
+@pytest.fixture
+def student_headers(student):
+    return {'Authorization': f'Bearer {generate_token(student)}'}
+
+
+MP3 = b'ID3\x04\0\0\0\0\0\0' + bytes(range(64))
+PNG = b'\x89PNG\r\n\x1a\n' + b'\0' * 24
+
+READING_SECTION = {'title': 'Reading', 'passages': [
+    {'title': 'Passage 1', 'content': 'First passage.', 'questions': [
+        {'type': 'multiple_to_single', 'prompt': 'P1 Q1', 'options': ['a', 'b', 'c', 'd'], 'correctOptionIndex': 2},
+        {'type': 'insert_text', 'prompt': 'P1 Q2', 'correctInsertionPoint': 'c'},
+        {'type': 'prose_summary', 'prompt': 'P1 Q3', 'options': ['a', 'b', 'c', 'd', 'e', 'f'], 'correctAnswerIndices': [0, 2, 5]}]},
+    {'title': 'Passage 2', 'content': 'Second passage.', 'questions': [
+        {'type': 'multiple_to_multiple', 'prompt': 'P2 Q1', 'options': ['a', 'b', 'c'], 'correctAnswerIndices': [1, 2]}]}
+]}
+
+LISTENING_SECTION = {'title': 'Listening', 'audioItems': [
+    {'id': 1, 'title': 'Lecture', 'questions': [
+        {'id': 10, 'type': 'audio', 'prompt': 'L Q1', 'options': ['a', 'b', 'c'], 'correctOptionIndex': 0},
+        {'id': 11, 'type': 'table', 'prompt': 'L Q2', 'rows': ['r1', 'r2'], 'columns': ['yes', 'no'],
+         'correctTableSelections': [{'rowIndex': 0, 'colIndex': 1}, {'rowIndex': 1, 'colIndex': 0}]}]},
+    {'id': 2, 'title': 'Conversation', 'questions': [
+        {'id': 20, 'type': 'multiple_to_single', 'prompt': 'L Q3', 'options': ['a', 'b'], 'correctOptionIndex': 1}]}
+]}
+
+
+def create_reading_section(client, headers, payload=READING_SECTION):
+    response = client.post('/reading', json=payload, headers=headers)
+    assert response.status_code == 201, response.json
+    return response.json['id']
+
+
+def create_listening_section(client, headers, payload=LISTENING_SECTION):
+    import io
+    import json
+    data = {'sectionData': json.dumps(payload)}
+    for item in payload['audioItems']:
+        data[f"audioItem_{item['id']}_audioFile"] = (io.BytesIO(MP3 + item['title'].encode()), f"{item['title']}.mp3")
+    data['audioItem_1_imageFile'] = (io.BytesIO(PNG), 'lecture.png')
+    data['question_10_snippetFile'] = (io.BytesIO(MP3 + b'snippet'), 'snippet.mp3')
+    response = client.post('/listening', data=data, headers=headers, content_type='multipart/form-data')
+    assert response.status_code == 201, response.json
+    return response.json['id']
+
+
+def create_speaking_section(client, headers):
+    import io
+    import json
+    tasks = [{'taskNumber': n, 'prompt': f'Speaking prompt {n}', 'passage': f'Speaking passage {n}'} for n in range(1, 5)]
+    data = {'sectionData': json.dumps({'title': 'Speaking', 'tasks': tasks})}
+    for n in (2, 3, 4):
+        data[f'audio_task_{n}'] = (io.BytesIO(MP3 + f'task {n}'.encode()), f'task{n}.mp3')
+    response = client.post('/speaking', data=data, headers=headers, content_type='multipart/form-data')
+    assert response.status_code == 201, response.json
+    return response.json['id']
+
+
+def create_writing_section(client, headers):
+    import io
+    import json
+    tasks = [{'taskNumber': n, 'prompt': f'Writing prompt {n}', 'passage': f'Writing passage {n}'} for n in (1, 2)]
+    data = {'sectionData': json.dumps({'title': 'Writing', 'tasks': tasks}),
+            'audio_task_1': (io.BytesIO(MP3 + b'lecture'), 'lecture.mp3')}
+    response = client.post('/writing', data=data, headers=headers, content_type='multipart/form-data')
+    assert response.status_code == 201, response.json
+    return response.json['id']
+
+
+@pytest.fixture
+def reading_section(client, admin_headers):
+    return create_reading_section(client, admin_headers)
+
+
+@pytest.fixture
+def listening_section(client, admin_headers):
+    return create_listening_section(client, admin_headers)
+
+
+@pytest.fixture
+def speaking_section(client, admin_headers):
+    return create_speaking_section(client, admin_headers)
+
+
+@pytest.fixture
+def writing_section(client, admin_headers):
+    return create_writing_section(client, admin_headers)
+
+
+def answer_key_by_content(section_id):
+    """A section's answer key with ids replaced by the text they stand for, so copies compare equal."""
+    from models import Question, Option, TableQuestionRow, TableQuestionColumn, ReadingPassage, ListeningAudio
+    from app import build_answer_key
+    from models import Section
+    section = db.session.get(Section, section_id)
+    key = build_answer_key(section.section_type, section_id)
+    content = []
+    for question in Question.query.filter_by(section_id=section_id).order_by(Question.id):
+        parent = db.session.get(ReadingPassage, question.reading_passage_id) if question.reading_passage_id \
+            else db.session.get(ListeningAudio, question.listening_audio_id)
+        correct, points = key[question.id]
+        answers = set()
+        for choice in correct:
+            if isinstance(choice, tuple):
+                answers.add((db.session.get(TableQuestionRow, choice[0]).row_label,
+                             db.session.get(TableQuestionColumn, choice[1]).column_label))
+            else:
+                answers.add(db.session.get(Option, choice).option_text)
+        content.append((parent.title, question.type, question.prompt, frozenset(answers), points,
+                        tuple(option.option_text for option in question.options)))
+    return content
+
+
+def stored_files():
+    """Media files under UPLOAD_FOLDER, leaving out the spool and partial-upload directories."""
+    root = flask_app.config['UPLOAD_FOLDER']
+    return {os.path.join(folder, name) for folder, dirs, names in os.walk(root)
+            if not os.path.relpath(folder, root).startswith('.') for name in names}
@@ -0,0 +1,77 @@
+"""Admin section review: keyset pages of students, NDJSON streaming and one entry per question."""
+import json
+
+from app import generate_token
+from conftest import make_user
+from models import db, Question, ReadingPassage, StudentSectionProgress
+
+
+def submit_reading(client, student, section_id, choice='a'):
+    answers = {}
+    for passage in ReadingPassage.query.filter_by(section_id=section_id):
+        answers[str(passage.id)] = {str(q.id): [choice] for q in Question.query.filter_by(reading_passage_id=passage.id)}
+    # A multi-select answer stores several rows for one question
+    prose_summary = Question.query.filter_by(section_id=section_id, type='prose_summary').one()
+    answers[str(prose_summary.reading_passage_id)][str(prose_summary.id)] = ['a', 'c', 'f']
+    response = client.post(f'/reading/{section_id}/submit', json={'answers': answers},
+                           headers={'Authorization': f'Bearer {generate_token(student)}'})
+    assert response.status_code == 200, response.json
+
+
+def students_with_submissions(client, section_id, count):
+    students = [make_user('student') for _ in range(count)]
+    for student in students:
+        submit_reading(client, student, section_id)
+    return students
+
+
+def test_pages_follow_the_cursor_without_gaps(client, admin_headers, reading_section):
+    students = students_with_submissions(client, reading_section, 5)
+    seen, cursor, pages = [], None, 0
+    while True:
+        query = f'?limit=2&after_user_id={cursor}' if cursor else '?limit=2'
+        page = client.get(f'/admin/review/reading/{reading_section}{query}', headers=admin_headers).json
+        pages += 1
+        assert len(page['submissions']) <= 2
+        seen += [submission['student']['id'] for submission in page['submissions']]
+        cursor = page['nextAfterUserId']
+        if not cursor:
+            break
+    assert seen == [student.id for student in students]
+    assert pages == 3
+
+
+def test_entries_are_grouped_per_question(client, admin_headers, reading_section):
+    students_with_submissions(client, reading_section, 1)
+    submission = client.get(f'/admin/review/reading/{reading_section}', headers=admin_headers).json['submissions'][0]
+
+    questions = Question.query.filter_by(section_id=reading_section).order_by(Question.id).all()
+    assert [entry['taskId'] for entry in submission['responses']] == [q.id for q in questions]
+    assert [entry['taskNumber'] for entry in submission['responses']] == [1, 2, 3, 4]
+    prose_summary = next(entry for entry in submission['responses'] if entry['taskPrompt'] == 'P1 Q3')
+    assert len(prose_summary['responseIds']) == 3 and prose_summary['isCorrect'] is True
+    assert submission['attempt']['rawScore'] == 2
+
+
+def test_students_without_progress_rows_are_listed(client, admin_headers, reading_section):
+    students = students_with_submissions(client, reading_section, 4)
+    # As if they answered before the progress table existed
+    StudentSectionProgress.query.filter(StudentSectionProgress.user_id.in_([students[0].id, students[2].id])).delete()
+    db.session.commit()
+
+    first = client.get(f'/admin/review/reading/{reading_section}?limit=3', headers=admin_headers).json
+    assert [s['student']['id'] for s in first['submissions']] == [s.id for s in students[:3]]
+    rest = client.get(f"/admin/review/reading/{reading_section}?limit=3&after_user_id={first['nextAfterUserId']}",
+                      headers=admin_headers).json
+    assert [s['student']['id'] for s in rest['submissions']] == [students[3].id]
+    assert rest['nextAfterUserId'] is None
+
+
+def test_ndjson_streams_one_student_per_line(client, admin_headers, reading_section):
+    students = students_with_submissions(client, reading_section, 3)
+    response = client.get(f'/admin/review/reading/{reading_section}?format=ndjson&after_user_id={students[0].id}',
+                          headers=admin_headers)
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['student']['id'] for line in lines] == [s.id for s in students[1:]]
+    assert all(len(line['responses']) == 4 and line['attempt'] for line in lines)
@@ -0,0 +1,84 @@
+"""Reading/listening submissions are validated and stored with set-based statements."""
+from app import get_answer_key
+from conftest import create_reading_section
+from models import db, Option, Question, TableQuestionColumn, TableQuestionRow, UserAnswer
+from test_query_counts import count_statements
+
+
+def questions_by_prompt(section_id):
+    return {q.prompt: q for q in Question.query.filter_by(section_id=section_id)}
+
+
+def reading_answers(questions, answers):
+    """{prompt: [answer indices]} -> the submit payload, keyed by passage and question id."""
+    payload = {}
+    for prompt, indices in answers.items():
+        question = questions[prompt]
+        payload.setdefault(str(question.reading_passage_id), {})[str(question.id)] = indices
+    return {'answers': payload}
+
+
+def stored_options(student_id, question):
+    return sorted(option.option_text for option in Option.query.join(UserAnswer, UserAnswer.option_id == Option.id)
+                  .filter(UserAnswer.user_id == student_id, UserAnswer.question_id == question.id))
+
+
+def test_resubmitting_replaces_the_answers(client, student, student_headers, reading_section):
+    questions = questions_by_prompt(reading_section)
+    first = client.post(f'/reading/{reading_section}/submit', headers=student_headers,
+                        json=reading_answers(questions, {'P1 Q1': ['a'], 'P1 Q3': ['a', 'c', 'f']}))
+    assert first.json['score'] == 2 # Only the prose summary, worth 2
+
+    second = client.post(f'/reading/{reading_section}/submit', headers=student_headers,
+                         json=reading_answers(questions, {'P1 Q1': ['c'], 'P1 Q3': ['b']}))
+
+    assert second.status_code == 200, second.json
+    assert stored_options(student.id, questions['P1 Q1']) == ['c']
+    assert stored_options(student.id, questions['P1 Q3']) == ['b']
+    assert UserAnswer.query.filter_by(user_id=student.id).count() == 2
+    assert second.json['score'] == 1 # Now only P1 Q1
+
+
+def test_question_from_another_passage_writes_nothing(client, student, student_headers, reading_section):
+    questions = questions_by_prompt(reading_section)
+    payload = reading_answers(questions, {'P1 Q1': ['c']})
+    payload['answers'][str(questions['P1 Q1'].reading_passage_id)][str(questions['P2 Q1'].id)] = ['b']
+
+    response = client.post(f'/reading/{reading_section}/submit', headers=student_headers, json=payload)
+
+    assert response.status_code == 404
+    assert UserAnswer.query.filter_by(user_id=student.id).count() == 0
+
+
+def test_listening_table_answers_are_stored_per_cell(client, student, student_headers, listening_section):
+    questions = questions_by_prompt(listening_section)
+    table = questions['L Q2']
+    answers = {str(table.listening_audio_id): {str(table.id): {'0': {'1': True}, '1': {'0': True, '1': False}}}}
+
+    response = client.post(f'/listening/{listening_section}/submit', headers=student_headers, json={'answers': answers})
+
+    assert response.status_code == 200, response.json
+    assert response.json['score'] == get_answer_key('listening', listening_section)[table.id][1]
+    cells = db.session.query(TableQuestionRow.row_label, TableQuestionColumn.column_label)\
+        .join(UserAnswer, UserAnswer.table_row_id == TableQuestionRow.id)\
+        .join(TableQuestionColumn, UserAnswer.table_column_id == TableQuestionColumn.id)\
+        .filter(UserAnswer.user_id == student.id)\
+        .all()
+    assert sorted(cells) == [('r1', 'no'), ('r2', 'yes')]
+
+
+def test_submit_statement_count_does_not_grow_with_questions(client, admin_headers, student_headers):
+    questions = [{'type': 'multiple_to_single', 'prompt': f'Q{i}', 'options': ['a', 'b'], 'correctOptionIndex': 0}
+                 for i in range(12)]
+    section_id = create_reading_section(client, admin_headers, {'title': 'Long', 'passages': [
+        {'title': 'P', 'content': '...', 'questions': questions}]})
+    by_prompt = questions_by_prompt(section_id)
+
+    one, every = (reading_answers(by_prompt, {prompt: ['a'] for prompt in prompts}) for prompts in (['Q0'], by_prompt))
+
+    def submit(payload):
+        response = client.post(f'/reading/{section_id}/submit', headers=student_headers, json=payload)
+        assert response.status_code == 200, response.json
+
+    submit(every) # Builds the cached answer key
+    assert count_statements(submit, one) == count_statements(submit, every)
@@ -0,0 +1,50 @@
+"""Authored sections are written with batched INSERTs and keep their options and answer key in order."""
+from conftest import answer_key_by_content, create_reading_section
+from models import db, Question, QuestionAudio
+from test_query_counts import count_statements
+
+SECTION = {'title': 'Ordered', 'passages': [
+    {'title': 'First', 'content': '...', 'questions': [
+        {'type': 'multiple_to_single', 'prompt': 'Pick one', 'options': ['delta', 'alpha', 'charlie'], 'correctOptionIndex': 1},
+        {'type': 'multiple_to_multiple', 'prompt': 'Pick two', 'options': ['zulu', 'yankee', 'xray'], 'correctAnswerIndices': [0, 2]}]},
+    {'title': 'Second', 'content': '...', 'questions': [
+        {'type': 'insert_text', 'prompt': 'Insert', 'correctInsertionPoint': 'b'},
+        {'type': 'prose_summary', 'prompt': 'Summarize', 'options': ['f', 'e', 'd', 'c', 'b', 'a'], 'correctAnswerIndices': [1, 3, 5]}]}
+]}
+
+
+def test_reading_section_keeps_option_order_and_answer_key(client, admin_headers):
+    section_id = create_reading_section(client, admin_headers, SECTION)
+
+    content = [(passage, kind, prompt, answers, options) for passage, kind, prompt, answers, points, options
+               in answer_key_by_content(section_id)]
+    assert content == [
+        ('First', 'multiple_to_single', 'Pick one', {'alpha'}, ('delta', 'alpha', 'charlie')),
+        ('First', 'multiple_to_multiple', 'Pick two', {'zulu', 'xray'}, ('zulu', 'yankee', 'xray')),
+        ('Second', 'insert_text', 'Insert', {'b'}, ('a', 'b', 'c', 'd')),
+        ('Second', 'prose_summary', 'Summarize', {'e', 'c', 'a'}, ('f', 'e', 'd', 'c', 'b', 'a')),
+    ]
+
+
+def test_listening_snippet_belongs_to_its_question(listening_section):
+    audio_question = Question.query.filter_by(section_id=listening_section, prompt='L Q1').one()
+    snippets = QuestionAudio.query.join(Question).filter(Question.section_id == listening_section).all()
+
+    assert [snippet.question_id for snippet in snippets] == [audio_question.id]
+    assert snippets[0].audio_url.startswith('/uploads/question_audios/')
+
+
+def test_authoring_statement_count_does_not_grow_with_questions(client, admin_headers):
+    def section(questions):
+        return {'title': f'{questions} questions', 'passages': [
+            {'title': f'P{p}', 'content': '...', 'questions': [
+                {'type': 'multiple_to_single', 'prompt': f'Q{i}', 'options': ['a', 'b', 'c', 'd'], 'correctOptionIndex': 0}
+                for i in range(questions)]} for p in range(3)]}
+
+    def create(payload):
+        create_reading_section(client, admin_headers, payload)
+
+    create(section(1)) # Warm up the user lookup path
+    assert count_statements(create, section(2)) == count_statements(create, section(14))
+    db.session.expire_all()
+    assert Question.query.filter_by(prompt='Q13').count() == 3
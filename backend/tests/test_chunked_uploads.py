@@ -0,0 +1,22 @@
+"""Resumable upload sessions: argument checks and errors raised while a chunk streams in."""
+import io
+
+import pytest
+
+
+@pytest.mark.parametrize('size', [True, 0, -1, 1.5, '10', None])
+def test_size_must_be_a_positive_integer(client, student_headers, size):
+    response = client.post('/uploads', json={'size': size, 'filename': 'r.webm'}, headers=student_headers)
+    assert response.status_code == 400
+
+
+def test_chunk_over_the_request_ceiling_is_413(app, client, student_headers, monkeypatch):
+    upload = client.post('/uploads', json={'size': 1000, 'filename': 'r.webm'}, headers=student_headers).json
+    monkeypatch.setitem(app.config, 'CHUNKED_UPLOAD_MAX_BYTES', 100)
+
+    # No Content-Length, so the ceiling is only hit while the body streams in
+    response = client.put(f"/uploads/{upload['uploadId']}?offset=0", headers=student_headers,
+                          input_stream=io.BytesIO(b'\x1aE\xdf\xa3' + b'\0' * 500),
+                          environ_overrides={'wsgi.input_terminated': True})
+    assert response.status_code == 413
+    assert client.get(f"/uploads/{upload['uploadId']}", headers=student_headers).json['offset'] == 0
@@ -0,0 +1,66 @@
+"""/files answers ranges and revalidation itself, names the real media type, and can hand the bytes to a proxy."""
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app import save_file
+from conftest import MP3, PNG
+from models import db
+
+WEBM = b'\x1a\x45\xdf\xa3' + b'\0' * 60
+
+
+def stored(content, filename, subfolder='listening_audios'):
+    url = save_file(FileStorage(io.BytesIO(content), filename=filename), subfolder)
+    db.session.commit()
+    return url
+
+
+def test_range_request_gets_partial_content(client):
+    url = stored(MP3 + b'range', 'lecture.mp3')
+
+    response = client.get(f'/files{url}', headers={'Range': 'bytes=2-9'})
+
+    assert response.status_code == 206
+    assert response.data == (MP3 + b'range')[2:10]
+    assert response.headers['Content-Range'] == f'bytes 2-9/{len(MP3) + 5}'
+
+
+def test_revalidation_answers_not_modified(client):
+    url = stored(MP3 + b'etag', 'lecture.mp3')
+    first = client.get(f'/files{url}')
+    assert first.status_code == 200
+    assert first.headers['Accept-Ranges'] == 'bytes'
+    assert 'max-age' in first.headers['Cache-Control']
+
+    assert client.get(f'/files{url}', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert client.get(f'/files{url}', headers={'If-Modified-Since': first.headers['Last-Modified']}).status_code == 304
+
+
+@pytest.mark.parametrize('content, filename, subfolder, mimetype', [
+    (MP3 + b'type', 'lecture.mp3', 'listening_audios', 'audio/mpeg'),
+    (PNG + b'type', 'lecture.png', 'listening_photos', 'image/png'),
+    (WEBM, 'recording', 'speaking_responses', 'audio/webm'), # No extension: sniffed from the bytes
+])
+def test_files_carry_their_media_type(client, content, filename, subfolder, mimetype):
+    url = stored(content, filename, subfolder)
+
+    assert client.get(f'/files{url}').mimetype == mimetype
+
+
+def test_accel_redirect_leaves_the_body_to_the_proxy(app, client, monkeypatch):
+    url = stored(MP3 + b'accel', 'lecture.mp3')
+    monkeypatch.setitem(app.config, 'FILES_ACCEL_REDIRECT_PREFIX', '/protected/')
+
+    response = client.get(f'/files{url}')
+
+    assert response.status_code == 200
+    assert response.headers['X-Accel-Redirect'] == f'/protected{url}'
+    assert response.mimetype == 'audio/mpeg'
+    assert response.data == b''
+
+
+def test_paths_outside_the_storage_root_are_refused(client):
+    assert client.get('/files/../test.db').status_code == 403
+    assert client.get('/files/uploads/..%2F..%2Ftest.db').status_code == 403
@@ -0,0 +1,106 @@
+"""Content-addressed uploads racing with each other and with the media purge."""
+import copy
+import hashlib
+import io
+import json
+
+from werkzeug.datastructures import FileStorage
+
+import app as app_module
+from conftest import LISTENING_SECTION, MP3, PNG, stored_files
+from app import media_key, purge_unreferenced_media, save_file
+from models import db, MediaBlob
+
+CONTENT = b'ID3 not really an mp3'
+
+
+def upload(name='clip.mp3'):
+    return FileStorage(io.BytesIO(CONTENT), filename=name)
+
+
+def test_concurrent_first_uploads_share_one_blob(app, monkeypatch):
+    storage = app_module.media_storage
+    put_file = storage.put_file
+
+    def put_file_while_another_upload_commits(local_path, key, content_type=None):
+        # The other request stores the same content and commits while this one is writing
+        monkeypatch.setattr(storage, 'put_file', put_file)
+        with db.engine.begin() as conn:
+            conn.execute(db.insert(MediaBlob).values(digest=hashlib.sha256(CONTENT).hexdigest(),
+                                                     url='/uploads/listening_audios/other.mp3', size=len(CONTENT), ref_count=0))
+        put_file(local_path, key, content_type)
+
+    monkeypatch.setattr(storage, 'put_file', put_file_while_another_upload_commits)
+    url = save_file(upload(), 'listening_audios')
+    db.session.commit()
+
+    assert url == '/uploads/listening_audios/other.mp3'
+    assert MediaBlob.query.count() == 1
+
+
+def test_upload_during_purge_survives_the_file_delete(app, monkeypatch):
+    url = save_file(upload(), 'listening_audios')
+    db.session.commit()
+    storage = app_module.media_storage
+    delete = storage.delete
+    reuploaded = []
+
+    def delete_after_an_upload_of_the_same_content(key):
+        # The purge has committed; an identical upload lands before its file delete
+        monkeypatch.setattr(storage, 'delete', delete)
+        reuploaded.append(save_file(upload(), 'listening_audios'))
+        db.session.commit()
+        return delete(key)
+
+    monkeypatch.setattr(storage, 'delete', delete_after_an_upload_of_the_same_content)
+    assert purge_unreferenced_media({url}) == 1
+
+    assert reuploaded[0] != url
+    assert storage.size(media_key(reuploaded[0])) == len(CONTENT)
+    assert MediaBlob.query.one().url == reuploaded[0]
+
+
+def post_listening(client, headers, payload):
+    data = {'sectionData': json.dumps(payload),
+            'audioItem_1_audioFile': (io.BytesIO(MP3 + b'lecture'), 'lecture.mp3'),
+            'audioItem_1_imageFile': (io.BytesIO(PNG), 'lecture.png'),
+            'question_10_snippetFile': (io.BytesIO(MP3 + b'snippet'), 'snippet.mp3'),
+            'audioItem_2_audioFile': (io.BytesIO(MP3 + b'conversation'), 'conversation.mp3')}
+    return client.post('/listening', data=data, headers=headers, content_type='multipart/form-data')
+
+
+def test_rejected_listening_section_stores_no_media(client, admin_headers):
+    payload = copy.deepcopy(LISTENING_SECTION)
+    del payload['audioItems'][1]['questions'][0]['id'] # Fails after the first item's files were read
+    before = stored_files()
+    response = post_listening(client, admin_headers, payload)
+
+    assert response.status_code == 400
+    assert MediaBlob.query.count() == 0
+    assert stored_files() == before
+
+
+def test_rejected_speaking_section_stores_no_media(client, admin_headers):
+    tasks = [{'taskNumber': n, 'prompt': f'Prompt {n}', 'passage': f'Passage {n}'} for n in range(1, 5)]
+    before = stored_files()
+    data = {'sectionData': json.dumps({'title': 'Speaking', 'tasks': tasks}),
+            'audio_task_2': (io.BytesIO(MP3 + b'task 2'), 'task2.mp3'),
+            'audio_task_3': (io.BytesIO(MP3 + b'task 3'), 'task3.mp3')} # No audio for task 4
+    response = client.post('/speaking', data=data, headers=admin_headers, content_type='multipart/form-data')
+
+    assert response.status_code == 400
+    assert MediaBlob.query.count() == 0
+    assert stored_files() == before
+
+
+def test_failed_listening_write_purges_its_media(client, admin_headers, monkeypatch):
+    def fail(specs):
+        raise RuntimeError('database went away')
+
+    monkeypatch.setattr(app_module, 'insert_question_specs', fail)
+    before = stored_files()
+    response = post_listening(client, admin_headers, LISTENING_SECTION)
+
+    assert response.status_code == 500
+    assert MediaBlob.query.count() == 0
+    assert stored_files() == before
@@ -0,0 +1,77 @@
+"""CLI migrations run against databases created by older versions of models.py."""
+from sqlalchemy import inspect as sa_inspect
+
+from models import db
+
+
+def create_schema_without_cascades():
+    # The schema before foreign keys declared ON DELETE rules
+    old_metadata = db.MetaData()
+    for table in db.metadata.sorted_tables:
+        table.to_metadata(old_metadata)
+    for table in old_metadata.tables.values():
+        for constraint in table.foreign_key_constraints:
+            constraint.ondelete = None
+    db.drop_all()
+    old_metadata.create_all(db.engine)
+
+
+def test_migrate_cascades_keeps_model_index_names(app):
+    create_schema_without_cascades()
+    db.session.execute(db.text("INSERT INTO sections (section_type, title, content_version) VALUES ('reading', 'R', 'v1')"))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['migrate-cascades'])
+    assert result.exit_code == 0, result.output
+
+    inspector = sa_inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        assert {index['name'] for index in inspector.get_indexes(table.name)} == {index.name for index in table.indexes}
+        declared = sorted((constraint.referred_table.name, constraint.ondelete) for constraint in table.foreign_key_constraints)
+        reflected = sorted((fk['referred_table'], fk['options'].get('ondelete')) for fk in inspector.get_foreign_keys(table.name))
+        assert reflected == declared, table.name
+    assert db.session.execute(db.text('SELECT title FROM sections')).scalar() == 'R'
+
+    result = app.test_cli_runner().invoke(args=['ensure-indexes'])
+    assert 'Created 0 indexes' in result.output
+
+
+def test_migrate_cascades_waits_for_the_data_migrations(app):
+    create_schema_without_cascades()
+    db.session.execute(db.text("INSERT INTO sections (id, section_type, title, content_version) VALUES (1, 'reading', 'R', 'v1')"))
+    db.session.execute(db.text("INSERT INTO reading_passages (id, section_id, title, content) VALUES (1, 1, 'P', 'text')"))
+    db.session.execute(db.text("INSERT INTO questions (section_type, type, prompt, reading_passage_id) "
+                               "VALUES ('reading', 'multiple_to_single', 'Q', 1)"))
+    db.session.commit()
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['migrate-cascades'])
+    assert result.exit_code != 0
+    assert '1 questions have no section_id; run backfill-question-sections' in result.output
+    assert not any(fk['options'].get('ondelete') for fk in sa_inspect(db.engine).get_foreign_keys('questions'))
+
+    assert runner.invoke(args=['backfill-question-sections']).exit_code == 0
+    result = runner.invoke(args=['migrate-cascades'])
+    assert result.exit_code == 0, result.output
+
+
+def test_migrate_score_links_drops_scores_with_no_link(app):
+    # Written while scores had typed columns but no check constraint
+    db.session.execute(db.text('DROP TABLE scores'))
+    metadata = db.MetaData()
+    for model_table in db.metadata.sorted_tables:
+        model_table.to_metadata(metadata)
+    table = metadata.tables['scores']
+    table.constraints = {c for c in table.constraints if c.name != 'score_response_link_check'}
+    table.create(db.engine)
+    db.session.execute(db.text("INSERT INTO scores (response_type, score) VALUES ('speaking', 3)"))
+    db.session.commit()
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['migrate-cascades'])
+    assert result.exit_code != 0
+    assert '1 scores have no typed response link; run migrate-score-links' in result.output
+
+    result = runner.invoke(args=['migrate-score-links'])
+    assert 'dropped 1 scores with no link' in result.output
+    assert runner.invoke(args=['migrate-cascades']).exit_code == 0
@@ -0,0 +1,68 @@
+"""The section loaders must cost the same number of SQL statements however many
+questions a section has (no N+1)."""
+import pytest
+from sqlalchemy import event
+
+from app import load_reading_section_content, load_listening_section_content
+from models import db, Section, ReadingPassage, ListeningAudio, Question, Option, \
+                   TableQuestionRow, TableQuestionColumn, QuestionAudio
+
+
+def count_statements(fn, *args):
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', count_statement)
+    try:
+        fn(*args)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_statement)
+    return len(statements)
+
+
+def seed_reading(questions):
+    section = Section(section_type='reading', title=f'Reading {questions}')
+    passages = [ReadingPassage(title=f'P{p}', content='...', section=section) for p in range(2)]
+    db.session.add_all([section, *passages])
+    db.session.flush()
+    for i in range(questions):
+        question = Question(section_id=section.id, section_type='reading', type='multiple_choice', prompt=f'Q{i}',
+                            reading_passage=passages[i % 2])
+        db.session.add(question)
+        db.session.add_all(Option(question=question, option_text=f'O{n}') for n in range(4))
+    db.session.commit()
+    section_id = section.id
+    db.session.expunge_all() # Nothing cached in the identity map
+    return section_id
+
+
+def seed_listening(questions):
+    section = Section(section_type='listening', title=f'Listening {questions}')
+    audios = [ListeningAudio(title=f'A{a}', audio_url=f'/uploads/listening_audios/{a}.mp3', section=section) for a in range(2)]
+    db.session.add_all([section, *audios])
+    db.session.flush()
+    for i in range(questions):
+        kind = ['multiple_choice', 'table', 'audio'][i % 3]
+        question = Question(section_id=section.id, section_type='listening', type=kind, prompt=f'Q{i}',
+                            listening_audio=audios[i % 2])
+        db.session.add(question)
+        if kind == 'table':
+            db.session.add_all(TableQuestionRow(question=question, row_label=f'R{n}') for n in range(3))
+            db.session.add_all(TableQuestionColumn(question=question, column_label=f'C{n}') for n in range(2))
+        else:
+            db.session.add_all(Option(question=question, option_text=f'O{n}') for n in range(4))
+        if kind == 'audio':
+            db.session.add(QuestionAudio(question=question, audio_url=f'/uploads/question_audios/{i}.mp3'))
+    db.session.commit()
+    section_id = section.id
+    db.session.expunge_all() # Nothing cached in the identity map
+    return section_id
+
+
+@pytest.mark.parametrize('seed, loader', [
+    (seed_reading, load_reading_section_content),
+    (seed_listening, load_listening_section_content),
+])
+def test_loader_query_count_is_constant(app, seed, loader):
+    small, large = seed(6), seed(12)
+    assert count_statements(loader, small) == count_statements(loader, large)
@@ -0,0 +1,57 @@
+"""A student's review summaries list every section type from one lookup."""
+import io
+
+from conftest import create_reading_section, MP3
+from models import Question
+from test_query_counts import count_statements
+
+
+def submit_reading(client, headers, section_id, choice='a'):
+    questions = Question.query.filter_by(section_id=section_id).all()
+    answers = {}
+    for question in questions:
+        answers.setdefault(str(question.reading_passage_id), {})[str(question.id)] = [choice]
+    response = client.post(f'/reading/{section_id}/submit', headers=headers, json={'answers': answers})
+    assert response.status_code == 200, response.json
+
+
+def submit_listening(client, headers, section_id):
+    question = Question.query.filter_by(section_id=section_id, type='multiple_to_single').first()
+    answers = {str(question.listening_audio_id): {str(question.id): ['b']}}
+    response = client.post(f'/listening/{section_id}/submit', headers=headers, json={'answers': answers})
+    assert response.status_code == 200, response.json
+
+
+def submit_speaking(client, headers, section_id):
+    for n in range(1, 5):
+        response = client.post(f'/speaking/{section_id}/tasks/{n}/submit', headers=headers, content_type='multipart/form-data',
+                               data={'recording': (io.BytesIO(MP3 + f'summary {section_id} {n}'.encode()), 'take.webm')})
+        assert response.status_code == 200, response.json
+
+
+def test_summaries_list_every_section_type(client, student_headers, reading_section, listening_section, speaking_section):
+    submit_listening(client, student_headers, listening_section)
+    submit_reading(client, student_headers, reading_section)
+    submit_speaking(client, student_headers, speaking_section)
+
+    response = client.get('/review/summaries', headers=student_headers)
+
+    assert response.status_code == 200, response.json
+    summaries = response.json
+    assert [(s['sectionId'], s['sectionType'], s['feedbackProvided']) for s in summaries] == [
+        (speaking_section, 'speaking', False), (reading_section, 'reading', False), (listening_section, 'listening', False)]
+    assert summaries[0]['attempt'] is None
+    assert summaries[1]['attempt']['scaledScore'] is not None
+    assert summaries[1]['sectionTitle'] == 'Reading'
+
+
+def test_summaries_cost_the_same_for_many_sections(client, admin_headers, student_headers, reading_section):
+    submit_reading(client, student_headers, reading_section)
+
+    def fetch():
+        assert client.get('/review/summaries', headers=student_headers).status_code == 200
+
+    one = count_statements(fetch)
+    for i in range(5):
+        submit_reading(client, student_headers, create_reading_section(client, admin_headers))
+    assert count_statements(fetch) == one
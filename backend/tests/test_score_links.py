@@ -0,0 +1,61 @@
+"""Scores link to the response they grade through one typed foreign key."""
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Score, SpeakingResponse, SpeakingTask, UserAnswer, WritingResponse
+from test_review_summaries import submit_reading, submit_speaking
+
+
+def test_speaking_review_reads_only_speaking_scores(client, admin_headers, student, student_headers,
+                                                    speaking_section, writing_section):
+    submit_speaking(client, student_headers, speaking_section)
+    response = client.post(f'/writing/{writing_section}/submit', headers=student_headers,
+                           json={'answers': {'task1': 'First essay', 'task2': 'Second essay'}})
+    assert response.status_code == 200, response.json
+    writing = WritingResponse.query.filter_by(user_id=student.id).order_by(WritingResponse.id).first()
+    speaking = SpeakingResponse.query.filter_by(id=writing.id).one() # Same id, other table
+    response = client.post(f'/admin/feedback/writing/{writing.id}', headers=admin_headers,
+                           json={'score': 5, 'feedback': 'Essay feedback'})
+    assert response.status_code == 200, response.json
+
+    response = client.get(f'/speaking/{speaking_section}/review/{student.id}', headers=admin_headers)
+
+    assert response.status_code == 200, response.json
+    task = next(t for t in response.json['tasks'] if t['response_id'] == speaking.id)
+    assert (task['score'], task['feedback']) == (None, None)
+
+
+def test_feedback_sets_the_link_for_its_type(client, admin_headers, student, student_headers, reading_section, speaking_section):
+    submit_reading(client, student_headers, reading_section)
+    submit_speaking(client, student_headers, speaking_section)
+    answer = UserAnswer.query.filter_by(user_id=student.id).first()
+    recording = SpeakingResponse.query.filter_by(user_id=student.id).first()
+
+    for response_type, response_id in [('reading', answer.id), ('speaking', recording.id)]:
+        response = client.post(f'/admin/feedback/{response_type}/{response_id}', headers=admin_headers,
+                               json={'score': 1, 'feedback': 'Seen'})
+        assert response.status_code == 200, response.json
+
+    links = {score.response_type: (score.speaking_response_id, score.writing_response_id, score.user_answer_id)
+             for score in Score.query}
+    assert links == {'reading': (None, None, answer.id), 'speaking': (recording.id, None, None)}
+
+
+def test_scores_go_with_their_section(client, admin_headers, student_headers, speaking_section):
+    submit_speaking(client, student_headers, speaking_section)
+    reviews = [{'response_id': r.id, 'task_id': r.task_id, 'score': 7, 'feedback': 'Fluent'}
+               for r in SpeakingResponse.query.join(SpeakingTask).filter(SpeakingTask.section_id == speaking_section)]
+    assert client.post(f'/speaking/{speaking_section}/review', headers=admin_headers, json=reviews).status_code == 200
+    assert Score.query.count() == 4
+
+    assert client.delete(f'/speaking/{speaking_section}', headers=admin_headers).status_code == 200
+
+    db.session.expire_all()
+    assert Score.query.count() == 0
+
+
+def test_a_score_links_only_to_its_own_type(app):
+    db.session.add(Score(response_type='speaking', user_answer_id=None, score=1))
+    with pytest.raises(IntegrityError):
+        db.session.flush()
+    db.session.rollback()
@@ -0,0 +1,31 @@
+"""Section scores must count every answer the student has stored, not only the latest request's."""
+from models import db, Question, ReadingPassage, SectionAttempt
+
+
+def seed_two_question_reading(client, admin_headers):
+    questions = [{'type': 'multiple_to_single', 'prompt': f'Q{i}', 'options': ['a', 'b', 'c'], 'correctOptionIndex': 1}
+                 for i in range(2)]
+    response = client.post('/reading', json={'title': 'Reading', 'passages': [{'title': 'P', 'content': '...', 'questions': questions}]},
+                           headers=admin_headers)
+    assert response.status_code == 201, response.json
+    section_id = response.json['id']
+    passage = ReadingPassage.query.filter_by(section_id=section_id).one()
+    question_ids = [q.id for q in Question.query.filter_by(section_id=section_id).order_by(Question.id)]
+    return section_id, passage.id, question_ids
+
+
+def test_partial_resubmit_keeps_earlier_answers_in_the_score(client, admin_headers, student, student_headers):
+    section_id, passage_id, (first, second) = seed_two_question_reading(client, admin_headers)
+
+    full = client.post(f'/reading/{section_id}/submit', headers=student_headers,
+                       json={'answers': {str(passage_id): {str(first): ['b'], str(second): ['b']}}})
+    assert (full.json['score'], full.json['scaled_score']) == (2, 30)
+
+    partial = client.post(f'/reading/{section_id}/submit', headers=student_headers,
+                          json={'answers': {str(passage_id): {str(second): ['b']}}})
+    assert (partial.json['score'], partial.json['max_score'], partial.json['scaled_score']) == (2, 2, 30)
+
+    assert client.post(f'/admin/sections/{section_id}/rescore', headers=admin_headers).status_code == 200
+    db.session.expire_all()
+    attempt = SectionAttempt.query.filter_by(user_id=student.id, section_id=section_id).one()
+    assert (attempt.raw_score, attempt.scaled_score) == (2, 30)
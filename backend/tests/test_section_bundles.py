@@ -0,0 +1,67 @@
+"""Section bundles: export -> import round trips and manifests that don't match their files."""
+import io
+import json
+import tarfile
+
+from conftest import answer_key_by_content
+from models import db, ListeningAudio, MediaBlob, Section
+
+
+def export_bundle(client, admin_headers, *section_ids):
+    response = client.get(f"/admin/sections/export?ids={','.join(map(str, section_ids))}", headers=admin_headers)
+    assert response.status_code == 200
+    return response.get_data()
+
+
+def import_bundle(client, admin_headers, bundle):
+    return client.post('/admin/sections/import', data={'bundle': (io.BytesIO(bundle), 'sections.tar')},
+                       headers=admin_headers, content_type='multipart/form-data')
+
+
+def rewrite_manifest(bundle, edit):
+    source, target = tarfile.open(fileobj=io.BytesIO(bundle)), io.BytesIO()
+    with tarfile.open(fileobj=target, mode='w') as out:
+        for member in source.getmembers():
+            data = source.extractfile(member).read()
+            if member.name == 'manifest.json':
+                manifest = json.loads(data)
+                edit(manifest)
+                data = json.dumps(manifest).encode()
+                member.size = len(data)
+            out.addfile(member, io.BytesIO(data))
+    return target.getvalue()
+
+
+def test_export_then_import_recreates_the_sections(client, admin_headers, reading_section, listening_section):
+    bundle = export_bundle(client, admin_headers, reading_section, listening_section)
+    blobs_before = MediaBlob.query.count()
+
+    response = import_bundle(client, admin_headers, bundle)
+    assert response.status_code == 201, response.json
+    reading_copy, listening_copy = [section['id'] for section in response.json['sections']]
+
+    assert answer_key_by_content(reading_copy) == answer_key_by_content(reading_section)
+    assert answer_key_by_content(listening_copy) == answer_key_by_content(listening_section)
+    # Identical media is stored once and shared
+    urls = lambda section_id: [(a.title, a.audio_url, a.photo_url) for a in ListeningAudio.query.filter_by(section_id=section_id)]
+    assert urls(listening_copy) == urls(listening_section)
+    assert MediaBlob.query.count() == blobs_before
+    copy = client.get(f'/listening/{listening_copy}').json
+    assert copy['title'] == 'Listening'
+
+
+def test_manifest_digest_must_match_the_file(client, admin_headers, listening_section):
+    bundle = export_bundle(client, admin_headers, listening_section)
+
+    def point_audio_at_the_photo(manifest):
+        media = manifest['media']
+        audio_path = manifest['sections'][0]['audioItems'][0]['audio']
+        photo_path = manifest['sections'][0]['audioItems'][0]['photo']
+        media[audio_path] = media[photo_path]
+
+    sections_before = Section.query.count()
+    response = import_bundle(client, admin_headers, rewrite_manifest(bundle, point_audio_at_the_photo))
+    assert response.status_code == 400
+    assert 'does not match its sha256' in response.json['error']
+    db.session.expire_all()
+    assert Section.query.count() == sections_before
@@ -0,0 +1,41 @@
+"""Per-process section caches must notice edits committed by other workers or nodes."""
+from app import get_answer_key, new_content_version
+from models import db, Section, Question, Option, CorrectAnswer
+
+
+def seed_reading_section(client, admin_headers):
+    data = {'title': 'Reading', 'passages': [{'title': 'P', 'content': '...', 'questions': [
+        {'type': 'multiple_to_single', 'prompt': 'Q1', 'options': ['a', 'b', 'c'], 'correctOptionIndex': 1}]}]}
+    response = client.post('/reading', json=data, headers=admin_headers)
+    assert response.status_code == 201, response.json
+    return response.json['id']
+
+
+def edit_elsewhere(section_id, **values):
+    # What another worker's edit leaves behind: new rows and a new content_version, but no
+    # chance to clear this process's caches
+    db.session.execute(db.update(Section).where(Section.id == section_id)
+                       .values(content_version=new_content_version(), **values))
+    db.session.commit()
+
+
+def test_snapshot_follows_edits_from_other_processes(client, admin_headers):
+    section_id = seed_reading_section(client, admin_headers)
+    first = client.get(f'/reading/{section_id}')
+    assert client.get(f'/reading/{section_id}', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    edit_elsewhere(section_id, title='Renamed')
+    second = client.get(f'/reading/{section_id}', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.json['title'] == 'Renamed'
+
+
+def test_answer_key_follows_edits_from_other_processes(client, admin_headers):
+    section_id = seed_reading_section(client, admin_headers)
+    question = Question.query.filter_by(section_id=section_id).one()
+    option_a, option_b, _ = Option.query.filter_by(question_id=question.id).order_by(Option.id).all()
+    assert get_answer_key('reading', section_id)[question.id][0] == {option_b.id}
+
+    CorrectAnswer.query.filter_by(question_id=question.id).update({'option_id': option_a.id})
+    edit_elsewhere(section_id)
+    assert get_answer_key('reading', section_id)[question.id][0] == {option_a.id}
@@ -0,0 +1,44 @@
+"""Cloning copies a section's whole graph with every reference remapped onto the copies."""
+import pytest
+from sqlalchemy import event
+
+from conftest import answer_key_by_content, create_reading_section
+from models import db, Option, Question
+
+
+@pytest.fixture
+def interleaved_authoring(app, client, admin_headers):
+    """Adds rows for another section between each of the clone's INSERTs, as a concurrent author would."""
+    other_section_id = create_reading_section(client, admin_headers)
+    other_questions = [q.id for q in Question.query.filter_by(section_id=other_section_id)]
+    engine = db.engine
+
+    def author_elsewhere(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO') and 'authored elsewhere' not in statement:
+            conn.connection.dbapi_connection.cursor().execute(
+                "INSERT INTO options (question_id, option_text) "
+                f"SELECT id, 'authored elsewhere' FROM questions WHERE id IN ({','.join(map(str, other_questions))})"
+            )
+
+    event.listen(engine, 'after_cursor_execute', author_elsewhere)
+    yield other_section_id
+    event.remove(engine, 'after_cursor_execute', author_elsewhere)
+
+
+@pytest.mark.parametrize('section_fixture', ['reading_section', 'listening_section'])
+def test_clone_copies_the_answer_key(request, client, admin_headers, section_fixture):
+    source_id = request.getfixturevalue(section_fixture)
+    other_section_id = request.getfixturevalue('interleaved_authoring')
+
+    response = client.post(f'/sections/{source_id}/clone', json={'title': 'Copy'}, headers=admin_headers)
+    assert response.status_code == 201, response.json
+    clone_id = response.json['id']
+
+    assert answer_key_by_content(clone_id) == answer_key_by_content(source_id)
+    assert Option.query.filter_by(option_text='authored elsewhere').count() > 0
+    assert {q.section_id for q in Question.query.join(Option).filter(Option.option_text == 'authored elsewhere')} == {other_section_id}
+    original_ids = {q.id for q in Question.query.filter_by(section_id=source_id)}
+    for question in Question.query.filter_by(section_id=clone_id):
+        assert question.id not in original_ids
+        assert all(option.question_id == question.id for option in question.options)
+        assert all(answer.question_id == question.id for answer in question.correct_answers)
@@ -0,0 +1,64 @@
+"""Speaking recordings submitted per task, finalized, and submitted again."""
+import io
+
+from conftest import MP3, stored_files
+from models import db, MediaBlob, SpeakingResponse, SpeakingTask
+
+
+def recording(label):
+    return (io.BytesIO(MP3 + label.encode()), f'{label}.webm')
+
+
+def submit_task(client, headers, section_id, task_number, label):
+    return client.post(f'/speaking/{section_id}/tasks/{task_number}/submit', data={'recording': recording(label)},
+                       headers=headers, content_type='multipart/form-data')
+
+
+def responses_by_task(section_id, student_id):
+    return dict(db.session.query(SpeakingTask.task_number, SpeakingResponse.audio_url)
+                .join(SpeakingResponse, SpeakingResponse.task_id == SpeakingTask.id)
+                .filter(SpeakingTask.section_id == section_id, SpeakingResponse.user_id == student_id)
+                .all())
+
+
+def test_finalize_lists_missing_tasks(client, student_headers, speaking_section):
+    assert submit_task(client, student_headers, speaking_section, 1, 'first').status_code == 200
+
+    response = client.post(f'/speaking/{speaking_section}/finalize', headers=student_headers)
+
+    assert response.status_code == 400
+    assert response.json['missingTasks'] == [2, 3, 4]
+
+
+def test_resubmitting_after_finalize_replaces_the_response(client, student, student_headers, speaking_section):
+    for n in range(1, 5):
+        assert submit_task(client, student_headers, speaking_section, n, f'take-1-task-{n}').status_code == 200
+    assert client.post(f'/speaking/{speaking_section}/finalize', headers=student_headers).status_code == 200
+    first = responses_by_task(speaking_section, student.id)
+
+    # Again per task, then the whole section at once; the (task, user) unique index must hold both times
+    assert submit_task(client, student_headers, speaking_section, 2, 'take-2-task-2').status_code == 200
+    data = {f'task{n}Recording': recording(f'take-3-task-{n}') for n in range(1, 5)}
+    response = client.post(f'/speaking/{speaking_section}/submit', data=data,
+                           headers=student_headers, content_type='multipart/form-data')
+
+    assert response.status_code == 200, response.json
+    assert SpeakingResponse.query.filter_by(user_id=student.id).count() == 4
+    latest = responses_by_task(speaking_section, student.id)
+    assert sorted(latest) == [1, 2, 3, 4]
+    assert not set(latest.values()) & set(first.values())
+    assert client.post(f'/speaking/{speaking_section}/finalize', headers=student_headers).status_code == 200
+
+
+def test_rejected_section_submit_stores_no_recordings(client, student_headers, speaking_section):
+    SpeakingTask.query.filter_by(section_id=speaking_section, task_number=4).delete()
+    db.session.commit()
+    blobs, before = MediaBlob.query.count(), stored_files()
+    data = {f'task{n}Recording': recording(f'orphan-task-{n}') for n in range(1, 5)}
+
+    response = client.post(f'/speaking/{speaking_section}/submit', data=data,
+                           headers=student_headers, content_type='multipart/form-data')
+
+    assert response.status_code == 404
+    assert MediaBlob.query.count() == blobs
+    assert stored_files() == before
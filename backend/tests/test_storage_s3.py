@@ -0,0 +1,66 @@
+"""S3Storage against a local moto server: object round trips and the presigned redirect from /files."""
+import io
+import socket
+import urllib.request
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+moto_server = pytest.importorskip('moto.server')
+
+import app as app_module
+from app import media_key, save_file
+from storage import S3Storage
+
+CONTENT = b'ID3' + bytes(range(256)) * 4
+
+
+@pytest.fixture(scope='module')
+def s3_endpoint():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = moto_server.ThreadedMotoServer(ip_address='127.0.0.1', port=port, verbose=False)
+    server.start()
+    yield f'http://127.0.0.1:{port}'
+    server.stop()
+
+
+@pytest.fixture
+def s3_storage(app, s3_endpoint, monkeypatch):
+    storage = S3Storage('media', endpoint_url=s3_endpoint, region='us-east-1',
+                        access_key_id='test', secret_access_key='test')
+    storage.client.create_bucket(Bucket='media')
+    monkeypatch.setattr(app_module, 'media_storage', storage)
+    yield storage
+    storage.delete_prefix('')
+    storage.client.delete_bucket(Bucket='media')
+
+
+def test_put_open_list_and_delete(s3_storage, tmp_path):
+    local_path = tmp_path / 'clip.mp3'
+    local_path.write_bytes(CONTENT)
+
+    s3_storage.put_file(str(local_path), 'uploads/listening_audios/clip.mp3', 'audio/mpeg')
+    assert not local_path.exists() # put_file takes ownership of the local file
+    assert s3_storage.size('uploads/listening_audios/clip.mp3') == len(CONTENT)
+    assert s3_storage.open('uploads/listening_audios/clip.mp3').read() == CONTENT
+    assert s3_storage.list_keys('uploads/listening_audios/') == ['uploads/listening_audios/clip.mp3']
+
+    assert s3_storage.delete('uploads/listening_audios/clip.mp3') is True
+    assert s3_storage.size('uploads/listening_audios/clip.mp3') is None
+    assert s3_storage.delete('uploads/listening_audios/clip.mp3') is False
+
+
+def test_files_route_redirects_to_a_working_presigned_url(client, s3_storage):
+    url = save_file(FileStorage(io.BytesIO(CONTENT), filename='clip.mp3'), 'listening_audios')
+    assert s3_storage.size(media_key(url)) == len(CONTENT)
+
+    response = client.get(f'/files{url}')
+    assert response.status_code == 302
+    assert response.headers['Cache-Control'].startswith('private')
+    with urllib.request.urlopen(response.location) as presigned:
+        assert presigned.read() == CONTENT
+    ranged = urllib.request.Request(response.location, headers={'Range': 'bytes=3-6'})
+    with urllib.request.urlopen(ranged) as presigned:
+        assert presigned.status == 206 and presigned.read() == CONTENT[3:7]
@@ -0,0 +1,61 @@
+"""student_section_progress follows submissions, reviews and feedback as they are written."""
+from models import db, SpeakingResponse, SpeakingTask, StudentSectionProgress, UserAnswer, WritingResponse
+from test_review_summaries import submit_reading, submit_speaking
+
+
+def progress(student_id, section_id):
+    db.session.expire_all()
+    row = StudentSectionProgress.query.filter_by(user_id=student_id, section_id=section_id).one()
+    return row.response_count, row.scored_count, row.feedback_provided
+
+
+def feedback_provided(client, headers, section_id):
+    summaries = client.get('/review/summaries', headers=headers).json
+    return next(s['feedbackProvided'] for s in summaries if s['sectionId'] == section_id)
+
+
+def test_writing_review_marks_the_section_reviewed(client, admin_headers, student, student_headers, writing_section):
+    response = client.post(f'/writing/{writing_section}/submit', headers=student_headers,
+                           json={'answers': {'task1': 'First essay', 'task2': 'Second essay'}})
+    assert response.status_code == 200, response.json
+    assert progress(student.id, writing_section) == (2, 0, False)
+
+    responses = WritingResponse.query.filter_by(user_id=student.id).all()
+    response = client.post(f'/writing/{writing_section}/review', headers=admin_headers,
+                           json=[{'response_id': r.id, 'score': 80, 'feedback': 'Clear'} for r in responses])
+
+    assert response.status_code == 200, response.json
+    assert progress(student.id, writing_section) == (2, 2, True)
+    assert feedback_provided(client, student_headers, writing_section) is True
+
+
+def test_speaking_review_marks_the_section_reviewed(client, admin_headers, student, student_headers, speaking_section):
+    submit_speaking(client, student_headers, speaking_section)
+    assert progress(student.id, speaking_section) == (4, 0, False)
+
+    reviews = [{'response_id': r.id, 'task_id': r.task_id, 'score': 7, 'feedback': 'Fluent'}
+               for r in SpeakingResponse.query.join(SpeakingTask).filter(SpeakingTask.section_id == speaking_section)]
+    response = client.post(f'/speaking/{speaking_section}/review', headers=admin_headers, json=reviews)
+
+    assert response.status_code == 200, response.json
+    assert progress(student.id, speaking_section) == (4, 4, True)
+    assert feedback_provided(client, student_headers, speaking_section) is True
+
+
+def test_feedback_and_resubmit_update_reading_progress(client, admin_headers, student, student_headers, reading_section):
+    submit_reading(client, student_headers, reading_section)
+    answers = UserAnswer.query.filter_by(user_id=student.id).all()
+    assert progress(student.id, reading_section) == (len(answers), 0, False)
+
+    for answer in answers:
+        response = client.post(f'/admin/feedback/reading/{answer.id}', headers=admin_headers, json={'score': 1, 'feedback': 'Ok'})
+        assert response.status_code == 200, response.json
+    assert progress(student.id, reading_section) == (len(answers), len(answers), True)
+
+    # New answers drop the feedback given on the old ones
+    submit_reading(client, student_headers, reading_section, choice='b')
+    assert progress(student.id, reading_section) == (len(answers), 0, False)
+
+    result = client.application.test_cli_runner().invoke(args=['rebuild-progress'])
+    assert result.exit_code == 0, result.output
+    assert progress(student.id, reading_section) == (len(answers), 0, False)
@@ -0,0 +1,34 @@
+"""Per-field accepted media types on multipart uploads."""
+import io
+import json
+
+import pytest
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\0' * 24
+MP3 = b'ID3\x04\0\0\0\0\0\0' + b'\0' * 24
+SECTION = {'title': 'L', 'audioItems': [{'id': 1, 'title': 'A', 'questions': [
+    {'id': 10, 'type': 'audio', 'prompt': 'Q', 'options': ['a', 'b'], 'correctOptionIndex': 1}]}]}
+
+
+def post_listening(client, admin_headers, **files):
+    data = {'sectionData': json.dumps(SECTION)}
+    data.update({field: (io.BytesIO(content), name) for field, (content, name) in files.items()})
+    return client.post('/listening', data=data, headers=admin_headers, content_type='multipart/form-data')
+
+
+def test_listening_fields_take_their_own_media(client, admin_headers):
+    response = post_listening(client, admin_headers, audioItem_1_audioFile=(MP3, 'a.mp3'),
+                              audioItem_1_imageFile=(PNG, 'a.png'), question_10_snippetFile=(MP3, 's.mp3'))
+    assert response.status_code == 201, response.json
+
+
+@pytest.mark.parametrize('field, upload', [
+    ('audioItem_1_audioFile', (PNG, 'a.mp3')),          # An image dressed up as audio
+    ('audioItem_1_audioFile', (PNG, 'a.png')),
+    ('question_10_snippetFile', (PNG, 's.mp3')),
+    ('audioItem_1_imageFile', (MP3, 'a.png')),
+    ('anything_else', (MP3, 'x.mp3')),
+])
+def test_listening_fields_refuse_other_media(client, admin_headers, field, upload):
+    files = {'audioItem_1_audioFile': (MP3, 'a.mp3'), field: upload}
+    assert post_listening(client, admin_headers, **files).status_code == 415
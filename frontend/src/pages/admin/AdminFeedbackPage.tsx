@@ -41,6 +41,8 @@ export interface SectionSummaryAdmin {
     responseText?: string | null; // Writing
     wordCount?: number | null; // Writing
     userSelection?: any | null; // R/L user answer representation
+    responseIds?: number[]; // R/L: every UserAnswer.id of the question
+    isCorrect?: boolean; // R/L: judged per question like the submit endpoints
     // Context for R/L might be needed here too if feedback form loads directly
     options?: { id: number; text: string }[] | null;
     rows?: { id: number; label: string }[] | null;
@@ -66,6 +68,7 @@ export interface SectionSummaryAdmin {
       sectionTitle: string;
       sectionType: 'speaking' | 'writing' | 'reading' | 'listening';
       submissions: StudentSectionResponsesAdmin[]; // Responses grouped by student
+      nextAfterUserId?: number | null; // Keyset cursor for the next page of students
   }
   
   // Data needed specifically for the Admin Feedback Form page
@@ -115,6 +118,7 @@ const AdminFeedbackPage = () => {
   const [selectedSectionDetails, setSelectedSectionDetails] = useState<SectionDetailAdminView | null>(null);
   const [isLoadingList, setIsLoadingList] = useState(false);
   const [isLoadingDetails, setIsLoadingDetails] = useState(false);
+  const [isLoadingMoreDetails, setIsLoadingMoreDetails] = useState(false);
   const [listError, setListError] = useState<string | null>(null);
   const [detailError, setDetailError] = useState<string | null>(null);
 
@@ -184,6 +188,25 @@ const AdminFeedbackPage = () => {
     }
   };
 
+  // Appends the next page of students to the selected section's details
+  const handleLoadMoreSubmissions = async () => {
+    if (!token || !selectedSectionDetails?.nextAfterUserId) return;
+    const { sectionId, sectionType, nextAfterUserId } = selectedSectionDetails;
+    setIsLoadingMoreDetails(true);
+
+    try {
+      const page = await fetchAdminSectionDetails(sectionType, sectionId, token, nextAfterUserId);
+      setSelectedSectionDetails(current => current && current.sectionId === sectionId
+        ? { ...current, submissions: [...current.submissions, ...page.submissions], nextAfterUserId: page.nextAfterUserId }
+        : current);
+    } catch (error: any) {
+      console.error(`Error fetching more submissions for section ${sectionId}:`, error);
+      toast.error(`Failed to load more students. ${error.message || 'Please try again.'}`);
+    } finally {
+      setIsLoadingMoreDetails(false);
+    }
+  };
+
   // --- Navigation Handler ---
   const handleProvideFeedback = (responseId: number, responseType: 'speaking' | 'writing' | 'reading' | 'listening') => {
         let navigateToPath = '';
@@ -347,6 +370,15 @@ const AdminFeedbackPage = () => {
                              </AccordionItem>
                            ))}
                          </Accordion>
+
+                         {selectedSectionDetails.nextAfterUserId && (
+                           <div className="flex justify-center mt-4">
+                             <Button variant="outline" onClick={handleLoadMoreSubmissions} disabled={isLoadingMoreDetails}>
+                               {isLoadingMoreDetails && <Loader2 className="h-4 w-4 animate-spin mr-2" />}
+                               Load more students
+                             </Button>
+                           </div>
+                         )}
                        </div>
                      )}
                     </CardContent>
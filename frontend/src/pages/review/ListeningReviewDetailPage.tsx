@@ -24,6 +24,11 @@ const renderAnswerRepresentation = (selection: any, options?: { id: number; text
          const colLabel = cols.find((c: any) => c.id === selection.colId)?.label ?? `ColID ${selection.colId}`;
          return `"${rowLabel}" / "${colLabel}"`;
     }
+    if (Array.isArray(selection) && selection.length > 0 && selection[0]?.rowId !== undefined && rows && cols) {
+        return selection
+            .map((cell: any) => renderAnswerRepresentation(cell, options, rows, cols))
+            .join('; ');
+    }
     if (Array.isArray(selection) && options) {
         const selectedTexts = selection
             .map(id => options?.find(opt => opt.id === id)?.text)
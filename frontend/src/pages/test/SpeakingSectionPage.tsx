@@ -5,7 +5,7 @@ import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { toast } from 'sonner';
 import { useAuth } from '@/context/AuthContext';
-import { fetchSectionById, submitSpeakingAnswers, getFileUrl } from '@/services/api'; // Assuming this service exists and works
+import { fetchSectionById, submitSpeakingTask, finalizeSpeakingSection, getFileUrl } from '@/services/api'; // Assuming this service exists and works
 import Header from '@/components/layout/Header'; // Assuming these layout components exist
 import Timer from '@/components/test/Timer'; // Assuming this Timer component exists and matches the revised signature
 import AudioPlayer from '@/components/test/AudioPlayer'; // Assuming this component exists
@@ -108,6 +108,7 @@ const SpeakingSectionPage = () => {
   const collectedChunksRef = useRef<Blob[]>([]);
   const streamRef = useRef<MediaStream | null>(null);
   const mediaRecorderRef = useRef<MediaRecorder | null>(null); // Optional: Ref for recorder too
+  const taskSubmissionsRef = useRef<Record<number, Promise<boolean>>>({}); // Task ID -> background submission (true once stored)
   // const blobUrlRef = useRef<string | null>(null); // If using blob URL cleanup pattern
 
   const { token, isAuthenticated } = useAuth();
@@ -127,6 +128,7 @@ const SpeakingSectionPage = () => {
       setCurrentTaskIndex(0);
       setPhase('initial');
       setRecordings({});
+      taskSubmissionsRef.current = {};
 
       try {
         // Fetch raw data (adapt 'speaking' type if needed by your API service)
@@ -269,6 +271,12 @@ const SpeakingSectionPage = () => {
             if (taskForRecording) {
                 if (audioBlob.size > 0) {
                     setRecordings(prev => ({ ...prev, [taskForRecording.id]: audioBlob }));
+                    // Submit this task right away so uploads are spread over the session
+                    if (section && token) {
+                        taskSubmissionsRef.current[taskForRecording.id] = submitSpeakingTask(
+                            Number(section.id), taskForRecording.task_number, audioBlob, token
+                        ).then(() => true, () => false);
+                    }
                     console.log("Valid blob stored.");
                     toast.success('Response recorded');
                     setPhase('completed_task'); // Correct: Move to completion
@@ -447,39 +455,20 @@ const SpeakingSectionPage = () => {
 
     setIsSubmitting(true);
 
-    // --- Prepare the recordings object for the API function ---
-    const recordingsForApi: Record<string, Blob> = {};
-    let allRecordingsFound = true;
-
-    section.tasks.forEach(task => {
-        const recordingBlob = recordings[task.id]; // Get blob using task.id key from state
-        if (recordingBlob) {
-            const key = `task${task.task_number}Recording`; // Create backend-expected key
-            recordingsForApi[key] = recordingBlob; // Add blob to the object with the correct key
-        } else {
-             console.warn(`Attempting to submit, but recording for task ID ${task.id} (Task Number ${task.task_number}) not found!`);
-             toast.error(`Internal error: Recording for task ${task.task_number} missing.`);
-             allRecordingsFound = false;
+    try {
+      // Wait for the per-task submissions started as each recording ended; retry any that failed
+      for (const task of section.tasks) {
+        const submitted = await (taskSubmissionsRef.current[task.id] ?? Promise.resolve(false));
+        if (!submitted) {
+          console.warn(`Resubmitting recording for task ${task.task_number}`);
+          await submitSpeakingTask(Number(section.id), task.task_number, recordings[task.id], token);
         }
-    });
-
-    if (!allRecordingsFound) {
-        setIsSubmitting(false);
-        return;
-    }
-    // --- End data preparation ---
-
-    console.log("Calling submitSpeakingAnswers with recordings object keys:", Object.keys(recordingsForApi));
+      }
 
-    try {
-      // --- Call the imported API function ---
-      const response = await submitSpeakingAnswers(
-        Number(section.id), // Ensure sectionId is a number
-        recordingsForApi,
-        token
-      );
+      // Server confirms all tasks are present
+      const response = await finalizeSpeakingSection(Number(section.id), token);
 
-      // Assuming submitSpeakingAnswers (or handleResponse it uses) throws on error
+      // Assuming the API functions (or handleResponse they use) throw on error
       console.log("Speaking Submission Successful:", response);
       setIsComplete(true);
       toast.success('Speaking responses submitted successfully!');
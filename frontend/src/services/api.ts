@@ -111,24 +111,79 @@ export const submitListeningAnswers = async (sectionId: number, answers: any, to
   );
 };
 
-export const submitSpeakingAnswers = async (
-  sectionId: number, 
-  recordings: Record<string, Blob>,
+const UPLOAD_CHUNK_SIZE = 1024 * 1024;
+const UPLOAD_MAX_RETRIES = 5;
+
+// Sends a blob through the resumable upload API and returns its uploadId once finalized.
+// After a failed chunk it asks the server for its offset and carries on from there.
+export const uploadResumable = async (
+  blob: Blob,
+  filename: string,
+  token: string | null,
+  purpose = 'speaking_recording'
+): Promise<string> => {
+  const authHeader = { 'Authorization': `Bearer ${token}` };
+  const upload = await fetch(`${API_URL}/uploads`, {
+    method: 'POST',
+    headers: { ...authHeader, 'Content-Type': 'application/json' },
+    body: JSON.stringify({ size: blob.size, filename, purpose }),
+  }).then(handleResponse);
+
+  let offset: number = upload.offset;
+  let retries = 0;
+  while (offset < blob.size) {
+    let response: Response | undefined;
+    try {
+      response = await fetch(`${API_URL}/uploads/${upload.uploadId}?offset=${offset}`, {
+        method: 'PUT',
+        headers: { ...authHeader, 'Content-Type': 'application/octet-stream' },
+        body: blob.slice(offset, offset + UPLOAD_CHUNK_SIZE),
+      });
+    } catch (error) {
+      response = undefined; // Network error, retried below
+    }
+    if (response && (response.ok || response.status === 409)) {
+      // 409 carries the offset the server actually has
+      offset = (await response.json()).offset;
+      retries = 0;
+    } else if (response && response.status < 500) {
+      await handleResponse(response); // Not retryable, throws
+    } else {
+      if (++retries > UPLOAD_MAX_RETRIES) throw new Error('Recording upload failed, please try again');
+      await new Promise((resolve) => setTimeout(resolve, 500 * 2 ** retries));
+      offset = (await fetch(`${API_URL}/uploads/${upload.uploadId}`, { headers: authHeader })
+        .then(handleResponse)).offset;
+    }
+  }
+
+  await fetch(`${API_URL}/uploads/${upload.uploadId}/finalize`, {
+    method: 'POST',
+    headers: authHeader,
+  }).then(handleResponse);
+  return upload.uploadId;
+};
+
+// Submits one task's recording as soon as it has been recorded
+export const submitSpeakingTask = async (
+  sectionId: number,
+  taskNumber: number,
+  recording: Blob,
   token: string | null
 ) => {
-  const formData = new FormData();
-  
-  Object.entries(recordings).forEach(([key, blob]) => {
-    formData.append(key, blob);
-  });
-  
-  return fetch(`${API_URL}/speaking/${sectionId}/submit`, {
-    method: 'POST',
-    headers: {
-      'Authorization': `Bearer ${token}`,
+  const uploadId = await uploadResumable(recording, `task${taskNumber}Recording.webm`, token);
+  return authenticatedFetch(
+    `/speaking/${sectionId}/tasks/${taskNumber}/submit`,
+    {
+      method: 'POST',
+      body: JSON.stringify({ uploadId }),
     },
-    body: formData,
-  }).then(handleResponse);
+    token
+  );
+};
+
+// Confirms every task of the section has a submitted recording
+export const finalizeSpeakingSection = async (sectionId: number, token: string | null) => {
+  return authenticatedFetch(`/speaking/${sectionId}/finalize`, { method: 'POST' }, token);
 };
 
 export const submitWritingAnswers = async (
@@ -298,11 +353,21 @@ export const createWritingSection = async (
 
 // src/services/api.ts
 //import { SectionSummaryUser, UserSectionReviewDetail, SectionSummary, SectionDetailAdminView, FeedbackTargetDetails } from '@/types'; // Adjust path
+// Stored reading/listening result (one per student per section)
+export interface SectionAttemptInfo {
+  rawScore: number;
+  maxScore: number;
+  scaledScore: number; // 0-30
+  submittedAt: string | null; // ISO date string
+}
+
 export interface SectionSummaryUser {
   sectionId: number;
   sectionTitle: string;
   sectionType: 'speaking' | 'writing' | 'reading' | 'listening';
   completedAt?: string; // Optional: ISO date string when completed
+  feedbackProvided?: boolean;
+  attempt?: SectionAttemptInfo | null; // Reading/listening only
 }
 
 // Details of a user's task/question response within a section review
@@ -321,6 +386,7 @@ export interface UserTaskReview {
         wordCount?: number | null; // Writing
         userSelection?: any | null; // Reading/Listening (could be optionId, {rowId, colId}, array of optionIds)
         isCorrect?: boolean | null; // Auto-calculated correctness for R/L
+        responseIds?: number[]; // R/L: every UserAnswer.id grouped under this question
     } | null; // Null if user didn't answer
     // Score and feedback details
     score: {
@@ -330,6 +396,8 @@ export interface UserTaskReview {
     } | null; // Null if not scored/no feedback
     // Optional: For R/L, you might want to include correct answer info
     correctAnswer?: any | null; // Representation of the correct answer (e.g., optionId, {rowId, colId}, array)
+    points?: number; // R/L: points the question is worth
+    pointsEarned?: number; // R/L: points awarded for the user's selection
     options?: { id: number; text: string }[] | null; // R/L options context
     rows?: { id: number; label: string }[] | null;    // R/L table rows context
     columns?: { id: number; label: string }[] | null; // R/L table columns context
@@ -341,6 +409,7 @@ export interface UserSectionReviewDetail {
     sectionTitle: string;
     sectionType: 'speaking' | 'writing' | 'reading' | 'listening';
     tasks: UserTaskReview[];
+    attempt?: SectionAttemptInfo | null; // Reading/listening only
 }
 
 
@@ -352,6 +421,7 @@ export interface SectionSummaryAdmin {
   sectionTitle: string;
   sectionType: 'speaking' | 'writing' | 'reading' | 'listening';
   studentCount: number; // Number of unique students who submitted
+  averageScaledScore?: number; // Reading/listening only, 0-30
   // Optional: Add counts like 'needsReviewCount' if provided by backend
 }
 
@@ -367,6 +437,8 @@ export interface TaskResponseInfoAdmin {
   responseText?: string | null; // Writing
   wordCount?: number | null; // Writing
   userSelection?: any | null; // R/L user answer representation
+  responseIds?: number[]; // R/L: every UserAnswer.id of the question
+  isCorrect?: boolean; // R/L: judged per question like the submit endpoints
   // Context for R/L might be needed here too if feedback form loads directly
   options?: { id: number; text: string }[] | null;
   rows?: { id: number; label: string }[] | null;
@@ -384,6 +456,7 @@ export interface StudentSectionResponsesAdmin {
     name: string; // Or email, depending on what backend sends
   };
   responses: TaskResponseInfoAdmin[]; // List of responses from this student for the section
+  attempt?: SectionAttemptInfo | null; // Reading/listening only
 }
 
 // Detailed view of a section's responses for the admin
@@ -392,6 +465,7 @@ export interface SectionDetailAdminView {
     sectionTitle: string;
     sectionType: 'speaking' | 'writing' | 'reading' | 'listening';
     submissions: StudentSectionResponsesAdmin[]; // Responses grouped by student
+    nextAfterUserId?: number | null; // Keyset cursor for the next page of students
 }
 
 // Data needed specifically for the Admin Feedback Form page
@@ -448,8 +522,10 @@ export const fetchAdminSectionSummaries = async (sectionType: string, token: str
     return authenticatedFetch(`/admin/review/summaries?type=${sectionType}`, {}, token);
 };
 
-export const fetchAdminSectionDetails = async (sectionType: string, sectionId: number, token: string | null): Promise<SectionDetailAdminView> => {
-    return authenticatedFetch(`/admin/review/${sectionType}/${sectionId}`, {}, token);
+export const fetchAdminSectionDetails = async (sectionType: string, sectionId: number, token: string | null, afterUserId?: number | null): Promise<SectionDetailAdminView> => {
+    // One page of students; pass the previous page's nextAfterUserId to get the next one
+    const query = afterUserId ? `?after_user_id=${afterUserId}` : '';
+    return authenticatedFetch(`/admin/review/${sectionType}/${sectionId}${query}`, {}, token);
 };
 
 export const fetchFeedbackTargetDetails = async (responseType: string, responseId: number, token: string | null): Promise<FeedbackTargetDetails> => {